@@ -1,26 +1,84 @@
 import os
-from typing import Dict, List, Any, Optional, TypedDict
-from langchain_community.chat_models import BedrockChat
-from langchain_core.tools import tool
+import uuid
+import asyncio
+import inspect
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, TypedDict, Iterator, AsyncIterator
+from langchain_core.tools import tool, StructuredTool
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode
-from langchain_community.tools import TavilySearchResults
 from dotenv import load_dotenv
-from vector_store import vector_search_impl
+from vector_store import (vector_search_impl, vector_search_results, vector_search_batch, vector_store,
+                          encode_texts, current_category_versions, get_retrieval_client)
+from query_router import CentroidRouter
+from response_cache import SemanticResponseCache
+from context_budget import assemble_context, internal_passages, web_passages
+from conversation_memory import ConversationMemory, open_checkpointer
+from web_search_cache import WebSearchCache, LocalWebSearch
+from llm_client import ResilientChatModel, ConcurrencyLimiter, LLMCallStats, bedrock_client
+import tracing
 
 load_dotenv()
 
-import boto3
-bedrock_client = boto3.client('bedrock-runtime', region_name=os.getenv("AWS_REGION", "us-east-1"))
-llm = BedrockChat(
-    client=bedrock_client,
-    model_id="anthropic.claude-3-sonnet-20240229-v1:0",
-    model_kwargs={"temperature": 0}
-)
+_llm = None
+_llm_lock = threading.Lock()
+# Per-node LLM latency, retry and failure counters
+llm_call_stats = LLMCallStats()
+
+def get_llm():
+    """Return the shared Bedrock chat model, creating the client on first use.
+
+    One pooled boto3 client is shared by every node and thread; calls go
+    through ResilientChatModel for limiting, retries and per-node stats.
+    """
+    global _llm
+    if _llm is None:
+        with _llm_lock:
+            if _llm is None:
+                # Deferred so importing agents does not pay for boto3/langchain_community
+                from langchain_community.chat_models import BedrockChat
+                _llm = ResilientChatModel(
+                    model=BedrockChat(
+                        client=bedrock_client(),
+                        model_id="anthropic.claude-3-sonnet-20240229-v1:0",
+                        model_kwargs={"temperature": 0}
+                    ),
+                    limiter=ConcurrencyLimiter(
+                        max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+                        rate_per_second=float(os.getenv("LLM_RATE_LIMIT", "0"))
+                    ),
+                    stats=llm_call_stats,
+                    max_retries=int(os.getenv("LLM_MAX_RETRIES", "4"))
+                )
+    return _llm
+
+def __getattr__(name: str):
+    # Keep `from agents import llm` working without an import-time client
+    if name == "llm":
+        return get_llm()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def warm_up():
+    """Load the embedding model, vector database and LLM client before the first query.
+
+    With a retrieval server configured, only check that it is reachable.
+    """
+    client = get_retrieval_client()
+    if client is not None:
+        client.info()
+    else:
+        vector_store.warm_up()
+    get_llm()
 
 class AgentState(TypedDict):
+    # Conversation memory, carried between turns by the checkpointer
     messages: List[Any]
+    summary: Optional[str]
+    # Per-turn fields; nodes return only the ones they change
     query: str
     classification: Optional[str]
     response: Optional[str]
@@ -29,31 +87,97 @@ class AgentState(TypedDict):
     graph_data: Optional[Dict]
     final_answer: Optional[str]
     used_web_search: Optional[bool]
+    route_path: Optional[str]
+    cache_hit: Optional[bool]
+    metrics: Optional[Dict]
+
+TURN_FIELDS = ("query", "classification", "response", "agent_used", "tool_results", "graph_data",
+               "final_answer", "used_web_search", "route_path", "cache_hit", "metrics")
+
+def turn_input(query: str) -> AgentState:
+    """Input for one conversation turn: resets the per-turn fields, leaves the memory alone."""
+    return {**{field: None for field in TURN_FIELDS}, "query": query}
 
 from langchain_core.tools import tool
 vector_search = tool(vector_search_impl)
 
-@tool
-def web_search(query: str) -> str:
+TAVILY_NOT_CONFIGURED = "Tavily API key not configured. Please set TAVILY_API_KEY in your environment variables."
+
+_web_search_client = None
+_web_search_cache = None
+_web_search_lock = threading.Lock()
+
+def _use_local_web_search() -> bool:
+    return os.getenv("WEB_SEARCH_BACKEND", "tavily").lower() == "local"
+
+def get_web_search_client():
+    """Return the shared search client: Tavily, or the offline stand-in when WEB_SEARCH_BACKEND=local."""
+    global _web_search_client
+    if _web_search_client is None:
+        with _web_search_lock:
+            if _web_search_client is None:
+                if _use_local_web_search():
+                    _web_search_client = LocalWebSearch(latency=float(os.getenv("WEB_SEARCH_LOCAL_LATENCY", "0")))
+                else:
+                    from langchain_community.tools import TavilySearchResults
+                    _web_search_client = TavilySearchResults(max_results=5)
+    return _web_search_client
+
+def get_web_search_cache() -> WebSearchCache:
+    """Return the shared web search result cache, opened on first use."""
+    global _web_search_cache
+    if _web_search_cache is None:
+        with _web_search_lock:
+            if _web_search_cache is None:
+                _web_search_cache = WebSearchCache(
+                    cache_path=os.getenv("WEB_SEARCH_CACHE_PATH", "web_search_cache.db"),
+                    ttl_seconds=float(os.getenv("WEB_SEARCH_CACHE_TTL", "3600"))
+                )
+    return _web_search_cache
+
+def _check_web_results(results):
+    # TavilySearchResults reports errors as a string; never cache those
+    if not isinstance(results, list):
+        raise RuntimeError(str(results))
+    return results
+
+def _fetch_web_results(query: str):
+    return _check_web_results(get_web_search_client().invoke(query))
+
+async def _afetch_web_results(query: str):
+    return _check_web_results(await get_web_search_client().ainvoke(query))
+
+def _format_web_results(results) -> str:
+    formatted_results = []
+    for i, result in enumerate(results, 1):
+        title = result.get('title', 'No title')
+        content = result.get('content', 'No content')
+        url = result.get('url', 'No URL')
+        formatted_results.append(f"[{i}] {title}\n{content}\nURL: {url}\n")
+
+    return "\n".join(formatted_results)
+
+def _web_search(query: str) -> str:
     """Search the web for current information using Tavily search."""
     try:
-        if not os.getenv("TAVILY_API_KEY"):
-            return "Tavily API key not configured. Please set TAVILY_API_KEY in your environment variables."
-
-        search = TavilySearchResults(max_results=5)
-        results = search.invoke(query)
-
-        formatted_results = []
-        for i, result in enumerate(results, 1):
-            title = result.get('title', 'No title')
-            content = result.get('content', 'No content')
-            url = result.get('url', 'No URL')
-            formatted_results.append(f"[{i}] {title}\n{content}\nURL: {url}\n")
+        if not os.getenv("TAVILY_API_KEY") and not _use_local_web_search():
+            return TAVILY_NOT_CONFIGURED
+        with tracing.timed("web_search_seconds"):
+            return _format_web_results(get_web_search_cache().get_or_fetch(query, _fetch_web_results))
+    except Exception as e:
+        return f"Error in web search: {str(e)}"
 
-        return "\n".join(formatted_results)
+async def _aweb_search(query: str) -> str:
+    try:
+        if not os.getenv("TAVILY_API_KEY") and not _use_local_web_search():
+            return TAVILY_NOT_CONFIGURED
+        with tracing.timed("web_search_seconds"):
+            return _format_web_results(await get_web_search_cache().aget_or_fetch(query, _afetch_web_results))
     except Exception as e:
         return f"Error in web search: {str(e)}"
 
+web_search = StructuredTool.from_function(func=_web_search, coroutine=_aweb_search, name="web_search")
+
 tool_node = ToolNode([vector_search, web_search])
 
 def create_agent_with_tools(llm, prompt):
@@ -94,29 +218,212 @@ GRAPH_GENERATOR_PROMPT = ChatPromptTemplate.from_messages([
     ("human", "{query}")
 ])
 
+SUMMARY_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are a Conversation Summarizer. Update the summary of an IT and Finance support conversation with the new turns. Keep what the user told you, their open questions and the answers given. Respond with ONLY the summary, in at most {words} words."),
+    ("human", "Current summary: {summary}\n\nNew turns:\n{turns}")
+])
+
+_conversation_memory = None
+_conversation_memory_lock = threading.Lock()
+
+def _summarize_history(summary: Optional[str], messages: List[Any]) -> str:
+    response = get_llm().invoke(SUMMARY_PROMPT.format_messages(
+        words=int(os.getenv("MEMORY_SUMMARY_WORDS", "120")),
+        summary=summary or "(none)",
+        turns=ConversationMemory.render(None, messages)
+    ))
+    return str(response.content).strip()
+
+def get_conversation_memory() -> ConversationMemory:
+    """Return the shared conversation memory policy (window, trimming and summarizer)."""
+    global _conversation_memory
+    if _conversation_memory is None:
+        with _conversation_memory_lock:
+            if _conversation_memory is None:
+                _conversation_memory = ConversationMemory(
+                    _summarize_history,
+                    recent_turns=int(os.getenv("MEMORY_RECENT_TURNS", "3")),
+                    message_tokens=int(os.getenv("MEMORY_MESSAGE_TOKENS", "150")),
+                    summary_tokens=int(os.getenv("MEMORY_SUMMARY_TOKENS", "200"))
+                )
+    return _conversation_memory
+
+def _has_history(state: AgentState) -> bool:
+    return bool(state.get("summary") or state.get("messages"))
+
+def _with_history(state: AgentState, text: str) -> str:
+    """Prefix a prompt with the earlier conversation; unchanged on the first turn."""
+    history = ConversationMemory.render(state.get("summary"), state.get("messages") or [])
+    return f"Conversation so far:\n{history}\n\nCurrent message: {text}" if history else text
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+def get_response_cache() -> SemanticResponseCache:
+    """Return the shared semantic answer cache, opened on first use."""
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = SemanticResponseCache(
+                    encode_texts,
+                    current_category_versions,
+                    cache_path=os.getenv("RESPONSE_CACHE_PATH", "response_cache.db"),
+                    similarity_threshold=float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.92")),
+                    ttl_seconds=float(os.getenv("RESPONSE_CACHE_TTL", str(24 * 3600))),
+                    max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "5000"))
+                )
+    return _response_cache
+
+# Cached answer fields, and the FAQ category whose rebuild invalidates them
+CACHED_FIELDS = ("response", "classification", "agent_used", "used_web_search")
+CLASSIFICATION_CATEGORIES = {"IT": "IT", "FINANCE": "Finance"}
+
+def cache_lookup_agent(state: AgentState) -> AgentState:
+    """Serve a semantically similar earlier answer, skipping the whole agent chain."""
+    if _has_history(state):
+        # A follow-up's answer depends on the conversation, not just its text
+        return {"cache_hit": False}
+    try:
+        cached = get_response_cache().lookup(state["query"])
+    except Exception as e:
+        print(f"DEBUG: Response cache lookup failed: {e}")
+        cached = None
+
+    if cached is None:
+        return {"cache_hit": False}
+
+    print(f"DEBUG: Response cache hit (similarity {cached['cache_similarity']:.3f})")
+    tracing.increment("response_cache_hits")
+    return {
+        **{field: cached.get(field) for field in CACHED_FIELDS},
+        "route_path": "CACHE",
+        "cache_hit": True
+    }
+
+async def acache_lookup_agent(state: AgentState) -> AgentState:
+    # Embedding and SQLite work is blocking, so keep it off the event loop
+    return await asyncio.to_thread(cache_lookup_agent, state)
+
+def cache_store_agent(state: AgentState) -> AgentState:
+    """Remember a freshly generated answer for similar future queries."""
+    if not state.get("cache_hit") and state.get("response") and not _has_history(state):
+        try:
+            category = CLASSIFICATION_CATEGORIES.get(state.get("classification") or "")
+            get_response_cache().store(state["query"], category, {field: state.get(field) for field in CACHED_FIELDS})
+        except Exception as e:
+            print(f"DEBUG: Response cache store failed: {e}")
+    return {}
+
+async def acache_store_agent(state: AgentState) -> AgentState:
+    return await asyncio.to_thread(cache_store_agent, state)
+
+def _extend_route(state: AgentState, step: str) -> str:
+    route_path = state.get("route_path")
+    return f"{route_path} → {step}" if route_path else step
+
+def _supervisor_update(state: AgentState, response) -> AgentState:
+    return {
+        "agent_used": "supervisor",
+        "route_path": _extend_route(state, "SUPERVISOR")
+    }
+
 def supervisor_agent(state: AgentState) -> AgentState:
     messages = SUPERVISOR_PROMPT.format_messages(query=state["query"])
-    response = llm.invoke(messages)
+    response = get_llm().invoke(messages)
+    return _supervisor_update(state, response)
+
+async def asupervisor_agent(state: AgentState) -> AgentState:
+    messages = SUPERVISOR_PROMPT.format_messages(query=state["query"])
+    response = await get_llm().ainvoke(messages)
+    return _supervisor_update(state, response)
+
+def _decider_update(state: AgentState, response) -> AgentState:
+    classification = str(response.content).strip().upper()
 
     return {
-        **state,
-        "messages": state["messages"] + [response],
-        "agent_used": "supervisor"
+        "classification": classification,
+        "agent_used": "decider",
+        "route_path": _extend_route(state, "DECIDER")
     }
 
 def decider_agent(state: AgentState) -> AgentState:
-    messages = DECIDER_PROMPT.format_messages(query=state["query"])
-    response = llm.invoke(messages)
-    classification = str(response.content).strip().upper()
+    messages = DECIDER_PROMPT.format_messages(query=_with_history(state, state["query"]))
+    response = get_llm().invoke(messages)
+    return _decider_update(state, response)
+
+async def adecider_agent(state: AgentState) -> AgentState:
+    messages = DECIDER_PROMPT.format_messages(query=_with_history(state, state["query"]))
+    response = await get_llm().ainvoke(messages)
+    return _decider_update(state, response)
+
+_query_router = None
+_query_router_lock = threading.Lock()
+
+def get_query_router() -> CentroidRouter:
+    """Return the shared centroid router, fitted on the example queries on first use."""
+    global _query_router
+    if _query_router is None:
+        with _query_router_lock:
+            if _query_router is None:
+                min_margin = float(os.getenv("ROUTER_MIN_MARGIN", "0.05"))
+                _query_router = CentroidRouter(encode_texts, min_margin).fit()
+    return _query_router
+
+def _classify_locally(query: str) -> tuple[Optional[str], float]:
+    try:
+        return get_query_router().classify(query)
+    except Exception as e:
+        print(f"DEBUG: Local router failed: {e}")
+        return None, 0.0
 
+def _router_update(state: AgentState, classification: str, margin: float) -> AgentState:
+    print(f"DEBUG: Local router classification: {classification} (margin {margin:.3f})")
     return {
-        **state,
         "classification": classification,
-        "agent_used": "decider"
+        "agent_used": "router",
+        "route_path": state["route_path"]
     }
 
-def _check_relevance(internal_result: str, query: str) -> bool:
-    """Check if internal search result is relevant to the query using LLM-based evaluation."""
+def router_agent(state: AgentState) -> AgentState:
+    """Classify locally by nearest centroid, asking the decider LLM only when unsure."""
+    state = {**state, "route_path": _extend_route(state, "ROUTER")}
+    classification, margin = _classify_locally(state["query"])
+
+    if classification is None:
+        print(f"DEBUG: Local router unsure (margin {margin:.3f}) - asking decider")
+        return decider_agent(state)
+    return _router_update(state, classification, margin)
+
+async def arouter_agent(state: AgentState) -> AgentState:
+    state = {**state, "route_path": _extend_route(state, "ROUTER")}
+    classification, margin = await asyncio.to_thread(_classify_locally, state["query"])
+
+    if classification is None:
+        print(f"DEBUG: Local router unsure (margin {margin:.3f}) - asking decider")
+        return await adecider_agent(state)
+    return _router_update(state, classification, margin)
+
+# Cosine similarity band for the local relevance gate; calibrate with calibrate_relevance.py
+RELEVANCE_GATE_LOW = float(os.getenv("RELEVANCE_GATE_LOW", "0.35"))
+RELEVANCE_GATE_HIGH = float(os.getenv("RELEVANCE_GATE_HIGH", "0.60"))
+
+def relevance_gate(top_similarity: Optional[float]) -> Optional[bool]:
+    """Decide relevance locally from the best search similarity.
+
+    Returns True/False when the score is clearly above/below the calibrated
+    band, or None when the LLM should decide.
+    """
+    if top_similarity is None:
+        return None
+    if top_similarity >= RELEVANCE_GATE_HIGH:
+        return True
+    if top_similarity < RELEVANCE_GATE_LOW:
+        return False
+    return None
+
+def _local_relevance(internal_result: str, top_similarity: Optional[float]) -> Optional[bool]:
+    """Basic content checks plus the relevance gate; None means ask the LLM."""
     no_info_indicators = [
         "no relevant information found",
         "no internal policy found",
@@ -139,13 +446,36 @@ def _check_relevance(internal_result: str, query: str) -> bool:
     if not (has_qa_content and not_error_message and has_substantial_content):
         return False
 
-    # Use LLM to evaluate semantic relevance
-    relevance_prompt = f"""You are a relevance evaluator. Determine if the internal policy excerpt is relevant to the user's query.
+    gate_decision = relevance_gate(top_similarity)
+    if gate_decision is not None:
+        print(f"DEBUG: Relevance gate decision: {gate_decision} (similarity {top_similarity:.3f})")
+    return gate_decision
+
+# Approximate token budgets for the retrieved context in each prompt; 0 only deduplicates
+CONTEXT_BUDGETS = {
+    "relevance": int(os.getenv("CONTEXT_BUDGET_RELEVANCE", "250")),
+    "internal": int(os.getenv("CONTEXT_BUDGET_INTERNAL", "600")),
+    "web": int(os.getenv("CONTEXT_BUDGET_WEB", "1200")),
+}
+
+def _fit_context(query: str, text: str, kind: str) -> str:
+    """Dedupe and trim retrieved text to its budget, counting the tokens saved against the node."""
+    passages = web_passages(text) if kind == "web" else internal_passages(text)
+    if not passages:
+        return text
+    context, tokens = assemble_context(query, passages, CONTEXT_BUDGETS[kind])
+    tracing.increment("context_tokens", tokens["tokens_after"])
+    tracing.increment("context_tokens_saved", tokens["tokens_before"] - tokens["tokens_after"])
+    print(f"DEBUG: {kind} context {tokens['tokens_before']} -> {tokens['tokens_after']} tokens")
+    return context
+
+def _relevance_prompt(internal_result: str, query: str) -> str:
+    return f"""You are a relevance evaluator. Determine if the internal policy excerpt is relevant to the user's query.
 
 User Query: "{query}"
 
 Internal Policy Excerpt:
-{internal_result[:1000]}  # Limit length for efficiency
+{_fit_context(query, internal_result, "relevance")}
 
 Evaluate if the internal policy excerpt contains information that directly answers or is highly relevant to the user's query. Consider:
 1. Does it address the specific topic/issue mentioned in the query?
@@ -165,63 +495,294 @@ Be NOT_RELEVANT if:
 
 Respond with ONLY "RELEVANT" or "NOT_RELEVANT"."""
 
+def _relevance_decision(response) -> bool:
+    response_text = str(response.content).upper().strip()
+    is_relevant = response_text == "RELEVANT"
+    print(f"DEBUG: LLM relevance check result: {response.content}")
+    print(f"DEBUG: LLM relevance decision: {is_relevant}")
+    return is_relevant
+
+def _relevance_fallback(error: Exception) -> bool:
+    print(f"DEBUG: LLM relevance check failed: {error}")
+    # Fallback to the basic checks, which already passed, if the LLM fails
+    print("DEBUG: Fallback relevance decision: True")
+    return True
+
+def _check_relevance(internal_result: str, query: str, top_similarity: Optional[float] = None) -> bool:
+    """Check if internal search result is relevant to the query.
+
+    Clear-cut similarity scores are decided by the local relevance gate; only
+    the ambiguous band falls through to LLM-based evaluation.
+    """
+    local_decision = _local_relevance(internal_result, top_similarity)
+    if local_decision is not None:
+        return local_decision
+
     try:
-        response = llm.invoke(relevance_prompt)
-        response_text = str(response.content).upper().strip()
-        is_relevant = response_text == "RELEVANT"
-        print(f"DEBUG: LLM relevance check result: {response.content}")
-        print(f"DEBUG: LLM relevance decision: {is_relevant}")
-        return is_relevant
+        return _relevance_decision(get_llm().invoke(_relevance_prompt(internal_result, query)))
     except Exception as e:
-        print(f"DEBUG: LLM relevance check failed: {e}")
-        # Fallback to basic check if LLM fails
-        fallback_result = has_qa_content and not_error_message and has_substantial_content
-        print(f"DEBUG: Fallback relevance decision: {fallback_result}")
-        return fallback_result
+        return _relevance_fallback(e)
+
+async def _acheck_relevance(internal_result: str, query: str, top_similarity: Optional[float] = None) -> bool:
+    local_decision = _local_relevance(internal_result, top_similarity)
+    if local_decision is not None:
+        return local_decision
+
+    try:
+        return _relevance_decision(await get_llm().ainvoke(_relevance_prompt(internal_result, query)))
+    except Exception as e:
+        return _relevance_fallback(e)
+
+# Search results computed ahead of time by prefetch_internal_searches, keyed
+# by (query, category) and consumed by the first agent that needs them
+_prefetched_searches: Dict[tuple, List[Dict[str, Any]]] = {}
+_prefetch_lock = threading.Lock()
+
+def prefetch_internal_searches(queries: List[str]):
+    """Search the IT and Finance indexes for many queries with one batched FAISS call.
+
+    Used by batch runs: the routing decision is not known yet, so every query
+    is searched in both categories, which is still far cheaper than encoding
+    and searching each query separately inside the graph.
+    """
+    if not queries:
+        return
+    categories = list(CLASSIFICATION_CATEGORIES.values())
+    pairs = [(query, category) for category in categories for query in queries]
+    try:
+        with tracing.timed("vector_search_seconds"):
+            results = vector_search_batch([q for q, _ in pairs], [c for _, c in pairs])
+    except RuntimeError as e:
+        # The agents search (and report the failure) one by one instead
+        print(f"DEBUG: Search prefetch failed: {e}")
+        return
+    with _prefetch_lock:
+        _prefetched_searches.update(zip(pairs, results))
+
+def clear_prefetched_searches():
+    """Drop prefetched results that no agent consumed (e.g. for chat queries)."""
+    with _prefetch_lock:
+        _prefetched_searches.clear()
+
+def _search_internal(query: str, category: str) -> tuple[str, Optional[float]]:
+    with _prefetch_lock:
+        results = _prefetched_searches.pop((query, category), None)
+    if results is None:
+        with tracing.timed("vector_search_seconds"):
+            results = vector_search_results(query, category)
+    internal_result = "\n\n".join(r["text"] for r in results) if results else "No relevant information found."
+    top_similarity = max((r["similarity"] for r in results), default=None)
+    print(f"DEBUG: Internal result for '{query}': {internal_result[:200]}...")
+    print(f"DEBUG: Full internal result length: {len(internal_result)} characters")
+    return internal_result, top_similarity
+
+def _internal_query(query: str, category: str, internal_result: str) -> str:
+    internal_result = _fit_context(query, internal_result, "internal")
+    return f"Query: {query}\n\nInternal {category.lower()} policy excerpt: {internal_result}\n\nPlease answer ONLY using the internal {category.lower()} policy excerpt above. First, summarize the answer in your own words for clarity. Then, quote the most relevant internal policy excerpt as the source. Do not speculate or generalize beyond the provided excerpt."
+
+def _web_query(query: str, web_result: str, web_search_format: str) -> str:
+    web_result = _fit_context(query, web_result, "web")
+    return f"Query: {query}\n\nWeb search result: {web_result}\n\n{web_search_format}"
+
+# Tags on the LLM calls that produce the user-facing answer, so streaming
+# consumers can tell them apart from routing and relevance calls
+ANSWER_TAG = "agent_answer"
+WEB_ANSWER_TAG = "web_answer"
+
+def _answer_config(used_web_search: bool = False) -> Dict[str, Any]:
+    return {"tags": [ANSWER_TAG, WEB_ANSWER_TAG] if used_web_search else [ANSWER_TAG]}
+
+def _agent_update(state: AgentState, category: str, response, used_web_search: bool) -> AgentState:
+    return {
+        "response": str(response.content),
+        "agent_used": category.lower(),
+        "used_web_search": used_web_search
+    }
+
+# Categories whose web search starts alongside the internal search and relevance
+# check, trading a possibly wasted Tavily call for one less round trip on fallback
+SPECULATIVE_WEB_SEARCH = {
+    category.strip().lower() for category in os.getenv("SPECULATIVE_WEB_SEARCH", "").split(",") if category.strip()
+}
+
+# Speculation, sync or async, only starts when one of these slots is free, so
+# a fallback never waits behind other requests' speculative searches
+SPECULATION_WORKERS = int(os.getenv("SPECULATIVE_WEB_SEARCH_WORKERS", "4"))
+_speculation_executor = ThreadPoolExecutor(max_workers=SPECULATION_WORKERS, thread_name_prefix="speculative-web-search")
+_speculation_slots = threading.BoundedSemaphore(SPECULATION_WORKERS)
+_speculation_stats: Dict[str, Dict[str, int]] = {}
+_speculation_lock = threading.Lock()
+
+def _speculates(category: str) -> bool:
+    return category.lower() in SPECULATIVE_WEB_SEARCH
+
+def _record_speculation(category: str, outcome: str):
+    with _speculation_lock:
+        stats = _speculation_stats.setdefault(category, {"used": 0, "discarded": 0, "skipped": 0})
+        stats[outcome] += 1
+        used, total = stats["used"], stats["used"] + stats["discarded"]
+    if total:
+        print(f"DEBUG: Speculative web search {outcome} for {category} (paid off {used}/{total}, {used / total:.0%})")
+
+def speculation_stats() -> Dict[str, Dict[str, int]]:
+    """Per-category counts of speculative web searches that were used, discarded,
+    or skipped because every speculation worker was busy."""
+    with _speculation_lock:
+        return {category: dict(stats) for category, stats in _speculation_stats.items()}
+
+class _Speculation:
+    """A web search started before knowing whether it is needed.
+
+    Wraps a concurrent future or an asyncio task; the outcome is recorded
+    once, however many times the result is used.
+    """
+
+    def __init__(self, category: str, future):
+        self.category = category
+        self.future = future
+        self.settled = False
+
+    def _settle(self, outcome: str):
+        if not self.settled:
+            self.settled = True
+            _record_speculation(self.category, outcome)
+
+    def result(self) -> str:
+        self._settle("used")
+        return self.future.result()
+
+    async def aresult(self) -> str:
+        self._settle("used")
+        return await self.future
+
+    def discard(self):
+        if not self.settled:
+            self.future.cancel()
+            self._settle("discarded")
+
+def _start_speculation(query: str, category: str) -> Optional[_Speculation]:
+    if not _speculates(category):
+        return None
+    if not _speculation_slots.acquire(blocking=False):
+        _record_speculation(category, "skipped")
+        return None
+    try:
+        # Copy the context so the search time is traced against this node
+        future = _speculation_executor.submit(contextvars.copy_context().run, web_search.invoke, query)
+    except Exception:
+        _speculation_slots.release()
+        raise
+    future.add_done_callback(lambda _: _speculation_slots.release())
+    return _Speculation(category, future)
+
+def _astart_speculation(query: str, category: str) -> Optional[_Speculation]:
+    if not _speculates(category):
+        return None
+    if not _speculation_slots.acquire(blocking=False):
+        _record_speculation(category, "skipped")
+        return None
+    try:
+        task = asyncio.create_task(web_search.ainvoke(query))
+    except Exception:
+        _speculation_slots.release()
+        raise
+    task.add_done_callback(lambda _: _speculation_slots.release())
+    return _Speculation(category, task)
+
+def _web_result(query: str, speculative: Optional[_Speculation]) -> str:
+    return web_search.invoke(query) if speculative is None else speculative.result()
+
+async def _aweb_result(query: str, speculative: Optional[_Speculation]) -> str:
+    return await web_search.ainvoke(query) if speculative is None else await speculative.aresult()
 
 def _handle_agent_query(state: AgentState, category: str, agent_prompt, web_search_format: str) -> AgentState:
     """Generic handler for IT and Finance agent queries."""
+    query = state["query"]
+    speculative = _start_speculation(query, category)
     try:
-        internal_result = vector_search_impl(state["query"], category)
-        print(f"DEBUG: Internal result for '{state['query']}': {internal_result[:200]}...")
-        print(f"DEBUG: Full internal result length: {len(internal_result)} characters")
+        return _answer_agent_query(state, category, agent_prompt, web_search_format, speculative)
+    finally:
+        if speculative is not None:
+            speculative.discard()
+
+def _answer_agent_query(state: AgentState, category: str, agent_prompt, web_search_format: str,
+                        speculative: Optional[_Speculation]) -> AgentState:
+    query = state["query"]
+    try:
+        internal_result, top_similarity = _search_internal(query, category)
+        has_internal_info = _check_relevance(internal_result, query, top_similarity)
+        print(f"DEBUG: Final has_internal_info decision = {has_internal_info}")
+
+        if has_internal_info:
+            print("DEBUG: Using internal information")
+            if speculative is not None:
+                speculative.discard()
+                speculative = None
+            enhanced_query = _internal_query(query, category, internal_result)
+            used_web_search = False
+        else:
+            print("DEBUG: Falling back to web search")
+            enhanced_query = _web_query(query, _web_result(query, speculative), web_search_format)
+            used_web_search = True
+        response = get_llm().invoke(agent_prompt.format_messages(query=_with_history(state, enhanced_query)), config=_answer_config(used_web_search))
+    except Exception as e:
+        print(f"DEBUG: Exception in {category.lower()}_agent: {e}")
+        try:
+            enhanced_query = _web_query(query, _web_result(query, speculative), web_search_format)
+            response = get_llm().invoke(agent_prompt.format_messages(query=_with_history(state, enhanced_query)), config=_answer_config(True))
+            used_web_search = True
+        except Exception as web_error:
+            print(f"DEBUG: Web search also failed: {web_error}")
+            response = get_llm().invoke(agent_prompt.format_messages(query=_with_history(state, query)), config=_answer_config())
+            used_web_search = False
+
+    return _agent_update(state, category, response, used_web_search)
 
-        has_internal_info = _check_relevance(internal_result, state["query"])
+async def _ahandle_agent_query(state: AgentState, category: str, agent_prompt, web_search_format: str) -> AgentState:
+    """Async handler for IT and Finance agent queries; FAISS search runs in a worker thread."""
+    query = state["query"]
+    speculative = _astart_speculation(query, category)
+    try:
+        return await _aanswer_agent_query(state, category, agent_prompt, web_search_format, speculative)
+    finally:
+        # Never leave the task running if the node fails or is cancelled
+        if speculative is not None:
+            speculative.discard()
+
+async def _aanswer_agent_query(state: AgentState, category: str, agent_prompt, web_search_format: str,
+                               speculative: Optional[_Speculation]) -> AgentState:
+    query = state["query"]
+    try:
+        internal_result, top_similarity = await asyncio.to_thread(_search_internal, query, category)
+        has_internal_info = await _acheck_relevance(internal_result, query, top_similarity)
         print(f"DEBUG: Final has_internal_info decision = {has_internal_info}")
 
         if has_internal_info:
             print("DEBUG: Using internal information")
-            enhanced_query = f"Query: {state['query']}\n\nInternal {category.lower()} policy excerpt: {internal_result}\n\nPlease answer ONLY using the internal {category.lower()} policy excerpt above. First, summarize the answer in your own words for clarity. Then, quote the most relevant internal policy excerpt as the source. Do not speculate or generalize beyond the provided excerpt."
-            response = llm.invoke(agent_prompt.format_messages(query=enhanced_query))
+            if speculative is not None:
+                speculative.discard()
+                speculative = None
+            enhanced_query = _internal_query(query, category, internal_result)
             used_web_search = False
         else:
             print("DEBUG: Falling back to web search")
-            web_result = web_search(state["query"])
-            enhanced_query = f"Query: {state['query']}\n\nWeb search result: {web_result}\n\n{web_search_format}"
-            response = llm.invoke(agent_prompt.format_messages(query=enhanced_query))
+            enhanced_query = _web_query(query, await _aweb_result(query, speculative), web_search_format)
             used_web_search = True
+        response = await get_llm().ainvoke(agent_prompt.format_messages(query=_with_history(state, enhanced_query)), config=_answer_config(used_web_search))
     except Exception as e:
         print(f"DEBUG: Exception in {category.lower()}_agent: {e}")
         try:
-            web_result = web_search(state["query"])
-            enhanced_query = f"Query: {state['query']}\n\nWeb search result: {web_result}\n\n{web_search_format}"
-            response = llm.invoke(agent_prompt.format_messages(query=enhanced_query))
+            enhanced_query = _web_query(query, await _aweb_result(query, speculative), web_search_format)
+            response = await get_llm().ainvoke(agent_prompt.format_messages(query=_with_history(state, enhanced_query)), config=_answer_config(True))
             used_web_search = True
         except Exception as web_error:
             print(f"DEBUG: Web search also failed: {web_error}")
-            response = llm.invoke(agent_prompt.format_messages(query=state["query"]))
+            response = await get_llm().ainvoke(agent_prompt.format_messages(query=_with_history(state, query)), config=_answer_config())
             used_web_search = False
 
-    return {
-        **state,
-        "response": str(response.content),
-        "agent_used": category.lower(),
-        "used_web_search": used_web_search
-    }
+    return _agent_update(state, category, response, used_web_search)
 
-def it_agent(state: AgentState) -> AgentState:
-    """IT agent with internal search and web search fallback."""
-    web_search_format = """Please provide a comprehensive answer based ONLY on the web search results provided above. Format your response clearly with:
+IT_WEB_SEARCH_FORMAT = """Please provide a comprehensive answer based ONLY on the web search results provided above. Format your response clearly with:
 1. Key threats in bold using Markdown (**like this**)
 2. Clean, readable formatting
 3. References at the end as a numbered list (1. URL, 2. URL, etc.)
@@ -231,11 +792,7 @@ Do not use asterisks for emphasis or decoration. Only use Markdown bold (**text*
 
 IMPORTANT: Do not mention any knowledge cutoff dates. Only use information from the provided web search results."""
 
-    return _handle_agent_query(state, "IT", IT_AGENT_PROMPT, web_search_format)
-
-def finance_agent(state: AgentState) -> AgentState:
-    """Finance agent with internal search and web search fallback."""
-    web_search_format = """Please provide a comprehensive answer based ONLY on the web search results provided above. Format your response clearly with:
+FINANCE_WEB_SEARCH_FORMAT = """Please provide a comprehensive answer based ONLY on the web search results provided above. Format your response clearly with:
 1. Key financial figures in bold using Markdown (**like this**)
 2. Clean, readable formatting
 3. References at the end as a numbered list (1. URL, 2. URL, etc.)
@@ -244,27 +801,58 @@ Do not use asterisks for emphasis or decoration. Only use Markdown bold (**text*
 
 IMPORTANT: Do not mention any knowledge cutoff dates. Only use information from the provided web search results."""
 
-    return _handle_agent_query(state, "Finance", FINANCE_AGENT_PROMPT, web_search_format)
+def it_agent(state: AgentState) -> AgentState:
+    """IT agent with internal search and web search fallback."""
+    return _handle_agent_query(state, "IT", IT_AGENT_PROMPT, IT_WEB_SEARCH_FORMAT)
+
+async def ait_agent(state: AgentState) -> AgentState:
+    return await _ahandle_agent_query(state, "IT", IT_AGENT_PROMPT, IT_WEB_SEARCH_FORMAT)
+
+def finance_agent(state: AgentState) -> AgentState:
+    """Finance agent with internal search and web search fallback."""
+    return _handle_agent_query(state, "Finance", FINANCE_AGENT_PROMPT, FINANCE_WEB_SEARCH_FORMAT)
+
+async def afinance_agent(state: AgentState) -> AgentState:
+    return await _ahandle_agent_query(state, "Finance", FINANCE_AGENT_PROMPT, FINANCE_WEB_SEARCH_FORMAT)
 
 def call_tool_agent(state: AgentState) -> AgentState:
-    agent_with_tools = create_agent_with_tools(llm, CALL_TOOL_PROMPT)
+    agent_with_tools = create_agent_with_tools(get_llm(), CALL_TOOL_PROMPT)
     response = agent_with_tools.invoke({"query": state["query"]})
 
     return {
-        **state,
+        "tool_results": {"content": str(response.content)},
+        "agent_used": "call_tool"
+    }
+
+async def acall_tool_agent(state: AgentState) -> AgentState:
+    agent_with_tools = create_agent_with_tools(get_llm(), CALL_TOOL_PROMPT)
+    response = await agent_with_tools.ainvoke({"query": state["query"]})
+
+    return {
         "tool_results": {"content": str(response.content)},
         "agent_used": "call_tool"
     }
 
 def chat_agent(state: AgentState) -> AgentState:
     try:
-        agent_with_tools = create_agent_with_tools(llm, CHAT_AGENT_PROMPT)
-        response = agent_with_tools.invoke({"query": state["query"]})
+        agent_with_tools = create_agent_with_tools(get_llm(), CHAT_AGENT_PROMPT)
+        response = agent_with_tools.invoke({"query": _with_history(state, state["query"])}, config=_answer_config())
     except:
-        response = llm.invoke(CHAT_AGENT_PROMPT.format_messages(query=state["query"]))
+        response = get_llm().invoke(CHAT_AGENT_PROMPT.format_messages(query=_with_history(state, state["query"])), config=_answer_config())
+
+    return {
+        "response": str(response.content),
+        "agent_used": "chat"
+    }
+
+async def achat_agent(state: AgentState) -> AgentState:
+    try:
+        agent_with_tools = create_agent_with_tools(get_llm(), CHAT_AGENT_PROMPT)
+        response = await agent_with_tools.ainvoke({"query": _with_history(state, state["query"])}, config=_answer_config())
+    except:
+        response = await get_llm().ainvoke(CHAT_AGENT_PROMPT.format_messages(query=_with_history(state, state["query"])), config=_answer_config())
 
     return {
-        **state,
         "response": str(response.content),
         "agent_used": "chat"
     }
@@ -289,37 +877,45 @@ def route_to_tools(state: AgentState) -> str:
 def route_to_graph(state: AgentState) -> str:
     return "graph_generator_agent"
 
-def create_final_answer(state: AgentState) -> AgentState:
-    response = state.get("response", "")
-    tool_results = state.get("tool_results", "")
-    graph_data = state.get("graph_data", "")
-
+def describe_route(state: AgentState) -> tuple[str, str]:
+    """Return the AGENT FLOW and DATA SOURCE labels for a (possibly partial) state."""
     agent_flow = []
     data_source = "INTERNAL SOURCE"
+    # Routing steps actually taken; the default matches the two-hop graph
+    route = state.get("route_path") or "SUPERVISOR → DECIDER"
 
-    if state.get("agent_used") == "supervisor":
-        agent_flow.append("SUPERVISOR")
-    elif state.get("agent_used") == "decider":
-        agent_flow.append("SUPERVISOR → DECIDER")
+    if state.get("agent_used") in ("supervisor", "decider", "router"):
+        agent_flow.append(route)
     elif state.get("agent_used") == "it":
-        agent_flow.append("SUPERVISOR → DECIDER → IT")
+        agent_flow.append(f"{route} → IT")
         if state.get("used_web_search"):
             data_source = "WEB SEARCH"
     elif state.get("agent_used") == "finance":
-        agent_flow.append("SUPERVISOR → DECIDER → FINANCE")
+        agent_flow.append(f"{route} → FINANCE")
         if state.get("used_web_search"):
             data_source = "WEB SEARCH"
     elif state.get("agent_used") == "chat":
-        agent_flow.append("SUPERVISOR → DECIDER → CHAT")
+        agent_flow.append(f"{route} → CHAT")
         data_source = "CHAT"
     elif state.get("agent_used") == "call_tool":
-        agent_flow.append("SUPERVISOR → DECIDER → CALL_TOOL")
+        agent_flow.append(f"{route} → CALL_TOOL")
         data_source = "WEB SEARCH"
     elif state.get("agent_used") == "graph_generator":
-        agent_flow.append("SUPERVISOR → DECIDER → FINANCE → GRAPH_GENERATOR")
+        agent_flow.append(f"{route} → FINANCE → GRAPH_GENERATOR")
         data_source = "WEB SEARCH + GRAPH GENERATION"
 
+    if state.get("cache_hit"):
+        data_source = f"SEMANTIC CACHE ({data_source})"
+
     agent_flow_str = " → ".join(agent_flow) if agent_flow else "UNKNOWN"
+    return agent_flow_str, data_source
+
+def create_final_answer(state: AgentState) -> AgentState:
+    response = state.get("response", "")
+    tool_results = state.get("tool_results", "")
+    graph_data = state.get("graph_data", "")
+
+    agent_flow_str, data_source = describe_route(state)
 
     final_answer = f"AGENT FLOW: {agent_flow_str}\nDATA SOURCE: {data_source}\n\n"
     final_answer += str(response) if response else ""
@@ -328,32 +924,212 @@ def create_final_answer(state: AgentState) -> AgentState:
     if graph_data:
         final_answer += f"\n\n{str(graph_data)}"
 
-    return {
-        **state,
-        "final_answer": final_answer
-    }
+    return {"final_answer": final_answer}
+
+def update_memory(state: AgentState) -> AgentState:
+    """Add the finished turn to the conversation, summarizing turns that fall out of the window."""
+    answer = state.get("response") or (state.get("tool_results") or {}).get("content") or ""
+    summary, messages = get_conversation_memory().remember(
+        state.get("summary"), state.get("messages") or [], state["query"], str(answer)
+    )
+    return {"summary": summary, "messages": messages}
+
+async def aupdate_memory(state: AgentState) -> AgentState:
+    return await asyncio.to_thread(update_memory, state)
+
+ROUTING_MODES = ("two_hop", "single", "local")
+
+# Graph nodes as (sync, async) implementations, so the compiled workflow
+# supports both invoke/stream and ainvoke/astream
+NODES = {
+    "supervisor_agent": (supervisor_agent, asupervisor_agent),
+    "decider_agent": (decider_agent, adecider_agent),
+    "router_agent": (router_agent, arouter_agent),
+    "it_agent": (it_agent, ait_agent),
+    "finance_agent": (finance_agent, afinance_agent),
+    "chat_agent": (chat_agent, achat_agent),
+    "call_tool_agent": (call_tool_agent, acall_tool_agent),
+    "cache_lookup": (cache_lookup_agent, acache_lookup_agent),
+    "cache_store": (cache_store_agent, acache_store_agent),
+    "update_memory": (update_memory, aupdate_memory),
+}
+
+def _add_node(workflow: StateGraph, name: str):
+    func, afunc = NODES[name]
+    workflow.add_node(name, RunnableLambda(tracing.traced(name, func), afunc=tracing.atraced(name, afunc), name=name))
+
+def build_workflow(routing_mode: str = "two_hop", response_cache: bool = False, checkpointer=None):
+    """Compile the agent graph.
+
+    routing_mode picks how a query is classified before the specialist agent:
+    "two_hop" runs the supervisor then the decider (two LLM calls), "single"
+    runs only the decider, and "local" uses the nearest-centroid router and
+    falls back to the decider when it is unsure.
+
+    With response_cache, a semantic cache lookup runs first and hits go
+    straight to the final answer; fresh answers are stored after it.
+
+    With a checkpointer, each run ends by adding the turn to the
+    conversation memory, which is saved per config["configurable"]["thread_id"]
+    so the next turn (started with turn_input) sees the earlier ones.
+
+    Every node has an async implementation, so the graph can be driven with
+    ainvoke/astream to serve many conversations from one event loop. Every
+    node is traced into state["metrics"] (see tracing.py).
+    """
+    if routing_mode not in ROUTING_MODES:
+        raise ValueError(f"Unknown routing mode '{routing_mode}'. Choose from: {', '.join(ROUTING_MODES)}")
 
-def build_workflow():
     workflow = StateGraph(AgentState)
 
-    workflow.add_node("supervisor_agent", supervisor_agent)
-    workflow.add_node("decider_agent", decider_agent)
-    workflow.add_node("it_agent", it_agent)
-    workflow.add_node("finance_agent", finance_agent)
-    workflow.add_node("chat_agent", chat_agent)
-    workflow.add_node("call_tool_agent", call_tool_agent)
-    workflow.add_node("final_answer", create_final_answer)
-
-    workflow.add_edge("supervisor_agent", "decider_agent")
-    workflow.add_conditional_edges("decider_agent", route_based_on_classification)
+    if routing_mode == "two_hop":
+        _add_node(workflow, "supervisor_agent")
+    if routing_mode == "local":
+        _add_node(workflow, "router_agent")
+    else:
+        _add_node(workflow, "decider_agent")
+    _add_node(workflow, "it_agent")
+    _add_node(workflow, "finance_agent")
+    _add_node(workflow, "chat_agent")
+    _add_node(workflow, "call_tool_agent")
+    workflow.add_node("final_answer", tracing.traced("final_answer", create_final_answer))
+    end = END
+    if checkpointer is not None:
+        _add_node(workflow, "update_memory")
+        workflow.add_edge("update_memory", END)
+        end = "update_memory"
+
+    if routing_mode == "two_hop":
+        workflow.add_edge("supervisor_agent", "decider_agent")
+    routing_node = "router_agent" if routing_mode == "local" else "decider_agent"
+    workflow.add_conditional_edges(routing_node, route_based_on_classification)
     workflow.add_edge("it_agent", "final_answer")
     workflow.add_edge("finance_agent", "final_answer")
     workflow.add_edge("chat_agent", "final_answer")
-    workflow.add_edge("call_tool_agent", END)
-    workflow.add_edge("final_answer", END)
+    workflow.add_edge("call_tool_agent", end)
+
+    routing_entry = "supervisor_agent" if routing_mode == "two_hop" else routing_node
+    if response_cache:
+        _add_node(workflow, "cache_lookup")
+        _add_node(workflow, "cache_store")
+        workflow.add_conditional_edges(
+            "cache_lookup",
+            lambda state: "final_answer" if state.get("cache_hit") else routing_entry,
+            ["final_answer", routing_entry]
+        )
+        workflow.add_edge("final_answer", "cache_store")
+        workflow.add_edge("cache_store", end)
+        workflow.set_entry_point("cache_lookup")
+    else:
+        workflow.add_edge("final_answer", end)
+        workflow.set_entry_point(routing_entry)
 
-    workflow.set_entry_point("supervisor_agent")
+    return workflow.compile(checkpointer=checkpointer)
 
-    return workflow.compile()
+workflow = build_workflow(
+    os.getenv("ROUTING_MODE", "two_hop"),
+    response_cache=os.getenv("RESPONSE_CACHE", "false").lower() == "true"
+)
 
-workflow = build_workflow()
\ No newline at end of file
+_conversation_workflow = None
+_conversation_workflow_lock = threading.Lock()
+
+def get_conversation_workflow():
+    """Return the workflow with SQLite conversation memory, opened on first use.
+
+    Drive it with invoke/stream (the SQLite checkpointer is sync-only),
+    passing conversation_config(session_id) and turn_input(query).
+    """
+    global _conversation_workflow
+    if _conversation_workflow is None:
+        with _conversation_workflow_lock:
+            if _conversation_workflow is None:
+                _conversation_workflow = build_workflow(
+                    os.getenv("ROUTING_MODE", "two_hop"),
+                    response_cache=os.getenv("RESPONSE_CACHE", "false").lower() == "true",
+                    checkpointer=open_checkpointer(os.getenv("CONVERSATION_DB_PATH", "conversations.db"))
+                )
+    return _conversation_workflow
+
+def new_session_id() -> str:
+    return uuid.uuid4().hex
+
+def conversation_config(session_id: str) -> Dict[str, Any]:
+    """Run config selecting the conversation a turn belongs to."""
+    return {"configurable": {"thread_id": session_id}}
+
+# Specialist agent chosen for each decider classification
+CLASSIFICATION_AGENTS = {"IT": "it", "FINANCE": "finance", "CHAT": "chat"}
+
+class _StreamEventTranslator:
+    """Turn LangGraph "updates"/"messages" stream chunks into UI events.
+
+    Events are dicts with a "type" of:
+    - "header": AGENT FLOW (and, once answering starts, DATA SOURCE) text
+    - "token": a piece of the answer text
+    - "final": the completed state, including final_answer
+    """
+
+    def __init__(self, initial_state: AgentState):
+        self.state = dict(initial_state)
+        self.answering = False
+
+    def translate(self, mode: str, chunk) -> List[Dict[str, Any]]:
+        if mode == "updates":
+            events = []
+            for update in chunk.values():
+                self.state.update(update or {})
+                classification = (update or {}).get("classification")
+                if classification and not self.answering and not self.state.get("cache_hit"):
+                    agent = CLASSIFICATION_AGENTS.get(classification, "call_tool")
+                    agent_flow, _ = describe_route({**self.state, "agent_used": agent})
+                    events.append({"type": "header", "text": f"AGENT FLOW: {agent_flow}"})
+            return events
+
+        message, metadata = chunk
+        tags = metadata.get("tags", [])
+        if ANSWER_TAG not in tags or not message.content:
+            return []
+        events = []
+        if not self.answering:
+            self.answering = True
+            agent = CLASSIFICATION_AGENTS.get(self.state.get("classification") or "", "call_tool")
+            agent_flow, data_source = describe_route({
+                **self.state, "agent_used": agent, "used_web_search": WEB_ANSWER_TAG in tags
+            })
+            events.append({"type": "header", "text": f"AGENT FLOW: {agent_flow}\nDATA SOURCE: {data_source}"})
+        events.append({"type": "token", "text": str(message.content)})
+        return events
+
+    def final(self) -> Dict[str, Any]:
+        return {"type": "final", "state": self.state}
+
+def _stream_kwargs(graph) -> Dict[str, Any]:
+    # With memory, checkpoint once per turn rather than after every node.
+    # Only langgraph>=0.6 accepts durability; older versions keep their default.
+    if graph.checkpointer and "durability" in inspect.signature(graph.stream).parameters:
+        return {"durability": "exit"}
+    return {}
+
+def stream_workflow(initial_state: AgentState, graph=None, config: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+    """Run the workflow, yielding header, answer-token and final events as they happen.
+
+    Pass conversation_config(...) as config when graph has conversation memory.
+    """
+    graph = graph or workflow
+    translator = _StreamEventTranslator(initial_state)
+    for mode, chunk in graph.stream(initial_state, config, stream_mode=["updates", "messages"],
+                                    **_stream_kwargs(graph)):
+        yield from translator.translate(mode, chunk)
+    yield translator.final()
+
+async def astream_workflow(initial_state: AgentState, graph=None,
+                           config: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+    """Async counterpart of stream_workflow, driven by astream."""
+    graph = graph or workflow
+    translator = _StreamEventTranslator(initial_state)
+    async for mode, chunk in graph.astream(initial_state, config, stream_mode=["updates", "messages"],
+                                           **_stream_kwargs(graph)):
+        for event in translator.translate(mode, chunk):
+            yield event
+    yield translator.final()
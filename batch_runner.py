@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Batch Query Runner
+
+This script runs a JSONL file of queries through the agent workflow by:
+1. Reading one {"id": ..., "query": ...} object per line ("id" defaults to
+   the line number)
+2. Prefetching the vector searches of each chunk of queries with one
+   batched FAISS call
+3. Running the chunk with workflow.batch (or abatch with --async) at a
+   bounded concurrency
+4. Appending one result per query to the output JSONL as soon as its chunk
+   finishes, and reporting throughput
+
+The output file doubles as the checkpoint: rerunning with the same output
+skips queries that already have a successful result, so a crashed run
+resumes where it stopped. Failed queries are written with an "error" field
+and retried on the next run; the last record for an id wins.
+
+Usage: python batch_runner.py queries.jsonl [--output results.jsonl]
+       [--concurrency 8] [--chunk-size 64] [--async] [--routing-mode two_hop]
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import contextlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+sys.path.append(str(Path(__file__).parent))
+
+import agents
+from agents import build_workflow, ROUTING_MODES, prefetch_internal_searches, clear_prefetched_searches
+
+RESULT_FIELDS = ("classification", "agent_used", "used_web_search", "route_path", "cache_hit", "final_answer")
+
+def read_queries(path: str) -> List[Dict[str, Any]]:
+    """Load queries from JSONL, giving each an id."""
+    queries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if not record.get("query"):
+                raise ValueError(f"{path}:{line_number}: missing 'query'")
+            queries.append({"id": str(record.get("id", line_number)), "query": record["query"]})
+    return queries
+
+def completed_ids(output_path: str) -> set:
+    """Ids with a successful result in an earlier run's output.
+
+    A run killed mid-write can leave a partial last line; it is cut off so
+    new results are appended after the last complete record.
+    """
+    path = Path(output_path)
+    if not path.exists():
+        return set()
+
+    data = path.read_bytes()
+    if data and not data.endswith(b"\n"):
+        with open(path, "r+b") as f:
+            f.truncate(data.rfind(b"\n") + 1)
+        data = data[:data.rfind(b"\n") + 1]
+
+    done = set()
+    for line in data.decode("utf-8").splitlines():
+        record = json.loads(line)
+        if record.get("error"):
+            done.discard(record["id"])
+        else:
+            done.add(record["id"])
+    return done
+
+def to_record(item: Dict[str, Any], result) -> Dict[str, Any]:
+    """One output line for a query: the routing, the answer, the node time and context tokens saved."""
+    record = {"id": item["id"], "query": item["query"]}
+    if isinstance(result, BaseException):
+        record["error"] = f"{type(result).__name__}: {result}"
+        return record
+    record.update({field: result.get(field) for field in RESULT_FIELDS})
+    nodes = (result.get("metrics") or {}).get("nodes", [])
+    record["seconds"] = round(sum(node["seconds"] for node in nodes), 3)
+    record["context_tokens_saved"] = sum(node.get("context_tokens_saved", 0) for node in nodes)
+    return record
+
+def chunks(items: List[Any], size: int) -> Iterable[List[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+class BatchRunner:
+    """Runs queries through a workflow in chunks, streaming results to JSONL."""
+
+    def __init__(self, workflow=None, concurrency: int = 8, chunk_size: int = 64, verbose: bool = False):
+        self.workflow = workflow if workflow is not None else agents.workflow
+        self.concurrency = concurrency
+        self.chunk_size = chunk_size
+        self.verbose = verbose
+
+    def _inputs(self, chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        prefetch_internal_searches([item["query"] for item in chunk])
+        return [{"query": item["query"], "messages": []} for item in chunk]
+
+    @contextlib.contextmanager
+    def _quiet(self):
+        # Agent debug logging would bury the progress report
+        if self.verbose:
+            yield
+            return
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            yield
+
+    def _pending(self, queries: List[Dict[str, Any]], output_path: str) -> List[Dict[str, Any]]:
+        done = completed_ids(output_path)
+        pending = [item for item in queries if item["id"] not in done]
+        if done:
+            print(f"Resuming: {len(queries) - len(pending)} of {len(queries)} queries already done")
+        return pending
+
+    def _write(self, out, chunk: List[Dict[str, Any]], results: List[Any]) -> int:
+        failures = 0
+        for item, result in zip(chunk, results):
+            record = to_record(item, result)
+            failures += "error" in record
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+        os.fsync(out.fileno())
+        clear_prefetched_searches()
+        return failures
+
+    def _report(self, done: int, total: int, failures: int, start: float):
+        elapsed = time.perf_counter() - start
+        rate = done / elapsed if elapsed else 0.0
+        eta = (total - done) / rate if rate else 0.0
+        print(f"{done}/{total} queries, {rate:.2f} q/s, {failures} failed, "
+              f"elapsed {elapsed:.0f}s, ETA {eta:.0f}s", flush=True)
+
+    def run(self, queries: List[Dict[str, Any]], output_path: str) -> Dict[str, Any]:
+        """Run the queries not yet in output_path and append their results."""
+        pending = self._pending(queries, output_path)
+        config = {"max_concurrency": self.concurrency}
+        done = failures = 0
+        start = time.perf_counter()
+        with open(output_path, "a", encoding="utf-8") as out:
+            for chunk in chunks(pending, self.chunk_size):
+                with self._quiet():
+                    results = self.workflow.batch(self._inputs(chunk), config=config, return_exceptions=True)
+                failures += self._write(out, chunk, results)
+                done += len(chunk)
+                self._report(done, len(pending), failures, start)
+        return self._summary(done, failures, start)
+
+    async def arun(self, queries: List[Dict[str, Any]], output_path: str) -> Dict[str, Any]:
+        """Async counterpart of run, using workflow.abatch."""
+        pending = self._pending(queries, output_path)
+        config = {"max_concurrency": self.concurrency}
+        done = failures = 0
+        start = time.perf_counter()
+        with open(output_path, "a", encoding="utf-8") as out:
+            for chunk in chunks(pending, self.chunk_size):
+                with self._quiet():
+                    inputs = await asyncio.to_thread(self._inputs, chunk)
+                    results = await self.workflow.abatch(inputs, config=config, return_exceptions=True)
+                failures += self._write(out, chunk, results)
+                done += len(chunk)
+                self._report(done, len(pending), failures, start)
+        return self._summary(done, failures, start)
+
+    @staticmethod
+    def _summary(done: int, failures: int, start: float) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - start
+        return {
+            "queries": done,
+            "failures": failures,
+            "seconds": elapsed,
+            "throughput_qps": done / elapsed if elapsed else 0.0,
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a JSONL file of queries through the agent workflow")
+    parser.add_argument("input", help="JSONL file with one {\"id\", \"query\"} object per line")
+    parser.add_argument("--output", default="batch_results.jsonl", help="JSONL results; also the resume checkpoint")
+    parser.add_argument("--concurrency", type=int, default=8, help="Queries in flight at once")
+    parser.add_argument("--chunk-size", type=int, default=64, help="Queries per batch, checkpoint and prefetch")
+    parser.add_argument("--routing-mode", default=os.getenv("ROUTING_MODE", "two_hop"), choices=ROUTING_MODES)
+    parser.add_argument("--response-cache", action="store_true", help="Use the semantic response cache")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Use workflow.abatch")
+    parser.add_argument("--verbose", action="store_true", help="Keep the agents' debug output")
+    args = parser.parse_args()
+
+    queries = read_queries(args.input)
+    if agents.get_retrieval_client() is None and not agents.vector_store.load_from_disk():
+        print("❌ Error: vector database not available. Run 'python initialize_db.py' first.")
+        return False
+
+    runner = BatchRunner(
+        build_workflow(args.routing_mode, response_cache=args.response_cache),
+        concurrency=args.concurrency,
+        chunk_size=args.chunk_size,
+        verbose=args.verbose,
+    )
+    if args.use_async:
+        summary = asyncio.run(runner.arun(queries, args.output))
+    else:
+        summary = runner.run(queries, args.output)
+
+    print(f"✅ {summary['queries']} queries in {summary['seconds']:.1f}s "
+          f"({summary['throughput_qps']:.2f} q/s), {summary['failures']} failed. Results in {args.output}")
+    return summary["failures"] == 0
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Embedding Backend Benchmark Script
+
+This script compares CPU throughput of the embedding backends supported by
+VectorStore on the sample FAQ data by:
+1. Loading each backend of all-MiniLM-L6-v2 (torch, onnx, onnx_int8)
+2. Encoding every FAQ chunk in batches (ingestion workload)
+3. Encoding the example queries one at a time (search workload)
+
+Usage: python benchmark_embedding.py [--repeat 5] [--backends torch onnx_int8]
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from vector_store import VectorStore, EMBEDDING_BACKENDS
+from example_queries import load_example_queries
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding backend throughput benchmark")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--backends", nargs="+", default=list(EMBEDDING_BACKENDS), choices=EMBEDDING_BACKENDS)
+    args = parser.parse_args()
+
+    chunks = None
+    queries = [q["query"] for q in load_example_queries()]
+
+    print("📊 Benchmarking embedding backends...")
+    print("=" * 60)
+    results = []
+    for backend in args.backends:
+        store = VectorStore(embedding_cache_path=None, embedding_backend=backend)
+        if chunks is None:
+            chunks, _ = store.read_documents()
+        store.model.encode(queries[:1])
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            store.model.encode(chunks)
+        batch_rate = len(chunks) * args.repeat / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for query in queries:
+            store.model.encode([query])
+        query_latency = (time.perf_counter() - start) / len(queries) * 1000
+
+        results.append((backend, batch_rate, query_latency))
+
+    print(f"{'Backend':12} {'Chunks/s':>12} {'Query (ms)':>12} {'Speedup':>10}")
+    baseline = results[0][1]
+    for backend, batch_rate, query_latency in results:
+        print(f"{backend:12} {batch_rate:>12.1f} {query_latency:>12.2f} {batch_rate / baseline:>9.2f}x")
+    print("=" * 60)
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
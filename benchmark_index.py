@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Vector Index Benchmark Script
+
+This script compares the approximate index types supported by VectorStore
+against the exact flat baseline by:
+1. Loading the chunk embeddings from the persistent vector database
+2. Optionally scaling the corpus up with jittered copies of those vectors
+3. Building every index type over the same vectors
+4. Reporting recall@k against flat search and mean query latency
+
+Usage: python benchmark_index.py [--scale 100000] [--top-k 3]
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent))
+
+from vector_store import VectorStore, INDEX_TYPES
+from example_queries import load_example_queries
+
+def scale_corpus(embeddings: np.ndarray, target_size: int, seed: int = 0) -> np.ndarray:
+    """Grow the corpus to target_size vectors by adding jittered copies."""
+    if target_size <= len(embeddings):
+        return embeddings
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(embeddings), target_size - len(embeddings))
+    noise = rng.normal(0, 0.05, (len(picks), embeddings.shape[1])).astype('float32')
+    return np.vstack([embeddings, embeddings[picks] + noise])
+
+def time_search(index, queries: np.ndarray, top_k: int):
+    """Search one query at a time, returning the ids and mean latency in ms."""
+    ids = []
+    start = time.perf_counter()
+    for query in queries:
+        _, I = index.search(query.reshape(1, -1), top_k)
+        ids.append(I[0])
+    elapsed = time.perf_counter() - start
+    return np.array(ids), elapsed / len(queries) * 1000
+
+def recall_at_k(results: np.ndarray, baseline: np.ndarray) -> float:
+    hits = sum(len(set(r) & set(b)) for r, b in zip(results, baseline))
+    return hits / baseline.size
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall vs latency report for vector index types")
+    parser.add_argument("--scale", type=int, default=0, help="Grow the corpus to this many vectors")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--ef-search", type=int, default=64)
+    args = parser.parse_args()
+
+    store = VectorStore(nprobe=args.nprobe, ef_search=args.ef_search)
+    if not store.load_from_disk():
+        print("❌ Error: vector database not found. Run 'python initialize_db.py' first.")
+        return False
+
+    embeddings = store.encode([chunk for chunk in store.chunks if chunk is not None])
+    embeddings = scale_corpus(embeddings, args.scale)
+    queries = store.encode([q["query"] for q in load_example_queries()])
+
+    print(f"📊 Benchmarking {len(embeddings)} vectors with {len(queries)} queries (top_k={args.top_k})")
+    print("=" * 60)
+
+    baseline = None
+    print(f"{'Index':10} {'Build (s)':>10} {'Recall@k':>10} {'Latency (ms)':>14}")
+    for index_type in INDEX_TYPES:
+        store.index_type = index_type
+
+        start = time.perf_counter()
+        index = store._build_index(embeddings)
+        build_time = time.perf_counter() - start
+
+        ids, latency = time_search(index, queries, args.top_k)
+        if baseline is None:
+            baseline = ids
+        recall = recall_at_k(ids, baseline)
+        print(f"{index_type:10} {build_time:>10.2f} {recall:>10.3f} {latency:>14.3f}")
+
+    print("=" * 60)
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
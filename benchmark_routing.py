@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Routing Benchmark Script
+
+This script compares the query classification step of each routing mode
+supported by build_workflow by:
+1. Routing the labelled IT, Finance and chat example queries
+2. Timing only the routing nodes (no specialist agents or web search)
+3. Counting routing LLM calls and classification accuracy
+
+Routing modes:
+- two_hop: supervisor_agent then decider_agent (two LLM calls)
+- single:  decider_agent only (one LLM call)
+- local:   nearest-centroid router, decider_agent only when unsure
+
+Note: the local router is fitted on the same example queries, so its
+accuracy here is optimistic. The latency and LLM call counts are the point.
+
+Usage: python benchmark_routing.py [--limit 20] [--modes local single]
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+from statistics import median
+
+sys.path.append(str(Path(__file__).parent))
+
+from agents import supervisor_agent, decider_agent, router_agent, get_query_router, ROUTING_MODES
+from example_queries import load_example_queries
+from query_router import CLASSIFICATION_LABELS
+
+def route(mode: str, query: str) -> dict:
+    state = {"query": query, "messages": []}
+    if mode == "two_hop":
+        return decider_agent(supervisor_agent(state))
+    if mode == "single":
+        return decider_agent(state)
+    return router_agent(state)
+
+def main():
+    parser = argparse.ArgumentParser(description="Routing latency comparison")
+    parser.add_argument("--limit", type=int, default=0, help="Only route the first N labelled queries")
+    parser.add_argument("--modes", nargs="+", default=list(ROUTING_MODES), choices=ROUTING_MODES)
+    args = parser.parse_args()
+
+    examples = [q for q in load_example_queries() if q["category"] in CLASSIFICATION_LABELS]
+    if args.limit:
+        examples = examples[:args.limit]
+
+    # Fit the centroid router up front so its one-off cost is not timed
+    get_query_router()
+
+    print(f"📊 Routing {len(examples)} labelled queries")
+    print("=" * 70)
+    print(f"{'Mode':10} {'p50 (ms)':>10} {'mean (ms)':>10} {'LLM calls/query':>16} {'Accuracy':>10}")
+    for mode in args.modes:
+        latencies = []
+        llm_calls = correct = 0
+        for example in examples:
+            start = time.perf_counter()
+            result = route(mode, example["query"])
+            latencies.append((time.perf_counter() - start) * 1000)
+
+            steps = result.get("route_path", "").split(" → ")
+            llm_calls += sum(step in ("SUPERVISOR", "DECIDER") for step in steps)
+            correct += result.get("classification") == CLASSIFICATION_LABELS[example["category"]]
+
+        print(f"{mode:10} {median(latencies):>10.1f} {sum(latencies) / len(latencies):>10.1f} "
+              f"{llm_calls / len(examples):>16.2f} {correct / len(examples):>10.0%}")
+    print("=" * 70)
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Batched Search Benchmark Script
+
+This script compares VectorStore.search called in a Python loop against a
+single VectorStore.search_batch call over the same example queries. The
+embedding cache is disabled so both paths pay for encoding.
+
+Usage: python benchmark_search.py [--repeat 10] [--top-k 3]
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from vector_store import VectorStore
+from example_queries import load_example_queries
+
+def main():
+    parser = argparse.ArgumentParser(description="Looped vs batched search throughput")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--top-k", type=int, default=3)
+    args = parser.parse_args()
+
+    store = VectorStore(embedding_cache_path=None)
+    if not store.load_from_disk():
+        print("❌ Error: vector database not found. Run 'python initialize_db.py' first.")
+        return False
+
+    examples = load_example_queries()
+    queries = [q["query"] for q in examples] * args.repeat
+    categories = [q["category"] for q in examples] * args.repeat
+    store.warm_up()
+
+    print(f"📊 Searching {len(queries)} queries (top_k={args.top_k})")
+    print("=" * 50)
+
+    start = time.perf_counter()
+    for query, category in zip(queries, categories):
+        store.search(query, category, args.top_k)
+    loop_qps = len(queries) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    store.search_batch(queries, categories, args.top_k)
+    batch_qps = len(queries) / (time.perf_counter() - start)
+
+    print(f"{'search() loop':20} {loop_qps:10.1f} queries/s")
+    print(f"{'search_batch()':20} {batch_qps:10.1f} queries/s ({batch_qps / loop_qps:.1f}x)")
+    print("=" * 50)
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark Script
+
+This script measures how long the expensive startup work takes:
+1. Importing vector_store and agents in a fresh interpreter
+2. Running the explicit warm-up (embedding model, vector database, LLM client)
+3. Serving the first vector search after warm-up
+
+The embedding model and LLM client are loaded lazily, so the import rows
+should be a small fraction of the warm-up row that used to be paid at
+import time by every process, test run and Streamlit rerun.
+
+Usage: python benchmark_startup.py [--runs 3]
+"""
+
+import sys
+import json
+import argparse
+import subprocess
+from pathlib import Path
+from statistics import median
+
+PROBE = """
+import json, time
+start = time.perf_counter()
+import {module}
+imported = time.perf_counter()
+timings = {{"import": imported - start}}
+if {warm}:
+    import agents, vector_store
+    agents.warm_up()
+    warmed = time.perf_counter()
+    timings["warm_up"] = warmed - imported
+    vector_store.vector_search_impl("How do I set up VPN?", "IT")
+    timings["first_search"] = time.perf_counter() - warmed
+print(json.dumps(timings))
+"""
+
+def run_probe(module: str, warm: bool) -> dict:
+    """Time the probe in a fresh interpreter so no module is already cached."""
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module, warm=warm)],
+        cwd=Path(__file__).parent, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Import and warm-up time benchmark")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    print("⏱️  Benchmarking startup time...")
+    print("=" * 50)
+
+    rows = {}
+    for module in ("vector_store", "agents"):
+        rows[f"import {module}"] = median(run_probe(module, False)["import"] for _ in range(args.runs))
+
+    warm_runs = [run_probe("agents", True) for _ in range(args.runs)]
+    rows["warm_up()"] = median(run["warm_up"] for run in warm_runs)
+    rows["first search after warm-up"] = median(run["first_search"] for run in warm_runs)
+
+    for name, seconds in rows.items():
+        print(f"{name:30} {seconds:8.3f}s")
+    print("=" * 50)
+    print(f"Eager startup (import + warm-up) would cost {rows['import agents'] + rows['warm_up()']:.3f}s per import")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
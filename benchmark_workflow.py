@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Workflow Benchmark Script
+
+This script measures the agent graph's own overhead offline by:
+1. Swapping Bedrock for a deterministic fake LLM with configurable latency
+   and Tavily for the local web search stand-in
+2. Replaying data/example_queries.txt through workflow.invoke at a given
+   concurrency
+3. Reporting p50/p95/p99 latency per node and end to end, throughput and
+   peak memory
+4. Saving the results as JSON, optionally comparing against a previous run
+
+The fake LLM still goes through ResilientChatModel, so the limiter and
+retry layer are part of what is measured. Embeddings and FAISS search use
+the real model and vector database.
+
+Usage: python benchmark_workflow.py [--concurrency 8] [--llm-latency 0.5]
+       [--web-latency 0.8] [--routing-mode two_hop] [--output results.json]
+       [--baseline previous.json]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import contextlib
+import platform
+import resource
+import tempfile
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from langchain_core.callbacks import BaseCallbackHandler
+
+sys.path.append(str(Path(__file__).parent))
+
+# The fakes replace Tavily, so no API key is needed
+os.environ["WEB_SEARCH_BACKEND"] = "local"
+
+import agents
+from agents import build_workflow, ROUTING_MODES
+from example_queries import load_example_queries
+from fake_llm import FakeChatModel
+from llm_client import ResilientChatModel, ConcurrencyLimiter
+from web_search_cache import WebSearchCache, LocalWebSearch
+
+class NodeTimer(BaseCallbackHandler):
+    """Collects the wall time of every LangGraph node run."""
+
+    def __init__(self):
+        self.latencies = {}
+        self._started = {}
+        self._lock = threading.Lock()
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        # Only the node's own run, not the same-named runnable nested inside it
+        if node and kwargs.get("name") == node and parent_run_id not in self._started:
+            self._started[run_id] = (node, time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        started = self._started.pop(run_id, None)
+        if started:
+            node, start = started
+            with self._lock:
+                self.latencies.setdefault(node, []).append(time.perf_counter() - start)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._started.pop(run_id, None)
+
+def percentiles(latencies) -> dict:
+    values = np.array(latencies) * 1000
+    return {
+        "count": len(values),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "mean_ms": float(values.mean()),
+    }
+
+def install_fakes(args, cache_dir: str):
+    """Point agents at the fake LLM and the local web search stand-in."""
+    agents._llm = ResilientChatModel(
+        model=FakeChatModel(latency=args.llm_latency, token_latency=args.token_latency),
+        limiter=ConcurrencyLimiter(max_concurrency=args.llm_concurrency),
+        stats=agents.llm_call_stats,
+    )
+    agents._web_search_client = LocalWebSearch(latency=args.web_latency)
+    # A fresh cache per run keeps results comparable
+    agents._web_search_cache = WebSearchCache(cache_path=str(Path(cache_dir) / "web_search_cache.db"))
+
+def run_benchmark(args) -> dict:
+    queries = [q["query"] for q in load_example_queries()] * args.repeat
+    workflow = build_workflow(args.routing_mode)
+    timer = NodeTimer()
+
+    def run_query(query: str) -> float:
+        start = time.perf_counter()
+        workflow.invoke({"query": query, "messages": []}, config={"callbacks": [timer]})
+        return time.perf_counter() - start
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    # Agent debug logging from many threads would dominate the timings
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(open(os.devnull, "w"))
+    with quiet, ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        end_to_end = list(executor.map(run_query, queries))
+    wall_seconds = time.perf_counter() - start
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    rss_scale = 1024 * 1024 if platform.system() == "Darwin" else 1024
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / rss_scale
+
+    return {
+        "config": vars(args) | {"queries": len(queries)},
+        "summary": {
+            "wall_seconds": wall_seconds,
+            "throughput_qps": len(queries) / wall_seconds,
+            "end_to_end": percentiles(end_to_end),
+        },
+        "nodes": {node: percentiles(latencies) for node, latencies in sorted(timer.latencies.items())},
+        "llm_calls": agents.llm_call_stats.snapshot(),
+        "memory": {
+            "peak_rss_mb": peak_rss_mb,
+            "rss_before_replay_mb": rss_before / rss_scale,
+        },
+    }
+
+def print_report(results: dict, baseline: dict = None):
+    summary = results["summary"]
+    print(f"Queries: {results['config']['queries']}, concurrency: {results['config']['concurrency']}, "
+          f"throughput: {summary['throughput_qps']:.2f} q/s, peak RSS: {results['memory']['peak_rss_mb']:.0f} MB")
+    print("=" * 78)
+    print(f"{'Node':20} {'count':>6} {'p50 (ms)':>10} {'p95 (ms)':>10} {'p99 (ms)':>10} {'Δp95 vs baseline':>18}")
+    rows = list(results["nodes"].items()) + [("END TO END", summary["end_to_end"])]
+    for node, stats in rows:
+        previous = (baseline or {}).get("nodes", {}).get(node)
+        if node == "END TO END" and baseline:
+            previous = baseline["summary"]["end_to_end"]
+        delta = f"{(stats['p95_ms'] / previous['p95_ms'] - 1):>+17.1%}" if previous else f"{'-':>17}"
+        print(f"{node:20} {stats['count']:>6} {stats['p50_ms']:>10.1f} {stats['p95_ms']:>10.1f} "
+              f"{stats['p99_ms']:>10.1f} {delta}")
+    print("=" * 78)
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline workflow benchmark with a fake LLM and web search")
+    parser.add_argument("--concurrency", type=int, default=8, help="Queries in flight at once")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay the example queries N times")
+    parser.add_argument("--routing-mode", default="two_hop", choices=ROUTING_MODES)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Fake LLM seconds per call")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="Fake LLM seconds per answer token")
+    parser.add_argument("--llm-concurrency", type=int, default=8, help="LLM limiter slots")
+    parser.add_argument("--web-latency", type=float, default=0.8, help="Fake web search seconds per call")
+    parser.add_argument("--output", default="benchmark_workflow.json", help="Where to save the JSON results")
+    parser.add_argument("--baseline", help="Previous results JSON to compare p95 latency against")
+    parser.add_argument("--verbose", action="store_true", help="Keep the agents' debug output")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    if not agents.vector_store.load_from_disk():
+        print("❌ Error: vector database not available. Run 'python initialize_db.py' first.")
+        return False
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        install_fakes(args, cache_dir)
+        # Load the router and embedding model before timing starts
+        agents.vector_store.warm_up()
+        if args.routing_mode == "local":
+            agents.get_query_router()
+        results = run_benchmark(args)
+
+    print_report(results, baseline)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {args.output}")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,112 @@
+import re
+import json
+import math
+from pathlib import Path
+from typing import List, Dict, Optional, Sequence
+
+import numpy as np
+
+from chunk_store import write_atomically
+
+VOCAB_FILE = "bm25_vocab.json"
+TERM_OFFSETS_FILE = "bm25_term_offsets.npy"
+DOC_IDS_FILE = "bm25_doc_ids.npy"
+TERM_FREQS_FILE = "bm25_term_freqs.npy"
+DOC_LENGTHS_FILE = "bm25_doc_lengths.npy"
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from", "how",
+    "i", "if", "in", "is", "it's", "my", "of", "on", "or", "should", "the", "to", "what",
+    "what's", "when", "where", "which", "who", "why", "will", "with", "you", "your",
+}
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens, keeping product terms like 2fa, wi-fi or w-2 intact."""
+    tokens = re.findall(r"[a-z0-9]+(?:[-'][a-z0-9]+)*", text.lower())
+    return [token for token in tokens if token not in STOPWORDS]
+
+class BM25Index:
+    """Okapi BM25 inverted index over chunk ids, stored as CSR postings arrays."""
+
+    def __init__(self, vocab: Dict[str, int], term_offsets: np.ndarray, doc_ids: np.ndarray,
+                 term_freqs: np.ndarray, doc_lengths: np.ndarray, k1: float = 1.5, b: float = 0.75):
+        self.vocab = vocab
+        self.term_offsets = term_offsets
+        self.doc_ids = doc_ids
+        self.term_freqs = term_freqs
+        self.doc_lengths = doc_lengths
+        self.k1 = k1
+        self.b = b
+
+        live = doc_lengths > 0
+        self.n_docs = int(live.sum())
+        self.avg_doc_length = float(doc_lengths[live].mean()) if self.n_docs else 0.0
+
+    @classmethod
+    def build(cls, chunks: Sequence[Optional[str]]) -> "BM25Index":
+        """Tokenize every chunk; removed chunks (None) get no postings."""
+        postings: Dict[str, Dict[int, int]] = {}
+        doc_lengths = np.zeros(len(chunks), dtype='float32')
+        for chunk_id, chunk in enumerate(chunks):
+            if chunk is None:
+                continue
+            tokens = tokenize(chunk)
+            doc_lengths[chunk_id] = len(tokens)
+            for token in tokens:
+                counts = postings.setdefault(token, {})
+                counts[chunk_id] = counts.get(chunk_id, 0) + 1
+
+        terms = sorted(postings)
+        term_offsets = np.zeros(len(terms) + 1, dtype='int64')
+        term_offsets[1:] = np.cumsum([len(postings[term]) for term in terms])
+        doc_ids = np.fromiter((d for term in terms for d in postings[term]), dtype='int64', count=int(term_offsets[-1]))
+        term_freqs = np.fromiter((f for term in terms for f in postings[term].values()), dtype='float32', count=int(term_offsets[-1]))
+        vocab = {term: row for row, term in enumerate(terms)}
+        return cls(vocab, term_offsets, doc_ids, term_freqs, doc_lengths)
+
+    def search(self, query: str, top_k: int, allowed: Optional[np.ndarray] = None) -> List[tuple[int, float]]:
+        """Return up to top_k (chunk_id, score) pairs, optionally restricted by a boolean mask."""
+        scores = np.zeros(len(self.doc_lengths), dtype='float32')
+        for token in set(tokenize(query)):
+            row = self.vocab.get(token)
+            if row is None:
+                continue
+            start, end = self.term_offsets[row], self.term_offsets[row + 1]
+            ids = self.doc_ids[start:end]
+            tfs = self.term_freqs[start:end]
+            idf = math.log(1 + (self.n_docs - len(ids) + 0.5) / (len(ids) + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[ids] / self.avg_doc_length)
+            scores[ids] += idf * tfs * (self.k1 + 1) / (tfs + norm)
+
+        if allowed is not None:
+            scores[~allowed] = 0
+        matched = np.flatnonzero(scores > 0)
+        if len(matched) > top_k:
+            matched = matched[np.argpartition(-scores[matched], top_k - 1)[:top_k]]
+        ranked = matched[np.argsort(-scores[matched], kind='stable')]
+        return [(int(chunk_id), float(scores[chunk_id])) for chunk_id in ranked]
+
+    def save(self, directory: Path):
+        write_atomically(directory / VOCAB_FILE, lambda f: f.write(json.dumps(self.vocab).encode('utf-8')))
+        write_atomically(directory / TERM_OFFSETS_FILE, lambda f: np.save(f, self.term_offsets))
+        write_atomically(directory / DOC_IDS_FILE, lambda f: np.save(f, self.doc_ids))
+        write_atomically(directory / TERM_FREQS_FILE, lambda f: np.save(f, self.term_freqs))
+        write_atomically(directory / DOC_LENGTHS_FILE, lambda f: np.save(f, self.doc_lengths))
+
+    @staticmethod
+    def exists(directory: Path) -> bool:
+        return all((directory / name).exists() for name in
+                   (VOCAB_FILE, TERM_OFFSETS_FILE, DOC_IDS_FILE, TERM_FREQS_FILE, DOC_LENGTHS_FILE))
+
+    @classmethod
+    def load(cls, directory: Path) -> "BM25Index":
+        """Load the index; postings arrays are memory-mapped like the chunk store."""
+        with open(directory / VOCAB_FILE, "r", encoding='utf-8') as f:
+            vocab = json.load(f)
+        return cls(
+            vocab,
+            np.load(directory / TERM_OFFSETS_FILE, mmap_mode='r'),
+            np.load(directory / DOC_IDS_FILE, mmap_mode='r'),
+            np.load(directory / TERM_FREQS_FILE, mmap_mode='r'),
+            np.load(directory / DOC_LENGTHS_FILE),
+        )
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Relevance Gate Calibration Script
+
+This script calibrates the similarity thresholds of the local relevance gate
+in agents.py, without calling the LLM, by:
+1. Searching every labelled IT/Finance query from data/example_queries.txt
+2. Treating "direct FAQ" queries as relevant and "web search" queries as not
+3. Choosing the widest-confidence thresholds that make no mistakes on them
+4. Reporting how many relevance LLM calls the gate saves
+
+Usage: python calibrate_relevance.py [--margin 0.02]
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from vector_store import VectorStore
+from example_queries import load_example_queries
+from agents import RELEVANCE_GATE_LOW, RELEVANCE_GATE_HIGH
+
+def evaluate(samples, low: float, high: float) -> dict:
+    """Count gate decisions, LLM fallbacks and mistakes for a threshold pair."""
+    decided = correct = 0
+    for similarity, relevant in samples:
+        if similarity >= high or similarity < low:
+            decided += 1
+            correct += (similarity >= high) == relevant
+    return {"decided": decided, "llm_calls": len(samples) - decided, "correct": correct}
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate the relevance gate thresholds")
+    parser.add_argument("--margin", type=float, default=0.02, help="Safety margin added around the band")
+    args = parser.parse_args()
+
+    store = VectorStore()
+    if not store.load_from_disk():
+        print("❌ Error: vector database not found. Run 'python initialize_db.py' first.")
+        return False
+
+    labelled = [q for q in load_example_queries() if q["category"] and q["source"]]
+    results = store.search_batch([q["query"] for q in labelled], [q["category"] for q in labelled], top_k=3)
+    samples = [
+        (max((r["similarity"] for r in hits), default=0.0), q["source"] == "internal")
+        for q, hits in zip(labelled, results)
+    ]
+
+    positives = [similarity for similarity, relevant in samples if relevant]
+    negatives = [similarity for similarity, relevant in samples if not relevant]
+    print(f"🎯 Calibrating on {len(positives)} relevant and {len(negatives)} not-relevant queries")
+    print("=" * 60)
+    print(f"Relevant similarity:     min {min(positives):.3f}  max {max(positives):.3f}")
+    print(f"Not-relevant similarity: min {min(negatives):.3f}  max {max(negatives):.3f}")
+
+    # Above every negative is safely relevant; below every positive is safely not
+    low = min(positives) - args.margin
+    high = max(negatives) + args.margin
+    if low >= high:
+        low = high = (low + high) / 2
+
+    print(f"\n{'Thresholds':24} {'LLM calls':>10} {'Saved':>8} {'Gate accuracy':>15}")
+    for name, (lo, hi) in [("configured", (RELEVANCE_GATE_LOW, RELEVANCE_GATE_HIGH)), ("recommended", (low, high))]:
+        stats = evaluate(samples, lo, hi)
+        accuracy = stats["correct"] / stats["decided"] if stats["decided"] else 1.0
+        print(f"{name:11} [{lo:.3f}, {hi:.3f}) {stats['llm_calls']:>10} "
+              f"{stats['decided'] / len(samples):>7.0%} {accuracy:>15.0%}")
+
+    print("=" * 60)
+    print("Recommended settings for .env:")
+    print(f"RELEVANCE_GATE_LOW={low:.3f}")
+    print(f"RELEVANCE_GATE_HIGH={high:.3f}")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
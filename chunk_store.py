@@ -0,0 +1,93 @@
+import os
+import mmap
+import json
+from pathlib import Path
+from typing import List, Optional, Sequence as SequenceType
+from collections.abc import Sequence
+
+import numpy as np
+
+CHUNKS_FILE = "chunks.bin"
+OFFSETS_FILE = "chunk_offsets.npy"
+CATEGORY_CODES_FILE = "category_codes.npy"
+CATEGORY_NAMES_FILE = "category_names.json"
+
+def write_atomically(path: Path, write):
+    """Write to a temporary file then rename it over path.
+
+    Processes that already mmap the old file keep reading the old inode
+    instead of seeing a truncated file.
+    """
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+def write_chunk_store(directory: Path, chunks: SequenceType[Optional[str]], categories: SequenceType[Optional[str]]):
+    """Persist chunks as one offset-indexed UTF-8 buffer and categories as int16 codes.
+
+    Removed chunks (None) are stored as empty strings with category code -1.
+    """
+    names = sorted({c for c in categories if c is not None})
+    name_codes = {name: code for code, name in enumerate(names)}
+    codes = np.array([name_codes[c] if c is not None else -1 for c in categories], dtype='int16')
+
+    encoded = [(chunk or "").encode('utf-8') for chunk in chunks]
+    offsets = np.zeros(len(encoded) + 1, dtype='int64')
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+
+    write_atomically(directory / CHUNKS_FILE, lambda f: f.write(b"".join(encoded)))
+    write_atomically(directory / OFFSETS_FILE, lambda f: np.save(f, offsets))
+    write_atomically(directory / CATEGORY_CODES_FILE, lambda f: np.save(f, codes))
+    write_atomically(directory / CATEGORY_NAMES_FILE, lambda f: f.write(json.dumps(names).encode('utf-8')))
+
+def chunk_store_exists(directory: Path) -> bool:
+    return all((directory / name).exists() for name in
+               (CHUNKS_FILE, OFFSETS_FILE, CATEGORY_CODES_FILE, CATEGORY_NAMES_FILE))
+
+class MappedChunks(Sequence):
+    """Read-only, lazily decoded view of the chunk text buffer."""
+
+    def __init__(self, directory: Path, codes: np.ndarray):
+        self._offsets = np.load(directory / OFFSETS_FILE, mmap_mode='r')
+        self._codes = codes
+        with open(directory / CHUNKS_FILE, "rb") as f:
+            # mmap cannot map an empty file
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("chunk index out of range")
+        if self._codes[idx] < 0:
+            return None
+        return self._buffer[int(self._offsets[idx]):int(self._offsets[idx + 1])].decode('utf-8')
+
+class MappedCategories(Sequence):
+    """Read-only view of integer-coded chunk categories."""
+
+    def __init__(self, codes: np.ndarray, names: List[str]):
+        self.codes = codes
+        self.names = names
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        code = int(self.codes[idx])
+        return self.names[code] if code >= 0 else None
+
+def read_chunk_store(directory: Path) -> tuple[MappedChunks, MappedCategories]:
+    """Open the chunk store with mmap; text is only decoded when accessed."""
+    codes = np.load(directory / CATEGORY_CODES_FILE, mmap_mode='r')
+    with open(directory / CATEGORY_NAMES_FILE, "r", encoding='utf-8') as f:
+        names = json.load(f)
+    return MappedChunks(directory, codes), MappedCategories(codes, names)
@@ -0,0 +1,121 @@
+import re
+from typing import Dict, List, NamedTuple, Tuple
+
+from bm25_index import tokenize
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+QUESTION_START = re.compile(r"^(?=Q[:\.])", re.MULTILINE)
+WEB_ENTRY_START = re.compile(r"\n\s*\n(?=\[\d+\] )")
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+def count_tokens(text: str) -> int:
+    """Approximate LLM token count: one per word or punctuation mark, more for long words.
+
+    Claude's tokenizer is not available offline; this tracks it closely
+    enough for budgeting English prompt context.
+    """
+    return sum(1 + len(piece) // 8 for piece in TOKEN_PATTERN.findall(text))
+
+def truncate_tokens(text: str, budget: int) -> str:
+    """Cut text after the last whole word or mark that fits in budget tokens."""
+    used, end = 0, 0
+    for match in TOKEN_PATTERN.finditer(text):
+        used += 1 + len(match.group()) // 8
+        if used > budget:
+            return text[:end].rstrip() + " ..."
+        end = match.end()
+    return text
+
+class Passage(NamedTuple):
+    """A retrieved passage: its body is trimmed sentence by sentence, header and footer are kept."""
+    header: str
+    body: str
+    footer: str
+
+def internal_passages(internal_result: str) -> List[Passage]:
+    """Split joined vector search results back into Q&A chunks, with the question as header."""
+    passages = []
+    for chunk in QUESTION_START.split(internal_result):
+        question, _, answer = chunk.strip().partition("\n")
+        if answer.strip():
+            passages.append(Passage(question, answer.strip(), ""))
+        elif question:
+            passages.append(Passage("", question, ""))
+    return passages
+
+def web_passages(web_result: str) -> List[Passage]:
+    """Split formatted web search results into "[n] title", content and "URL:" parts."""
+    passages = []
+    for entry in WEB_ENTRY_START.split(web_result.strip()):
+        lines = entry.strip().splitlines()
+        if len(lines) >= 3 and re.match(r"\[\d+\] ", lines[0]) and lines[-1].startswith("URL:"):
+            passages.append(Passage(lines[0], "\n".join(lines[1:-1]), lines[-1]))
+        elif entry.strip():
+            passages.append(Passage("", entry.strip(), ""))
+    return passages
+
+def _sentences(body: str) -> List[Tuple[str, bool]]:
+    """(sentence, starts a line) pairs, so line structure survives reassembly."""
+    sentences = []
+    for line in body.splitlines():
+        for position, sentence in enumerate(SENTENCE_END.split(line.strip())):
+            if sentence:
+                sentences.append((sentence, position == 0))
+    return sentences
+
+def _dedup_key(sentence: str) -> str:
+    return " ".join(re.findall(r"\w+", sentence.lower()))
+
+def assemble_context(query: str, passages: List[Passage], budget: int) -> Tuple[str, Dict[str, int]]:
+    """Fit passages into a token budget, keeping the sentences most relevant to the query.
+
+    Repeated sentences are dropped across all passages. If the rest does
+    not fit, sentences are chosen by query-term overlap with the sentence
+    and its passage header (earlier passages win ties) until the budget is
+    spent, then rendered in their original order. A budget of 0 only
+    deduplicates.
+
+    Returns the context and {"tokens_before", "tokens_after"}.
+    """
+    original = "\n\n".join("\n".join(part for part in passage if part) for passage in passages)
+    query_terms = set(tokenize(query))
+
+    candidates = []  # (passage index, sentence index, sentence, starts line)
+    seen = set()
+    for p, passage in enumerate(passages):
+        for s, (sentence, starts_line) in enumerate(_sentences(passage.body)):
+            key = _dedup_key(sentence)
+            if key and key in seen:
+                continue
+            seen.add(key)
+            candidates.append((p, s, sentence, starts_line))
+
+    overhead = {p: count_tokens(passage.header) + count_tokens(passage.footer) for p, passage in enumerate(passages)}
+    total = sum(count_tokens(c[2]) for c in candidates) + sum(overhead[p] for p in {c[0] for c in candidates})
+    if budget <= 0 or total <= budget:
+        selected = candidates
+    else:
+        header_terms = [query_terms & set(tokenize(passage.header)) for passage in passages]
+        ranked = sorted(candidates, key=lambda c: (
+            -len(query_terms & set(tokenize(c[2]))) - len(header_terms[c[0]]), c[0], c[1]))
+        selected, used, included = [], 0, set()
+        for candidate in ranked:
+            cost = count_tokens(candidate[2]) + (0 if candidate[0] in included else overhead[candidate[0]])
+            # Always keep the best sentence, even if it alone is over budget
+            if used + cost <= budget or not selected:
+                selected.append(candidate)
+                included.add(candidate[0])
+                used += cost
+        selected.sort(key=lambda c: (c[0], c[1]))
+
+    blocks = []
+    for p, passage in enumerate(passages):
+        body = ""
+        for _, _, sentence, starts_line in (c for c in selected if c[0] == p):
+            if body:
+                body += "\n" if starts_line else " "
+            body += sentence
+        if body:
+            blocks.append("\n".join(part for part in (passage.header, body, passage.footer) if part))
+    context = "\n\n".join(blocks)
+    return context, {"tokens_before": count_tokens(original), "tokens_after": count_tokens(context)}
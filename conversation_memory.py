@@ -0,0 +1,65 @@
+import sqlite3
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from context_budget import Passage, assemble_context, truncate_tokens
+
+def open_checkpointer(path: str = "conversations.db"):
+    """Return a LangGraph SQLite checkpointer storing conversations at path.
+
+    It is sync-only: drive a workflow compiled with it through invoke/stream.
+    """
+    # Deferred so the stateless workflow does not need langgraph-checkpoint-sqlite
+    from langgraph.checkpoint.sqlite import SqliteSaver
+    conn = sqlite3.connect(str(Path(path)), check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return SqliteSaver(conn)
+
+class ConversationMemory:
+    """Bounded conversation history: the last few turns plus a rolling summary.
+
+    Turns beyond recent_turns are folded into the summary by summarize
+    (previous summary, folded messages) -> new summary. Remembered answers
+    are trimmed to message_tokens and the summary to summary_tokens, so the
+    history added to prompts stays the same size however long the
+    conversation runs.
+    """
+
+    def __init__(self, summarize: Callable[[Optional[str], List[BaseMessage]], str],
+                 recent_turns: int = 3, message_tokens: int = 150, summary_tokens: int = 200):
+        self.summarize = summarize
+        self.recent_turns = recent_turns
+        self.message_tokens = message_tokens
+        self.summary_tokens = summary_tokens
+
+    @staticmethod
+    def _fit(query: str, text: str, budget: int) -> str:
+        # Keep the sentences closest to the query, cutting even a single long one to size
+        context, _ = assemble_context(query, [Passage("", text, "")], budget)
+        return truncate_tokens(context, budget)
+
+    @staticmethod
+    def render(summary: Optional[str], messages: List[BaseMessage]) -> str:
+        """History as prompt text; empty for the first turn."""
+        lines = [f"Summary of earlier conversation: {summary}"] if summary else []
+        for message in messages:
+            lines.append(f"{'User' if message.type == 'human' else 'Assistant'}: {message.content}")
+        return "\n".join(lines)
+
+    def remember(self, summary: Optional[str], messages: List[BaseMessage],
+                 query: str, answer: str) -> Tuple[Optional[str], List[BaseMessage]]:
+        """Add a turn, folding the oldest turns into the summary once past the window."""
+        answer = self._fit(query, answer, self.message_tokens)
+        messages = list(messages) + [HumanMessage(content=query), AIMessage(content=answer)]
+        keep = 2 * self.recent_turns
+        if len(messages) > keep:
+            folded, messages = messages[:-keep], messages[-keep:]
+            try:
+                summary = self._fit("", self.summarize(summary, folded), self.summary_tokens)
+            except Exception as e:
+                # Dropping the folded turns keeps the history bounded; the old summary stays
+                print(f"DEBUG: Conversation summary failed: {e}")
+        return summary, messages
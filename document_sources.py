@@ -0,0 +1,64 @@
+import re
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+# The two FAQ files the system shipped with
+DEFAULT_SOURCES = "data/it_faq.txt=IT,data/finance_faq.txt=Finance"
+
+QUESTION_LINE = re.compile(r"^Q[:\.]")
+
+def parse_sources(spec: str) -> List[Tuple[Path, Optional[str]]]:
+    """Parse "path[=Category],..." into (path, category) pairs.
+
+    A path is a file or a directory. Without a category, files in a
+    directory take theirs from the subdirectory they sit in, e.g.
+    docs/HR/leave.txt is filed under HR.
+    """
+    sources = []
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        path, _, category = entry.partition("=")
+        sources.append((Path(path.strip()), category.strip() or None))
+    return sources
+
+def discover_files(sources: List[Tuple[Path, Optional[str]]], pattern: str = "*.txt") -> Iterator[Tuple[Path, str]]:
+    """Yield (file, category) for every document under the sources, in a stable order."""
+    for path, category in sources:
+        if path.is_file():
+            if category is None:
+                print(f"Warning: No category for {path} - add '={path.stem}' to the source")
+                continue
+            yield path, category
+        elif path.is_dir():
+            for file_path in sorted(path.rglob(pattern)):
+                relative = file_path.relative_to(path)
+                file_category = category or (relative.parts[0] if len(relative.parts) > 1 else None)
+                if file_category is None:
+                    print(f"Warning: Skipping {file_path} - put it in a category subdirectory")
+                    continue
+                yield file_path, file_category
+        else:
+            print(f"Warning: Document source not found: {path}")
+
+def iter_chunks(file_path: Path) -> Iterator[str]:
+    """Split a document into Q&A chunks while reading it line by line."""
+    lines: List[str] = []
+    with open(file_path, "r", encoding="utf-8") as file:
+        for line in file:
+            if QUESTION_LINE.match(line) and lines:
+                chunk = "".join(lines).strip()
+                if chunk:
+                    yield chunk
+                lines = []
+            lines.append(line)
+    chunk = "".join(lines).strip()
+    if chunk:
+        yield chunk
+
+def iter_documents(sources: List[Tuple[Path, Optional[str]]]) -> Iterator[Tuple[str, str]]:
+    """Yield (chunk, category) for every chunk of every discovered document."""
+    for file_path, category in discover_files(sources):
+        print(f"Processing {category} document: {file_path}")
+        yield from ((chunk, category) for chunk in iter_chunks(file_path))
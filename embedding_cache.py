@@ -0,0 +1,165 @@
+import sqlite3
+import hashlib
+import threading
+import time
+from pathlib import Path
+from typing import List, Dict, Any
+
+import numpy as np
+
+class EmbeddingCache:
+    """Persistent SQLite cache of float32 embeddings keyed by (model, text hash).
+
+    Lookups only read. Their LRU timestamps are buffered in memory and
+    written in one transaction once touch_batch_size entries or
+    touch_interval seconds accumulate, or before an eviction needs them.
+
+    The cache size is a running byte count kept on insert and evict. It is
+    re-read from the table every size_sync_writes writes, to pick up other
+    processes sharing the file.
+    """
+
+    def __init__(self, cache_path: str = "embedding_cache.db", max_bytes: int = 256 * 1024 * 1024,
+                 touch_batch_size: int = 256, touch_interval: float = 30.0, size_sync_writes: int = 1000):
+        self.cache_path = Path(cache_path)
+        self.max_bytes = max_bytes
+        self.touch_batch_size = touch_batch_size
+        self.touch_interval = touch_interval
+        self.size_sync_writes = size_sync_writes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._touched: Dict[tuple, float] = {}
+        self._last_touch_flush = time.monotonic()
+        self._bytes = None  # running size; None until read from the table
+        self._writes_since_sync = 0
+
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.cache_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL, "
+            "last_used REAL NOT NULL, PRIMARY KEY (model, text_hash))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON embeddings (last_used)")
+        self._conn.commit()
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def get_many(self, model: str, texts: List[str]) -> Dict[str, np.ndarray]:
+        """Return cached vectors for the given texts, keyed by text hash."""
+        hashes = list({self.text_hash(text) for text in texts})
+        found = {}
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(hashes), 500):
+                batch = hashes[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *batch]
+                ).fetchall()
+                for text_hash, vector in rows:
+                    found[text_hash] = np.frombuffer(vector, dtype='float32')
+
+            now = time.time()
+            for text_hash in found:
+                self._touched[(model, text_hash)] = now
+            if (len(self._touched) >= self.touch_batch_size
+                    or time.monotonic() - self._last_touch_flush >= self.touch_interval):
+                self._flush_touches()
+                self._conn.commit()
+
+            for text in texts:
+                if self.text_hash(text) in found:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+        return found
+
+    def put_many(self, model: str, texts: List[str], vectors: np.ndarray):
+        """Store vectors for the given texts, evicting old entries if over budget."""
+        now = time.time()
+        rows = [
+            (model, self.text_hash(text), np.asarray(vector, dtype='float32').tobytes(), now)
+            for text, vector in zip(texts, vectors)
+        ]
+        with self._lock:
+            size = self._size()
+            # Replaced rows no longer count; primary key lookups, not a scan
+            for start in range(0, len(rows), 500):
+                batch = [row[1] for row in rows[start:start + 500]]
+                placeholders = ",".join("?" * len(batch))
+                size -= self._conn.execute(
+                    f"SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings "
+                    f"WHERE model = ? AND text_hash IN ({placeholders})", [model, *batch]
+                ).fetchone()[0]
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)", rows)
+            # Repeated texts in one call insert once; the last row wins
+            self._bytes = size + sum(len(row[2]) for row in {row[1]: row for row in rows}.values())
+            self._writes_since_sync += 1
+            self._evict()
+            self._conn.commit()
+
+    def _flush_touches(self):
+        """Write buffered LRU timestamps; the caller holds the lock and commits."""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE embeddings SET last_used = MAX(last_used, ?) WHERE model = ? AND text_hash = ?",
+                [(used, model, text_hash) for (model, text_hash), used in self._touched.items()]
+            )
+            self._touched = {}
+        self._last_touch_flush = time.monotonic()
+
+    def _size(self) -> int:
+        """Cached bytes; the caller holds the lock."""
+        if self._bytes is None or self._writes_since_sync >= self.size_sync_writes:
+            # A full scan, so only now and then
+            self._bytes = self._conn.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()[0]
+            self._writes_since_sync = 0
+        return self._bytes
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        size = self._size()
+        if size <= self.max_bytes:
+            return
+        self._flush_touches()
+        evicted = []
+        for rowid, length in self._conn.execute(
+            "SELECT rowid, LENGTH(vector) FROM embeddings ORDER BY last_used, rowid"
+        ):
+            if size <= self.max_bytes:
+                break
+            evicted.append((rowid,))
+            size -= length
+        self._conn.executemany("DELETE FROM embeddings WHERE rowid = ?", evicted)
+        self._bytes = size
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current on-disk size."""
+        with self._lock:
+            size = self._size()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self._touched = {}
+            self._bytes = 0
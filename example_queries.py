@@ -0,0 +1,50 @@
+import re
+from typing import List, Dict, Any
+
+SECTION_CATEGORIES = {
+    "IT-RELATED QUERIES": "IT",
+    "FINANCE-RELATED QUERIES": "Finance",
+    "CHAT QUERIES": "CHAT",
+    "EDGE CASES": None,
+    "TESTING SCENARIOS": None,
+}
+
+SUBSECTION_SOURCES = {
+    "QUERIES WITH DIRECT FAQ RESPONSES": "internal",
+    "QUERIES REQUIRING WEB SEARCH": "web",
+}
+
+def load_example_queries(file_path: str = "data/example_queries.txt") -> List[Dict[str, Any]]:
+    """Parse the labelled example queries used for benchmarks and calibration.
+
+    Each entry has the query text, the expected category ("IT", "Finance",
+    "CHAT" or None for ambiguous queries) and the expected data source
+    ("internal", "web" or None).
+    """
+    queries = []
+    category = None
+    source = None
+
+    with open(file_path, 'r', encoding='utf-8') as file:
+        for line in file:
+            line = line.strip()
+
+            section = next((s for s in SECTION_CATEGORIES if line.startswith(s)), None)
+            if section:
+                category = SECTION_CATEGORIES[section]
+                source = None
+                continue
+
+            subsection = next((s for s in SUBSECTION_SOURCES if line.startswith(s)), None)
+            if subsection:
+                source = SUBSECTION_SOURCES[subsection]
+                continue
+
+            if line.startswith("EXPECTED AGENT RESPONSES"):
+                break
+
+            match = re.match(r'^\d+\.\s.*?"([^"]+)"', line)
+            if match:
+                queries.append({"query": match.group(1), "category": category, "source": source})
+
+    return queries
@@ -0,0 +1,31 @@
+import re
+import hashlib
+from typing import List
+
+import numpy as np
+
+class FakeEmbedder:
+    """Deterministic, dependency-free stand-in for the sentence-transformers model.
+
+    Hashes each word into one of dimension buckets and normalizes, so texts
+    sharing words are close. Lets tests build and search real FAISS indexes
+    without downloading all-MiniLM-L6-v2.
+    """
+
+    def __init__(self, dimension: int = 64):
+        self.dimension = dimension
+        self.encoded = 0  # texts embedded so far
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def encode(self, texts: List[str], **kwargs) -> np.ndarray:
+        self.encoded += len(texts)
+        vectors = np.zeros((len(texts), self.dimension), dtype='float32')
+        for row, text in enumerate(texts):
+            for word in re.findall(r"\w+", text.lower()):
+                vectors[row, int(hashlib.md5(word.encode('utf-8')).hexdigest(), 16) % self.dimension] += 1.0
+            norm = np.linalg.norm(vectors[row])
+            if norm:
+                vectors[row] /= norm
+        return vectors
@@ -0,0 +1,73 @@
+import re
+import time
+import asyncio
+from typing import Any, Dict, Iterator, AsyncIterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from example_queries import load_example_queries
+from query_router import CLASSIFICATION_LABELS
+
+class FakeChatModel(BaseChatModel):
+    """Deterministic, latency-configurable stand-in for the Bedrock chat model.
+
+    Answers the decider with the labelled category of known example queries
+    and the relevance evaluator with their labelled data source, so replaying
+    data/example_queries.txt follows realistic graph paths without Bedrock.
+    Each call sleeps latency seconds, plus token_latency per streamed token.
+    """
+
+    latency: float = 0.5
+    token_latency: float = 0.0
+    answer_tokens: int = 60
+    labels: Dict[str, Dict[str, Any]] = {}
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        if not self.labels:
+            self.labels = {q["query"].lower(): q for q in load_example_queries()}
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _reply(self, messages: List[BaseMessage]) -> str:
+        text = "\n".join(str(message.content) for message in messages)
+        if "Decider Agent" in text:
+            # Follow-up turns carry the conversation before the "Current message: "
+            query = str(messages[-1].content).rsplit("Current message: ", 1)[-1]
+            example = self.labels.get(query.strip().lower())
+            return CLASSIFICATION_LABELS.get(example["category"], "CHAT") if example and example["category"] else "CHAT"
+        if "relevance evaluator" in text:
+            match = re.search(r'User Query: "(.*)"', text)
+            example = self.labels.get(match.group(1).strip().lower()) if match else None
+            return "NOT_RELEVANT" if example and example["source"] == "web" else "RELEVANT"
+        return " ".join(f"token{i}" for i in range(self.answer_tokens))
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        reply = self._reply(messages)
+        time.sleep(self.latency + self.token_latency * len(reply.split()))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=reply))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager=None, **kwargs: Any) -> ChatResult:
+        reply = self._reply(messages)
+        await asyncio.sleep(self.latency + self.token_latency * len(reply.split()))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=reply))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.latency)
+        for i, token in enumerate(self._reply(messages).split(" ")):
+            time.sleep(self.token_latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=(" " if i else "") + token))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.latency)
+        for i, token in enumerate(self._reply(messages).split(" ")):
+            await asyncio.sleep(self.token_latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=(" " if i else "") + token))
@@ -3,12 +3,18 @@
 Vector Database Initialization Script
 
 This script initializes the persistent vector database by:
-1. Clearing any existing database
-2. Loading and chunking documents from data/
-3. Creating embeddings and FAISS index
+1. Loading and chunking documents from the VECTOR_SOURCES files and
+   directories (data/it_faq.txt and data/finance_faq.txt by default)
+2. Comparing chunk content hashes against the stored manifest
+3. Embedding only new or changed chunks and removing deleted ones
 4. Saving everything to disk for persistent storage
 
-Run this script once on application startup or when you want to rebuild the database.
+Run this script once on application startup or whenever the FAQ documents
+change. Each run writes a new version directory and publishes it
+atomically, so running apps hot-swap to it without a restart. Pass --full
+to rebuild from scratch instead of updating incrementally; a full rebuild
+streams chunks through INGEST_WORKERS embedding processes in
+batches of INGEST_BATCH_SIZE.
 """
 
 import os
@@ -18,35 +24,26 @@ from pathlib import Path
 # Add current directory to path for imports
 sys.path.append(str(Path(__file__).parent))
 
-from vector_store import initialize_vector_store
+from vector_store import initialize_vector_store, vector_store
 
 def main():
     """Initialize the vector database."""
     print("🚀 Initializing Vector Database...")
     print("=" * 50)
 
-    # Check if data directory exists
-    data_dir = Path("data")
-    if not data_dir.exists():
-        print("❌ Error: data/ directory not found!")
-        print("Please ensure you have the following files:")
-        print("  - data/it_faq.txt")
-        print("  - data/finance_faq.txt")
-        return False
-
-    # Check if required files exist
-    required_files = ["data/it_faq.txt", "data/finance_faq.txt"]
-    missing_files = [f for f in required_files if not Path(f).exists()]
+    # Check that every configured document source exists
+    missing_files = [str(path) for path, _ in vector_store.sources if not path.exists()]
 
     if missing_files:
-        print("❌ Error: Missing required files:")
+        print("❌ Error: Missing document sources (see VECTOR_SOURCES):")
         for file in missing_files:
             print(f"  - {file}")
         return False
 
     try:
-        # Initialize vector store (force rebuild to ensure clean state)
-        initialize_vector_store(force_rebuild=True)
+        # Incrementally sync the vector store unless a clean rebuild is requested
+        full_rebuild = "--full" in sys.argv[1:]
+        initialize_vector_store(force_rebuild=full_rebuild, incremental=not full_rebuild)
 
         print("=" * 50)
         print("✅ Vector Database initialized successfully!")
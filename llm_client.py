@@ -0,0 +1,320 @@
+import os
+import time
+import random
+import asyncio
+import threading
+from typing import Any, Dict, Iterator, AsyncIterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_core.runnables.config import var_child_runnable_config
+from pydantic import ConfigDict
+
+import tracing
+
+# Bedrock error codes worth retrying with backoff
+RETRYABLE_ERROR_CODES = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+    "ModelNotReadyException",
+    "InternalServerException",
+}
+
+def bedrock_client_config():
+    """botocore Config with pool size and timeouts from the environment.
+
+    botocore's own retries are disabled; ResilientChatModel retries
+    throttling itself so every attempt passes through the limiter.
+    """
+    from botocore.config import Config
+    return Config(
+        max_pool_connections=int(os.getenv("BEDROCK_MAX_POOL_CONNECTIONS", "16")),
+        connect_timeout=float(os.getenv("BEDROCK_CONNECT_TIMEOUT", "5")),
+        read_timeout=float(os.getenv("BEDROCK_READ_TIMEOUT", "60")),
+        retries={"total_max_attempts": 1},
+    )
+
+def bedrock_client():
+    """bedrock-runtime client for AWS_REGION, or BEDROCK_ENDPOINT_URL when set."""
+    import boto3
+    return boto3.client(
+        "bedrock-runtime",
+        region_name=os.getenv("AWS_REGION", "us-east-1"),
+        endpoint_url=os.getenv("BEDROCK_ENDPOINT_URL") or None,
+        config=bedrock_client_config(),
+    )
+
+def is_retryable(error: BaseException) -> bool:
+    """True for throttling, transient server errors and timeouts, anywhere in the exception chain."""
+    from botocore.exceptions import ClientError, ConnectionError as BotoConnectionError, ReadTimeoutError
+
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, ClientError):
+            return error.response.get("Error", {}).get("Code") in RETRYABLE_ERROR_CODES
+        if isinstance(error, (BotoConnectionError, ReadTimeoutError)):
+            return True
+        # Some LangChain wrappers re-raise service errors as plain ValueErrors
+        if any(code in str(error) for code in RETRYABLE_ERROR_CODES):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """Full-jitter exponential backoff."""
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+class ConcurrencyLimiter:
+    """Caps in-flight LLM calls and, optionally, their start rate with a token bucket.
+
+    Works across threads and event loops: sync callers block on a condition,
+    async callers poll with asyncio.sleep so the loop stays free.
+    """
+
+    def __init__(self, max_concurrency: int = 8, rate_per_second: float = 0.0, burst: Optional[int] = None):
+        self.max_concurrency = max_concurrency
+        self.rate_per_second = rate_per_second
+        self.burst = burst or max_concurrency
+        self._tokens = float(self.burst)
+        self._refilled = time.monotonic()
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    def _try_acquire(self) -> float:
+        """Take a slot, returning 0, or return how long to wait before trying again."""
+        if self._in_flight >= self.max_concurrency:
+            return 0.01
+        if self.rate_per_second > 0:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate_per_second)
+            self._refilled = now
+            if self._tokens < 1:
+                return (1 - self._tokens) / self.rate_per_second
+            self._tokens -= 1
+        self._in_flight += 1
+        return 0.0
+
+    def acquire(self):
+        with self._cond:
+            while wait := self._try_acquire():
+                self._cond.wait(wait)
+
+    async def aacquire(self):
+        while True:
+            with self._cond:
+                wait = self._try_acquire()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    def release(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+
+class LLMCallStats:
+    """Per-node LLM call counts, retries, failures and latency."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._nodes: Dict[str, Dict[str, float]] = {}
+
+    def record(self, node: str, seconds: float, retries: int, failed: bool = False):
+        with self._lock:
+            stats = self._nodes.setdefault(node, {"calls": 0, "retries": 0, "failures": 0,
+                                                  "total_seconds": 0.0, "max_seconds": 0.0})
+            stats["calls"] += 1
+            stats["retries"] += retries
+            stats["failures"] += int(failed)
+            stats["total_seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                node: {**stats, "avg_seconds": stats["total_seconds"] / stats["calls"]}
+                for node, stats in self._nodes.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._nodes.clear()
+
+def _node_name(run_manager) -> str:
+    # Streaming calls get no run manager, so fall back to the active runnable config
+    metadata = getattr(run_manager, "metadata", None) or (var_child_runnable_config.get() or {}).get("metadata", {})
+    return metadata.get("langgraph_node", "unknown")
+
+def _result_usage(result: ChatResult) -> tuple[int, int]:
+    """(input, output) tokens from usage_metadata or the provider's llm_output."""
+    message = result.generations[0].message if result.generations else None
+    usage = getattr(message, "usage_metadata", None)
+    if usage:
+        return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    usage = (result.llm_output or {}).get("usage") or {}
+    return (usage.get("prompt_tokens", usage.get("input_tokens", 0)),
+            usage.get("completion_tokens", usage.get("output_tokens", 0)))
+
+class _StreamUsage:
+    """Token usage of a stream; output falls back to the chunk count when none is reported."""
+
+    def __init__(self):
+        self.input_tokens = self.output_tokens = self.chunks = 0
+
+    def add(self, chunk: ChatGenerationChunk):
+        self.chunks += 1
+        usage = getattr(chunk.message, "usage_metadata", None) or {}
+        self.input_tokens += usage.get("input_tokens", 0)
+        self.output_tokens += usage.get("output_tokens", 0)
+
+    def record(self):
+        tracing.record_llm_call(self.input_tokens, self.output_tokens or self.chunks)
+
+def _implements_stream(model: BaseChatModel) -> bool:
+    return type(model)._stream is not BaseChatModel._stream
+
+class ResilientChatModel(BaseChatModel):
+    """Chat model wrapper adding a concurrency limiter, retries with jittered
+    backoff on throttling, and per-node latency/retry counters.
+
+    Streams are retried only until their first chunk arrives, and hold a
+    limiter slot until they finish.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    model: BaseChatModel
+    limiter: ConcurrencyLimiter
+    stats: LLMCallStats
+    max_retries: int = 4
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+
+    @property
+    def _llm_type(self) -> str:
+        return f"resilient-{self.model._llm_type}"
+
+    def _retry_delay(self, node: str, attempt: int, error: Exception, started: float) -> float:
+        """Return the backoff before the next attempt, or re-raise when out of retries."""
+        if attempt >= self.max_retries or not is_retryable(error):
+            self.stats.record(node, time.perf_counter() - started, attempt, failed=True)
+            raise error
+        delay = backoff_delay(attempt, self.base_delay, self.max_delay)
+        print(f"DEBUG: LLM call from {node} failed ({error}), retrying in {delay:.2f}s")
+        return delay
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        node = _node_name(run_manager)
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            try:
+                result = self.model._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            except Exception as e:
+                delay = self._retry_delay(node, attempt, e, started)
+            else:
+                self.stats.record(node, time.perf_counter() - started, attempt)
+                tracing.record_llm_call(*_result_usage(result))
+                return result
+            finally:
+                self.limiter.release()
+            time.sleep(delay)
+            attempt += 1
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager=None, **kwargs: Any) -> ChatResult:
+        node = _node_name(run_manager)
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            await self.limiter.aacquire()
+            try:
+                result = await self.model._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            except Exception as e:
+                delay = self._retry_delay(node, attempt, e, started)
+            else:
+                self.stats.record(node, time.perf_counter() - started, attempt)
+                tracing.record_llm_call(*_result_usage(result))
+                return result
+            finally:
+                self.limiter.release()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        if not _implements_stream(self.model):
+            # Models without streaming yield their whole answer as one chunk
+            result = self._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            message = result.generations[0].message
+            yield ChatGenerationChunk(message=AIMessageChunk(content=message.content))
+            return
+
+        node = _node_name(run_manager)
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            try:
+                chunks = self.model._stream(messages, stop=stop, run_manager=run_manager, **kwargs)
+                first = next(chunks, None)
+            except Exception as e:
+                self.limiter.release()
+                delay = self._retry_delay(node, attempt, e, started)
+            else:
+                usage = _StreamUsage()
+                try:
+                    if first is not None:
+                        usage.add(first)
+                        yield first
+                        for chunk in chunks:
+                            usage.add(chunk)
+                            yield chunk
+                finally:
+                    self.limiter.release()
+                self.stats.record(node, time.perf_counter() - started, attempt)
+                usage.record()
+                return
+            time.sleep(delay)
+            attempt += 1
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        if not _implements_stream(self.model):
+            result = await self._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            message = result.generations[0].message
+            yield ChatGenerationChunk(message=AIMessageChunk(content=message.content))
+            return
+
+        node = _node_name(run_manager)
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            await self.limiter.aacquire()
+            try:
+                chunks = self.model._astream(messages, stop=stop, run_manager=run_manager, **kwargs)
+                first = await anext(chunks, None)
+            except Exception as e:
+                self.limiter.release()
+                delay = self._retry_delay(node, attempt, e, started)
+            else:
+                usage = _StreamUsage()
+                try:
+                    if first is not None:
+                        usage.add(first)
+                        yield first
+                        async for chunk in chunks:
+                            usage.add(chunk)
+                            yield chunk
+                finally:
+                    self.limiter.release()
+                self.stats.record(node, time.perf_counter() - started, attempt)
+                usage.record()
+                return
+            await asyncio.sleep(delay)
+            attempt += 1
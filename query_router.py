@@ -0,0 +1,51 @@
+from typing import List, Dict, Optional
+
+import numpy as np
+
+from example_queries import load_example_queries
+
+# Example query categories mapped to the decider's classification labels
+CLASSIFICATION_LABELS = {"IT": "IT", "Finance": "FINANCE", "CHAT": "CHAT"}
+
+class CentroidRouter:
+    """Nearest-centroid query classifier over sentence embeddings.
+
+    Each label's centroid is the normalized mean embedding of its labelled
+    example queries. A query is classified locally only when its best
+    centroid beats the runner-up by at least min_margin; otherwise the
+    caller should ask the LLM.
+    """
+
+    def __init__(self, encode, min_margin: float = 0.05):
+        self.encode = encode
+        self.min_margin = min_margin
+        self.labels: List[str] = []
+        self.centroids: Optional[np.ndarray] = None
+
+    def fit(self, examples: Optional[List[Dict]] = None) -> "CentroidRouter":
+        """Compute one centroid per label from labelled example queries."""
+        examples = examples if examples is not None else load_example_queries()
+        by_label: Dict[str, List[str]] = {}
+        for example in examples:
+            label = CLASSIFICATION_LABELS.get(example["category"])
+            if label:
+                by_label.setdefault(label, []).append(example["query"])
+
+        self.labels = sorted(by_label)
+        centroids = np.vstack([self._normalize(self.encode(by_label[label])).mean(axis=0) for label in self.labels])
+        self.centroids = self._normalize(centroids)
+        return self
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        return vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)
+
+    def classify(self, query: str) -> tuple[Optional[str], float]:
+        """Return (label, margin), with label None when the margin is too small to trust."""
+        if self.centroids is None:
+            self.fit()
+        similarities = self.centroids @ self._normalize(self.encode([query]))[0]
+        order = np.argsort(-similarities)
+        margin = float(similarities[order[0]] - similarities[order[1]]) if len(order) > 1 else 1.0
+        label = self.labels[order[0]] if margin >= self.min_margin else None
+        return label, margin
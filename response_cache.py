@@ -0,0 +1,140 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Any, Optional
+
+import numpy as np
+
+class SemanticResponseCache:
+    """Persistent answer cache looked up by query-embedding similarity.
+
+    Entries expire after ttl_seconds, the least recently used entries are
+    evicted beyond max_entries, and an entry is stale once the FAQ index
+    version of its category differs from the one it was answered against.
+    """
+
+    def __init__(self, encode: Callable, index_versions: Callable[[], Dict[str, str]],
+                 cache_path: str = "response_cache.db", similarity_threshold: float = 0.92,
+                 ttl_seconds: float = 24 * 3600, max_entries: int = 5000):
+        self.encode = encode
+        self.index_versions = index_versions
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(str(Path(cache_path)), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "id INTEGER PRIMARY KEY, query TEXT NOT NULL, embedding BLOB NOT NULL, "
+            "category TEXT, index_version TEXT, payload TEXT NOT NULL, "
+            "created REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+        # Keep every embedding in one normalized matrix for a single matmul lookup
+        rows = self._conn.execute("SELECT id, embedding FROM responses ORDER BY id").fetchall()
+        self._ids = [row_id for row_id, _ in rows]
+        self._matrix = (np.vstack([np.frombuffer(blob, dtype='float32') for _, blob in rows])
+                        if rows else None)
+
+    @staticmethod
+    def _normalize(vector: np.ndarray) -> np.ndarray:
+        return (vector / np.linalg.norm(vector)).astype('float32')
+
+    def lookup(self, query: str) -> Optional[Dict[str, Any]]:
+        """Return the cached payload of the most similar fresh entry, if any."""
+        embedding = self._normalize(self.encode([query])[0])
+        # May load the index or call the retrieval server, so never under the lock
+        index_versions = self.index_versions()
+        with self._lock:
+            if self._matrix is None:
+                self.misses += 1
+                return None
+
+            ids = list(self._ids)
+            similarities = self._matrix @ embedding
+            stale = []
+            result = None
+            for position in np.argsort(-similarities):
+                if similarities[position] < self.similarity_threshold:
+                    break
+                row_id = ids[position]
+                row = self._conn.execute(
+                    "SELECT category, index_version, payload, created FROM responses WHERE id = ?", (row_id,)
+                ).fetchone()
+                if row is None:
+                    # Deleted by another process sharing the cache file
+                    stale.append(row_id)
+                    continue
+                category, index_version, payload, created = row
+                if time.time() - created > self.ttl_seconds or (
+                        category is not None and index_versions.get(category) != index_version):
+                    stale.append(row_id)
+                    continue
+                self._conn.execute("UPDATE responses SET last_used = ? WHERE id = ?", (time.time(), row_id))
+                result = {**json.loads(payload), "cache_similarity": float(similarities[position])}
+                break
+
+            self._delete(stale)
+            self._conn.commit()
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return result
+
+    def store(self, query: str, category: Optional[str], payload: Dict[str, Any]):
+        """Cache an answer, recording the FAQ index version of its category."""
+        embedding = self._normalize(self.encode([query])[0])
+        index_version = self.index_versions().get(category) if category is not None else None
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO responses (query, embedding, category, index_version, payload, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (query, embedding.tobytes(), category, index_version, json.dumps(payload), now, now)
+            )
+            self._ids.append(cursor.lastrowid)
+            self._matrix = embedding[None, :] if self._matrix is None else np.vstack([self._matrix, embedding])
+
+            if len(self._ids) > self.max_entries:
+                excess = len(self._ids) - self.max_entries
+                oldest = [row_id for (row_id,) in self._conn.execute(
+                    "SELECT id FROM responses ORDER BY last_used LIMIT ?", (excess,)
+                ).fetchall()]
+                self._delete(oldest)
+            self._conn.commit()
+
+    def invalidate_category(self, category: str):
+        """Drop every cached answer for a category."""
+        with self._lock:
+            stale = [row_id for (row_id,) in self._conn.execute(
+                "SELECT id FROM responses WHERE category = ?", (category,)
+            ).fetchall()]
+            self._delete(stale)
+            self._conn.commit()
+
+    def _delete(self, row_ids):
+        if not row_ids:
+            return
+        self._conn.executemany("DELETE FROM responses WHERE id = ?", [(row_id,) for row_id in row_ids])
+        removed = set(row_ids)
+        keep = [position for position, row_id in enumerate(self._ids) if row_id not in removed]
+        self._ids = [self._ids[position] for position in keep]
+        self._matrix = self._matrix[keep] if keep else None
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._ids),
+        }
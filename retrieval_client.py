@@ -0,0 +1,65 @@
+import json
+import socket
+import http.client
+from urllib.parse import urlparse
+from typing import Any, Dict, List
+
+import numpy as np
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP over a Unix domain socket."""
+
+    def __init__(self, path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+class RetrievalClient:
+    """Client for retrieval_server.py, mirroring the VectorStore calls workers need.
+
+    url is http://host:port or unix:///path/to/socket.
+    """
+
+    def __init__(self, url: str, timeout: float = 30.0):
+        self.url = url
+        self.timeout = timeout
+        parsed = urlparse(url)
+        if parsed.scheme == "unix":
+            self._connect = lambda: _UnixHTTPConnection(parsed.path, timeout)
+        elif parsed.scheme == "http":
+            self._connect = lambda: http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=timeout)
+        else:
+            raise ValueError(f"Unsupported retrieval server URL '{url}' - use http://host:port or unix:///path")
+
+    def _request(self, method: str, path: str, payload: Dict[str, Any] | None = None) -> Dict[str, Any]:
+        connection = self._connect()
+        try:
+            body = json.dumps(payload).encode("utf-8") if payload is not None else None
+            connection.request(method, path, body=body, headers={"Content-Type": "application/json"})
+            response = connection.getresponse()
+            data = json.loads(response.read() or b"{}")
+        except (OSError, http.client.HTTPException) as e:
+            raise RuntimeError(f"Retrieval server at {self.url} unavailable: {e}") from e
+        finally:
+            connection.close()
+        if response.status != 200:
+            raise RuntimeError(f"Retrieval server error: {data.get('error', response.status)}")
+        return data
+
+    def search_batch(self, queries: List[str], categories: List[str | None] | str | None = None,
+                     top_k: int = 3) -> List[List[Dict[str, Any]]]:
+        """Same contract as VectorStore.search_batch."""
+        return self._request("POST", "/search", {"queries": queries, "categories": categories, "top_k": top_k})["results"]
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Same contract as VectorStore.encode."""
+        vectors = self._request("POST", "/encode", {"texts": texts})["vectors"]
+        return np.array(vectors, dtype='float32').reshape(len(texts), -1)
+
+    def info(self) -> Dict[str, Any]:
+        """Loaded version, chunk count, category versions and batching stats."""
+        return self._request("GET", "/health")
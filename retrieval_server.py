@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Local Retrieval Server
+
+This script serves the vector store to other processes by:
+1. Loading the embedding model and vector database once
+2. Listening on a Unix socket or HTTP port
+3. Micro-batching: searches arriving within a few milliseconds of each other
+   are encoded and searched together in one search_batch call
+4. Hot-swapping to newly published database versions as they appear
+
+Point app workers at it with RETRIEVAL_SERVER_URL (unix:///path or
+http://host:port); vector_search_impl and the response cache then call the
+server instead of loading their own model and index.
+
+Usage: python retrieval_server.py [--socket /tmp/retrieval.sock | --port 8765]
+       [--max-batch-size 64] [--max-wait-ms 5]
+"""
+
+import sys
+import json
+import time
+import queue
+import argparse
+import threading
+import socketserver
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.append(str(Path(__file__).parent))
+
+from vector_store import vector_store, initialize_vector_store, _ensure_vector_store
+
+class MicroBatcher:
+    """Coalesces concurrent search requests into shared search_batch calls.
+
+    A single worker thread waits up to max_wait seconds after the first
+    queued request for more to arrive, up to max_batch_size queries, then
+    runs one search per distinct top_k and hands each caller its slice.
+    """
+
+    def __init__(self, search_batch: Callable[..., List[List[Dict[str, Any]]]],
+                 max_batch_size: int = 64, max_wait: float = 0.005):
+        self.search_batch = search_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batches = 0
+        self.queries = 0
+        self._queue: queue.Queue = queue.Queue()
+        threading.Thread(target=self._run, name="retrieval-micro-batcher", daemon=True).start()
+
+    def search(self, queries: List[str], categories: List[str | None], top_k: int) -> List[List[Dict[str, Any]]]:
+        """Queue a search and wait for its results."""
+        future = Future()
+        self._queue.put((queries, categories, top_k, future))
+        return future.result()
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        size = len(batch[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            by_top_k: Dict[int, list] = {}
+            for item in batch:
+                by_top_k.setdefault(item[2], []).append(item)
+
+            for top_k, items in by_top_k.items():
+                queries = [query for item in items for query in item[0]]
+                categories = [category for item in items for category in item[1]]
+                try:
+                    results = self.search_batch(queries, categories, top_k)
+                except Exception as e:
+                    for item in items:
+                        item[3].set_exception(e)
+                    continue
+                self.batches += 1
+                self.queries += len(queries)
+                position = 0
+                for item in items:
+                    item[3].set_result(results[position:position + len(item[0])])
+                    position += len(item[0])
+
+def _search_loaded_store(queries: List[str], categories: List[str | None], top_k: int):
+    if not _ensure_vector_store():
+        raise RuntimeError("Vector database not available. Please run 'python initialize_db.py' to set up the database.")
+    return vector_store.search_batch(queries, categories, top_k)
+
+class RetrievalHandler(BaseHTTPRequestHandler):
+    """POST /search, POST /encode and GET /health, all JSON."""
+
+    batcher: MicroBatcher = None
+
+    def do_GET(self):
+        if self.path != "/health":
+            self._reply(404, {"error": f"Unknown path {self.path}"})
+            return
+        self._reply(200, {
+            "version": vector_store.version,
+            "chunks": len(vector_store.chunks),
+            "category_versions": vector_store.category_versions,
+            "batches": self.batcher.batches,
+            "queries": self.batcher.queries,
+        })
+
+    def do_POST(self):
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            if self.path == "/search":
+                queries = request["queries"]
+                categories = request.get("categories")
+                if categories is None or isinstance(categories, str):
+                    categories = [categories] * len(queries)
+                if len(categories) != len(queries):
+                    raise ValueError("categories must have one entry per query")
+                results = self.batcher.search(queries, categories, int(request.get("top_k", 3)))
+                self._reply(200, {"results": results})
+            elif self.path == "/encode":
+                self._reply(200, {"vectors": vector_store.encode(request["texts"]).tolist()})
+            else:
+                self._reply(404, {"error": f"Unknown path {self.path}"})
+        except Exception as e:
+            self._reply(500, {"error": f"{type(e).__name__}: {e}"})
+
+    def _reply(self, status: int, body: Dict[str, Any]):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        # Unix socket peers have no address, and per-request logs are noise
+        pass
+
+class UnixRetrievalServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+def create_server(socket_path: str | None = None, host: str = "127.0.0.1", port: int = 8765,
+                  max_batch_size: int = 64, max_wait: float = 0.005):
+    """Build (but do not start) a retrieval server over a Unix socket or HTTP."""
+    handler = type("BoundRetrievalHandler", (RetrievalHandler,), {
+        "batcher": MicroBatcher(_search_loaded_store, max_batch_size, max_wait),
+    })
+    if socket_path:
+        # A socket file left behind by a previous run would block bind()
+        Path(socket_path).unlink(missing_ok=True)
+        return UnixRetrievalServer(socket_path, handler)
+    return ThreadingHTTPServer((host, port), handler)
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve vector search to app workers with micro-batching")
+    parser.add_argument("--socket", help="Unix socket path (default: HTTP on --host/--port)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-batch-size", type=int, default=64, help="Most queries searched together")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="How long to wait for a batch to fill")
+    args = parser.parse_args()
+
+    initialize_vector_store()
+    vector_store.warm_up()
+
+    server = create_server(args.socket, args.host, args.port, args.max_batch_size, args.max_wait_ms / 1000)
+    url = f"unix://{args.socket}" if args.socket else f"http://{args.host}:{args.port}"
+    print(f"🔍 Retrieval server ready - set RETRIEVAL_SERVER_URL={url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.socket:
+            Path(args.socket).unlink(missing_ok=True)
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -1,8 +1,10 @@
 import streamlit as st
 import os
 import re
-from agents import workflow, AgentState
-from vector_store import initialize_vector_store
+from agents import (stream_workflow, warm_up, get_conversation_workflow, conversation_config,
+                    new_session_id, turn_input)
+from tracing import latency_breakdown
+from vector_store import initialize_vector_store, get_retrieval_client
 import plotly.express as px
 import plotly.graph_objects as go
 from dotenv import load_dotenv
@@ -12,8 +14,12 @@ load_dotenv()
 @st.cache_resource
 def initialize_app():
     try:
-        with st.spinner("Initializing vector database..."):
-            initialize_vector_store(force_rebuild=False)
+        # Workers using the shared retrieval server never load the index themselves
+        if get_retrieval_client() is None:
+            with st.spinner("Initializing vector database..."):
+                initialize_vector_store(force_rebuild=False)
+        with st.spinner("Loading models..."):
+            warm_up()
         st.session_state.show_db_success = True
         st.session_state.db_initialized = True
     except Exception as e:
@@ -42,6 +48,15 @@ st.markdown("Ask questions about IT or Finance topics. The system will route you
 if not db_ready:
     st.stop()
 
+show_latency = st.sidebar.checkbox("Show latency breakdown",
+                                   value=os.getenv("SHOW_LATENCY_BREAKDOWN", "false").lower() == "true")
+
+# Each browser session is one conversation, remembered in CONVERSATION_DB_PATH
+new_conversation = st.sidebar.button("New conversation")
+if new_conversation or "session_id" not in st.session_state:
+    st.session_state.session_id = new_session_id()
+    st.session_state.messages = []
+
 # Show temporary success message
 if st.session_state.get("show_db_success", False):
     st.success("Vector database ready!", icon="✅")
@@ -60,40 +75,48 @@ if prompt := st.chat_input("What would you like to know?"):
         st.markdown(prompt)
 
     with st.chat_message("assistant"):
-        with st.spinner("Processing your query..."):
-            try:
-                initial_state: AgentState = {
-                    "messages": [],
-                    "query": prompt,
-                    "classification": None,
-                    "response": None,
-                    "agent_used": None,
-                    "tool_results": None,
-                    "graph_data": None,
-                    "final_answer": None,
-                    "used_web_search": None
-                }
-
-                result = workflow.invoke(initial_state)
-
-                final_answer = result.get("final_answer", "No response generated")
-                graph_data = result.get("graph_data")
-
-                st.markdown(sanitize_markdown(final_answer))
-
-                if graph_data and "Graph generated successfully" in str(graph_data):
-                    try:
-                        with open("temp_graph.html", "r") as f:
-                            graph_html = f.read()
-                        st.components.html(graph_html, height=400)
-                    except:
-                        st.info("Graph visualization available")
-
-                st.session_state.messages.append({"role": "assistant", "content": final_answer})
-
-            except Exception as e:
-                import traceback
-                error_message = f"Error processing query: {str(e)}"
-                st.error(error_message)
-                st.error(f"Full traceback: {traceback.format_exc()}")
-                st.session_state.messages.append({"role": "assistant", "content": error_message})
\ No newline at end of file
+        header = st.empty()
+        header.caption("Processing your query...")
+        try:
+            result = {}
+
+            def answer_tokens():
+                # Show the route as soon as it is decided, then the answer as it is generated
+                for event in stream_workflow(turn_input(prompt), get_conversation_workflow(),
+                                             conversation_config(st.session_state.session_id)):
+                    if event["type"] == "header":
+                        header.markdown(sanitize_markdown(event["text"]))
+                    elif event["type"] == "token":
+                        yield event["text"]
+                    else:
+                        result.update(event["state"])
+
+            streamed = st.write_stream(answer_tokens())
+
+            final_answer = result.get("final_answer") or "No response generated"
+            graph_data = result.get("graph_data")
+
+            # Cached and tool answers arrive whole rather than token by token
+            if not streamed:
+                header.markdown(sanitize_markdown(final_answer))
+
+            if graph_data and "Graph generated successfully" in str(graph_data):
+                try:
+                    with open("temp_graph.html", "r") as f:
+                        graph_html = f.read()
+                    st.components.html(graph_html, height=400)
+                except:
+                    st.info("Graph visualization available")
+
+            if show_latency and result.get("metrics"):
+                with st.expander("Latency breakdown"):
+                    st.dataframe(latency_breakdown(result["metrics"]), hide_index=True)
+
+            st.session_state.messages.append({"role": "assistant", "content": final_answer})
+
+        except Exception as e:
+            import traceback
+            error_message = f"Error processing query: {str(e)}"
+            st.error(error_message)
+            st.error(f"Full traceback: {traceback.format_exc()}")
+            st.session_state.messages.append({"role": "assistant", "content": error_message})
\ No newline at end of file
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test that the batch runner resumes a killed run from its output file,
+including one killed in the middle of writing a line. The workflow is a
+stub, so no LLM or vector database is needed.
+"""
+
+import sys
+import json
+import asyncio
+import tempfile
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+import batch_runner
+from batch_runner import BatchRunner, completed_ids
+
+class Killed(BaseException):
+    """Stands in for the process being killed mid-run."""
+
+class StubWorkflow:
+    """Answers each query, failing those in fail and dying on batch call kill_at."""
+
+    def __init__(self, fail=(), kill_at=None):
+        self.fail = set(fail)
+        self.kill_at = kill_at
+        self.calls = 0
+        self.queries = []
+
+    def _result(self, state):
+        if state["query"] in self.fail:
+            return RuntimeError("Bedrock unavailable")
+        return {"classification": "IT", "agent_used": "it", "final_answer": f"Answer to {state['query']}",
+                "metrics": {"nodes": [{"node": "it", "seconds": 0.01}]}}
+
+    def batch(self, inputs, config=None, return_exceptions=False):
+        self.calls += 1
+        if self.calls == self.kill_at:
+            raise Killed()
+        self.queries += [state["query"] for state in inputs]
+        return [self._result(state) for state in inputs]
+
+    async def abatch(self, inputs, config=None, return_exceptions=False):
+        return self.batch(inputs, config, return_exceptions)
+
+def _records(path: Path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+def test_resume_after_kill():
+    """Results survive a kill; the resumed run does only the unfinished and failed queries."""
+    print("🧪 Testing batch runner resume...")
+    print("=" * 40)
+
+    queries = [{"id": str(i), "query": f"Question {i}?"} for i in range(1, 8)]
+    prefetch = batch_runner.prefetch_internal_searches
+    batch_runner.prefetch_internal_searches = lambda queries: None
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            output = Path(tmp) / "results.jsonl"
+
+            print("\n1. Killing the run during its third chunk...")
+            first = StubWorkflow(fail={"Question 2?"}, kill_at=3)
+            try:
+                BatchRunner(first, chunk_size=2).run(queries, str(output))
+                assert False, "The stub should kill the run"
+            except Killed:
+                pass
+            records = _records(output)
+            assert [r["id"] for r in records] == ["1", "2", "3", "4"], "Finished chunks must be on disk"
+            assert "error" in records[1] and records[0]["final_answer"] == "Answer to Question 1?"
+
+            print("\n2. Simulating a kill in the middle of writing a line...")
+            with open(output, "a", encoding="utf-8") as f:
+                f.write('{"id": "5", "query": "Question 5?", "final_ans')
+            assert completed_ids(str(output)) == {"1", "3", "4"}
+            assert output.read_text(encoding="utf-8").endswith("}\n"), "The partial line should be cut off"
+
+            print("\n3. Resuming...")
+            second = StubWorkflow()
+            summary = BatchRunner(second, chunk_size=2).run(queries, str(output))
+            assert second.queries == ["Question 2?", "Question 5?", "Question 6?", "Question 7?"]
+            assert summary["queries"] == 4 and summary["failures"] == 0
+            records = _records(output)
+            successes = [r["id"] for r in records if "error" not in r]
+            assert sorted(successes, key=int) == [q["id"] for q in queries], "Each id should succeed exactly once"
+            assert completed_ids(str(output)) == {q["id"] for q in queries}
+
+            print("\n4. Resuming a finished run asynchronously does nothing...")
+            third = StubWorkflow()
+            summary = asyncio.run(BatchRunner(third, chunk_size=2).arun(queries, str(output)))
+            assert third.queries == [] and summary["queries"] == 0
+            assert len(_records(output)) == len(records)
+    finally:
+        batch_runner.prefetch_internal_searches = prefetch
+
+    print("\n✅ All tests passed!")
+
+if __name__ == "__main__":
+    try:
+        test_resume_after_kill()
+    except Exception:
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test the memory-mapped columnar chunk store: round trips, removed slots and
+atomic rewrites.
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from chunk_store import write_chunk_store, read_chunk_store, chunk_store_exists, write_atomically
+
+CHUNKS = [
+    "Q: How do I set up VPN?\nA: Download the VPN client.",
+    None,
+    "Q: Où est le café ☕?\nA: Au deuxième étage.",
+    "",
+    "Q: When is payroll processed?\nA: On the last business day.",
+]
+CATEGORIES = ["IT", None, "Facilities", "IT", "Finance"]
+
+def test_chunk_store_round_trip():
+    """Chunks and categories read back exactly, including removed and non-ASCII chunks."""
+    print("🧪 Testing chunk store...")
+    print("=" * 40)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        assert not chunk_store_exists(directory)
+        write_chunk_store(directory, CHUNKS, CATEGORIES)
+        assert chunk_store_exists(directory)
+        assert not list(directory.glob("*.tmp")), "Temporary files should be renamed into place"
+
+        chunks, categories = read_chunk_store(directory)
+        assert len(chunks) == len(categories) == len(CHUNKS)
+        assert list(chunks) == CHUNKS
+        assert list(categories) == CATEGORIES
+        assert chunks[-1] == CHUNKS[-1] and categories[-1] == "Finance"
+        assert chunks[1:3] == CHUNKS[1:3]
+        try:
+            chunks[len(CHUNKS)]
+            assert False, "Reading past the end should raise IndexError"
+        except IndexError:
+            pass
+
+        print("\n1. Rewriting while the old store is mapped...")
+        write_chunk_store(directory, ["Q: New?\nA: Yes."], ["IT"])
+        assert list(chunks) == CHUNKS, "Open readers keep the version they mapped"
+        new_chunks, new_categories = read_chunk_store(directory)
+        assert list(new_chunks) == ["Q: New?\nA: Yes."] and list(new_categories) == ["IT"]
+
+        print("\n2. Writing an empty store...")
+        write_chunk_store(directory, [], [])
+        empty_chunks, empty_categories = read_chunk_store(directory)
+        assert len(empty_chunks) == len(empty_categories) == 0
+
+        print("\n3. Replacing a file atomically...")
+        target = directory / "CURRENT"
+        write_atomically(target, lambda f: f.write(b"v1"))
+        write_atomically(target, lambda f: f.write(b"v2"))
+        assert target.read_bytes() == b"v2"
+        assert not target.with_name("CURRENT.tmp").exists()
+
+    print("\n✅ All tests passed!")
+
+if __name__ == "__main__":
+    try:
+        test_chunk_store_round_trip()
+    except Exception:
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
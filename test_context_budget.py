@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test token-budgeted context assembly for internal and web search results.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from context_budget import (assemble_context, count_tokens, truncate_tokens,
+                            internal_passages, web_passages, Passage)
+
+INTERNAL = (
+    "Q: How do I set up VPN?\n"
+    "A: Download the VPN client from the company portal. Sign in with your network account. "
+    "Contact the help desk if the connection fails.\n\n"
+    "Q: How do I connect to the printer?\n"
+    "A: Add the office printer from the settings page. Sign in with your network account."
+)
+
+WEB = (
+    "[1] Ransomware trends\n"
+    "Ransomware attacks rose sharply this year. Phishing remains the main entry point.\n"
+    "URL: https://example.com/ransomware\n\n"
+    "[2] Office coffee guide\n"
+    "The best coffee beans come from small farms. Grinding just before brewing keeps flavour.\n"
+    "URL: https://example.com/coffee"
+)
+
+def test_context_budget():
+    """Deduplication, the budget cap, ordering and kept headers/footers."""
+    print("🧪 Testing context budgets...")
+    print("=" * 40)
+
+    print("\n1. Budget 0 disables the cap but still deduplicates...")
+    passages = internal_passages(INTERNAL)
+    assert [p.header for p in passages] == ["Q: How do I set up VPN?", "Q: How do I connect to the printer?"]
+    context, tokens = assemble_context("How do I set up VPN?", passages, 0)
+    assert context.count("Sign in with your network account.") == 1, "Repeated sentences should be dropped"
+    assert "Contact the help desk" in context and "Add the office printer" in context
+    assert tokens["tokens_after"] < tokens["tokens_before"]
+    assert tokens["tokens_before"] == count_tokens("\n\n".join(f"{p.header}\n{p.body}" for p in passages))
+
+    print("\n2. Keeping everything when it fits...")
+    unique = [Passage("Q: How do I set up VPN?", "A: Download the VPN client.", "")]
+    context, tokens = assemble_context("How do I set up VPN?", unique, 1000)
+    assert context == "Q: How do I set up VPN?\nA: Download the VPN client."
+    assert tokens["tokens_before"] == tokens["tokens_after"]
+
+    print("\n3. Trimming to the budget by relevance, in original order...")
+    context, tokens = assemble_context("Which ransomware phishing attacks?", web_passages(WEB), 40)
+    print(f"Tokens: {tokens}\n{context}")
+    assert tokens["tokens_after"] <= 40 < tokens["tokens_before"]
+    assert "Ransomware attacks rose" in context and "Phishing remains" in context
+    assert context.index("Ransomware attacks rose") < context.index("Phishing remains")
+    assert "coffee beans" not in context
+
+    print("\n4. Keeping web headers and footers with their content...")
+    assert context.startswith("[1] Ransomware trends\n")
+    assert context.endswith("URL: https://example.com/ransomware")
+    context, _ = assemble_context("coffee ransomware", web_passages(WEB), 1000)
+    assert context.index("[1] Ransomware trends") < context.index("[2] Office coffee guide"), \
+        "Passages keep their original order"
+    assert "URL: https://example.com/coffee" in context
+
+    print("\n5. Keeping the best sentence even when it alone is over budget...")
+    long_sentence = "The VPN client " + " ".join(f"step{i}" for i in range(50)) + "."
+    passages = [Passage("", "Unrelated filler text here.", ""), Passage("", long_sentence, "")]
+    context, tokens = assemble_context("VPN client", passages, 5)
+    assert context == long_sentence and tokens["tokens_after"] > 5
+
+    print("\n6. Truncating text to whole tokens...")
+    assert truncate_tokens("short text", 10) == "short text"
+    truncated = truncate_tokens(long_sentence, 10)
+    assert truncated.endswith(" ...") and count_tokens(truncated[:-4]) <= 10
+
+    print("\n✅ All tests passed!")
+
+if __name__ == "__main__":
+    try:
+        test_context_budget()
+    except Exception:
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Parity test for the ONNX int8 embedding backend against the PyTorch model.
+"""
+
+import sys
+from pathlib import Path
+
+import faiss
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent))
+
+from vector_store import VectorStore
+from example_queries import load_example_queries
+
+MIN_MEAN_COSINE = 0.98
+MIN_TOP_K_OVERLAP = 0.9
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def test_embedding_backend_parity(backend: str = "onnx_int8", top_k: int = 3):
+    """Compare chunk embeddings and top-k search results between backends."""
+    # The ONNX backends need the optional extra: pip install "sentence-transformers[onnx]"
+    pytest.importorskip("optimum", reason="the ONNX embedding backends need sentence-transformers[onnx]")
+    print(f"🧪 Testing {backend} embedding backend parity...")
+    print("=" * 40)
+
+    reference = VectorStore(embedding_cache_path=None, embedding_backend="torch")
+    candidate = VectorStore(embedding_cache_path=None, embedding_backend=backend)
+
+    chunks, _ = reference.read_documents()
+    queries = [q["query"] for q in load_example_queries()]
+
+    print("\n1. Comparing chunk embeddings...")
+    ref_chunks = reference.encode(chunks)
+    cand_chunks = candidate.encode(chunks)
+    cosines = np.sum(normalize(ref_chunks) * normalize(cand_chunks), axis=1)
+    print(f"Cosine agreement: mean {cosines.mean():.4f}, min {cosines.min():.4f}")
+    assert cosines.mean() >= MIN_MEAN_COSINE, f"Mean cosine {cosines.mean():.4f} below {MIN_MEAN_COSINE}"
+
+    print("\n2. Comparing top-k search results...")
+    ref_index = faiss.IndexFlatL2(ref_chunks.shape[1])
+    ref_index.add(ref_chunks)
+    cand_index = faiss.IndexFlatL2(cand_chunks.shape[1])
+    cand_index.add(cand_chunks)
+    _, ref_ids = ref_index.search(reference.encode(queries), top_k)
+    _, cand_ids = cand_index.search(candidate.encode(queries), top_k)
+    overlap = np.mean([len(set(r) & set(c)) / top_k for r, c in zip(ref_ids, cand_ids)])
+    print(f"Top-{top_k} overlap over {len(queries)} queries: {overlap:.3f}")
+    assert overlap >= MIN_TOP_K_OVERLAP, f"Top-{top_k} overlap {overlap:.3f} below {MIN_TOP_K_OVERLAP}"
+
+    print("\n✅ All tests passed!")
+
+if __name__ == "__main__":
+    try:
+        test_embedding_backend_parity(*sys.argv[1:2])
+    except pytest.skip.Exception as e:
+        print(f"Skipped: {e.msg}")
+    except Exception:
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
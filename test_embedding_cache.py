@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test the SQLite embedding cache: LRU eviction order, the size cap, the
+running size count and hit-rate reporting, with tiny stub vectors.
+"""
+
+import sys
+import sqlite3
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent))
+
+from embedding_cache import EmbeddingCache
+from vector_store import VectorStore
+from fake_embedder import FakeEmbedder
+
+MODEL = "stub-model"
+VECTOR_BYTES = 4 * 4  # four float32s
+
+def _vectors(*values: float) -> np.ndarray:
+    return np.array([[value] * 4 for value in values], dtype='float32')
+
+def _table_bytes(path: Path) -> int:
+    with sqlite3.connect(str(path)) as conn:
+        return conn.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()[0]
+
+def test_embedding_cache():
+    """Least recently used entries go first and the cache never exceeds max_bytes."""
+    print("🧪 Testing embedding cache...")
+    print("=" * 40)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "embedding_cache.db"
+        cache = EmbeddingCache(str(path), max_bytes=3 * VECTOR_BYTES)
+
+        print("\n1. Filling the cache and reporting hits...")
+        cache.put_many(MODEL, ["a", "b", "c"], _vectors(1, 2, 3))
+        found = cache.get_many(MODEL, ["a", "z"])
+        assert list(found) == [cache.text_hash("a")] and found[cache.text_hash("a")][0] == 1.0
+        stats = cache.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1 and stats["hit_rate"] == 0.5
+        assert stats["size_bytes"] == 3 * VECTOR_BYTES == _table_bytes(path)
+
+        print("\n2. Evicting the least recently used entry...")
+        cache.put_many(MODEL, ["d"], _vectors(4))
+        remaining = cache.get_many(MODEL, ["a", "b", "c", "d"])
+        assert cache.text_hash("b") not in remaining, "b was used least recently and should be evicted"
+        assert len(remaining) == 3
+        assert cache.stats()["size_bytes"] == 3 * VECTOR_BYTES == _table_bytes(path)
+
+        print("\n3. Counting replaced and repeated texts once...")
+        cache.put_many(MODEL, ["d", "d"], _vectors(5, 6))
+        assert cache.get_many(MODEL, ["d"])[cache.text_hash("d")][0] == 6.0
+        assert cache.stats()["size_bytes"] == 3 * VECTOR_BYTES == _table_bytes(path)
+
+        print("\n4. Keeping several evictions within the cap...")
+        cache.put_many(MODEL, ["e", "f", "g", "h"], _vectors(7, 8, 9, 10))
+        assert cache.stats()["size_bytes"] == 3 * VECTOR_BYTES == _table_bytes(path)
+        assert set(cache.get_many(MODEL, ["e", "f", "g", "h"])) == {cache.text_hash(t) for t in "fgh"}
+
+        print("\n5. Picking up writes from another process sharing the file...")
+        cache.size_sync_writes = 1
+        cache.max_bytes = 10 * VECTOR_BYTES
+        other = EmbeddingCache(str(path), max_bytes=10 * VECTOR_BYTES)
+        other.put_many(MODEL, ["i", "j"], _vectors(11, 12))
+        cache.put_many(MODEL, ["k"], _vectors(13))
+        assert cache.stats()["size_bytes"] == 6 * VECTOR_BYTES == _table_bytes(path)
+
+        print("\n6. Clearing...")
+        cache.clear()
+        assert cache.stats()["size_bytes"] == 0 == _table_bytes(path)
+
+        print("\n7. Opening the store's cache only on first encode...")
+        store_cache = Path(tmp) / "store_cache.db"
+        store = VectorStore(persist_directory=str(Path(tmp) / "vector_db"),
+                            embedding_cache_path=str(store_cache), refresh_interval=0)
+        assert not store_cache.exists(), "Creating a VectorStore must not open the cache"
+        store._model = FakeEmbedder()
+        store.encode(["How do I set up VPN?"])
+        assert store_cache.exists() and store.embedding_cache.stats()["misses"] == 1
+
+    print("\n✅ All tests passed!")
+
+if __name__ == "__main__":
+    try:
+        test_embedding_cache()
+    except Exception:
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Test the resilient LLM client layer against a stub chat model that throttles
+its first calls and tracks how many run at once, then end to end through a
+real boto3 bedrock-runtime client pointed at a local fake Bedrock endpoint.
+Neither AWS access nor langchain_community is needed.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Iterator, List, Optional
+from unittest import mock
+
+from botocore.exceptions import ClientError, ReadTimeoutError
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import ConfigDict
+
+sys.path.append(str(Path(__file__).parent))
+
+from llm_client import (ResilientChatModel, ConcurrencyLimiter, LLMCallStats,
+                        bedrock_client, bedrock_client_config, is_retryable)
+
+MODEL_ID = "anthropic.claude-3-sonnet-20240229-v1:0"
+
+_stub_lock = threading.Lock()
+
+class StubChatModel(BaseChatModel):
+    """Answers "IT" after latency seconds; the first `failures` calls raise error_code instead."""
+
+    latency: float = 0.05
+    failures: int = 0
+    error_code: str = "ThrottlingException"
+    requests: int = 0
+    in_flight: int = 0
+    max_in_flight: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub-chat"
+
+    def _call(self) -> str:
+        with _stub_lock:
+            self.requests += 1
+            failed = self.failures > 0
+            self.failures -= int(failed)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency)
+            if failed:
+                raise ClientError({"Error": {"Code": self.error_code, "Message": "Too many requests"}}, "InvokeModel")
+            return "IT"
+        finally:
+            with _stub_lock:
+                self.in_flight -= 1
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._call()))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        for token in self._call():
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+class FakeBedrock(BaseHTTPRequestHandler):
+    """Minimal InvokeModel endpoint returning Anthropic Messages API responses.
+
+    The first `errors` requests get (status, error type) error replies and
+    the first `slow` requests take slow_latency seconds instead of latency.
+    """
+
+    protocol_version = "HTTP/1.1"  # keep-alive, so pooled connections are reused
+    errors: List[tuple] = []
+    slow = 0
+    latency = 0.05
+    slow_latency = 0.0
+    requests = 0
+    in_flight = 0
+    max_in_flight = 0
+    connections: set = set()
+    lock = threading.Lock()
+
+    @classmethod
+    def reset(cls):
+        with cls.lock:
+            cls.errors, cls.slow, cls.requests, cls.max_in_flight = [], 0, 0, 0
+            cls.connections = set()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        cls = type(self)
+        with cls.lock:
+            cls.requests += 1
+            cls.connections.add(self.client_address)
+            error = cls.errors.pop(0) if cls.errors else None
+            slow = cls.slow > 0
+            cls.slow -= int(slow)
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        try:
+            time.sleep(cls.slow_latency if slow else cls.latency)
+            if error:
+                status, error_type = error
+                self._reply(status, {"message": "Too many requests, please wait before trying again."},
+                            {"x-amzn-ErrorType": error_type})
+            else:
+                self._reply(200, {
+                    "id": "msg_fake", "type": "message", "role": "assistant", "model": MODEL_ID,
+                    "content": [{"type": "text", "text": "IT"}],
+                    "stop_reason": "end_turn", "usage": {"input_tokens": 10, "output_tokens": 1},
+                })
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client timed out and hung up
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+    def _reply(self, status, body, headers=None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+class InvokeModelChat(BaseChatModel):
+    """Calls InvokeModel with the Anthropic Messages body, as BedrockChat does."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    client: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return "invoke-model-chat"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        body = json.dumps({
+            "anthropic_version": "bedrock-2023-05-31", "max_tokens": 16, "temperature": 0,
+            "messages": [{"role": "user", "content": str(m.content)} for m in messages],
+        })
+        response = json.loads(self.client.invoke_model(modelId=MODEL_ID, body=body)["body"].read())
+        usage = response["usage"]
+        message = AIMessage(content=response["content"][0]["text"], usage_metadata={
+            "input_tokens": usage["input_tokens"], "output_tokens": usage["output_tokens"],
+            "total_tokens": usage["input_tokens"] + usage["output_tokens"],
+        })
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+def _invoke_error(model: BaseChatModel) -> Exception:
+    try:
+        model.invoke("Classify: VPN setup")
+    except Exception as e:
+        return e
+    raise AssertionError("The call should fail")
+
+def _resilient(model: BaseChatModel, max_concurrency: int = 2) -> ResilientChatModel:
+    return ResilientChatModel(model=model, limiter=ConcurrencyLimiter(max_concurrency=max_concurrency),
+                              stats=LLMCallStats(), base_delay=0.01)
+
+def test_llm_client(calls: int = 8, max_concurrency: int = 2, throttled: int = 3):
+    """Check retries on throttling, the concurrency limit and per-node stats."""
+    print("🧪 Testing resilient LLM client...")
+    print("=" * 40)
+
+    print(f"\n1. Sending {calls} concurrent calls ({throttled} throttled)...")
+    stub = StubChatModel(failures=throttled)
+    llm = _resilient(stub, max_concurrency)
+    with ThreadPoolExecutor(max_workers=calls) as executor:
+        responses = list(executor.map(lambda _: llm.invoke("Classify: VPN setup"), range(calls)))
+    node_stats = llm.stats.snapshot()["unknown"]
+    print(f"Requests: {stub.requests}, max in flight: {stub.max_in_flight}, stats: {node_stats}")
+    assert all(str(r.content) == "IT" for r in responses), "Every call should succeed after retries"
+    assert node_stats["calls"] == calls and node_stats["failures"] == 0
+    assert node_stats["retries"] == throttled, f"Expected {throttled} retries, got {node_stats['retries']}"
+    assert stub.requests == calls + throttled
+    assert stub.max_in_flight <= max_concurrency, "Limiter let too many calls through"
+
+    print("\n2. Giving up after max_retries...")
+    stub.failures = 100
+    llm.max_retries = 2
+    try:
+        llm.invoke("Classify: VPN setup")
+        assert False, "Persistent throttling should raise"
+    except ClientError:
+        pass
+    assert llm.stats.snapshot()["unknown"]["failures"] == 1
+
+    print("\n3. Not retrying errors that are not transient...")
+    stub = StubChatModel(failures=1, error_code="ValidationException")
+    llm = _resilient(stub)
+    try:
+        llm.invoke("Classify: VPN setup")
+        assert False, "A validation error should raise"
+    except ClientError:
+        pass
+    assert stub.requests == 1 and llm.stats.snapshot()["unknown"]["retries"] == 0
+
+    print("\n4. Retrying a stream until its first chunk...")
+    stub = StubChatModel(failures=2)
+    llm = _resilient(stub)
+    assert "".join(str(chunk.content) for chunk in llm.stream("Classify: VPN setup")) == "IT"
+    assert stub.requests == 3 and llm.stats.snapshot()["unknown"]["retries"] == 2
+    assert llm.limiter._in_flight == 0, "Streams must release their limiter slot"
+
+    print("\n5. Retrying async calls...")
+    stub = StubChatModel(failures=1)
+    llm = _resilient(stub)
+
+    async def run_concurrently():
+        return await asyncio.gather(*[llm.ainvoke("Classify: VPN setup") for _ in range(4)])
+    responses = asyncio.run(run_concurrently())
+    assert all(str(r.content) == "IT" for r in responses)
+    assert stub.requests == 5 and stub.max_in_flight <= 2
+
+    print("\n✅ All tests passed!")
+
+def test_bedrock_endpoint(calls: int = 8, max_concurrency: int = 2, throttled: int = 3):
+    """Check the boto3 config, retries, timeouts and the limiter against a fake Bedrock endpoint."""
+    print("🧪 Testing resilient LLM client against a fake Bedrock endpoint...")
+    print("=" * 40)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeBedrock)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}"
+    env = {
+        "BEDROCK_ENDPOINT_URL": endpoint, "AWS_REGION": "us-east-1",
+        "AWS_ACCESS_KEY_ID": "test", "AWS_SECRET_ACCESS_KEY": "test",
+        "BEDROCK_MAX_POOL_CONNECTIONS": "3", "BEDROCK_CONNECT_TIMEOUT": "2", "BEDROCK_READ_TIMEOUT": "0.5",
+    }
+    try:
+        with mock.patch.dict(os.environ, env):
+            print("\n1. Building the client from the environment...")
+            config = bedrock_client_config()
+            assert config.max_pool_connections == 3
+            assert config.connect_timeout == 2.0 and config.read_timeout == 0.5
+            assert config.retries == {"total_max_attempts": 1}
+            client = bedrock_client()
+            assert client.meta.endpoint_url == endpoint and client.meta.region_name == "us-east-1"
+            assert client.meta.config.max_pool_connections == 3 and client.meta.config.read_timeout == 0.5
+
+        print("\n2. Classifying real botocore error responses...")
+        FakeBedrock.reset()
+        FakeBedrock.errors = [(429, "ThrottlingException"), (400, "ValidationException")]
+        chat = InvokeModelChat(client=client)
+        throttle, validation = _invoke_error(chat), _invoke_error(chat)
+        assert isinstance(throttle, ClientError) and throttle.response["Error"]["Code"] == "ThrottlingException"
+        assert throttle.response["ResponseMetadata"]["HTTPStatusCode"] == 429
+        assert is_retryable(throttle) and not is_retryable(validation)
+        assert FakeBedrock.requests == 2, "botocore must not retry on its own"
+
+        print(f"\n3. Sending {calls} concurrent calls ({throttled} throttled)...")
+        FakeBedrock.reset()
+        FakeBedrock.errors = [(429, "ThrottlingException")] * throttled
+        llm = _resilient(InvokeModelChat(client=client), max_concurrency)
+        with ThreadPoolExecutor(max_workers=calls) as executor:
+            responses = list(executor.map(lambda _: llm.invoke("Classify: VPN setup"), range(calls)))
+        node_stats = llm.stats.snapshot()["unknown"]
+        print(f"Requests: {FakeBedrock.requests}, max in flight: {FakeBedrock.max_in_flight}, "
+              f"connections: {len(FakeBedrock.connections)}, stats: {node_stats}")
+        assert all(str(r.content) == "IT" for r in responses), "Every call should succeed after retries"
+        assert node_stats["retries"] == throttled and node_stats["failures"] == 0
+        assert FakeBedrock.requests == calls + throttled
+        assert FakeBedrock.max_in_flight <= max_concurrency, "Limiter let too many calls through"
+        assert len(FakeBedrock.connections) <= 3, "Calls should reuse pooled connections"
+
+        print("\n4. Retrying a call that exceeds the read timeout...")
+        FakeBedrock.reset()
+        FakeBedrock.slow, FakeBedrock.slow_latency = 1, 1.5
+        timeout = _invoke_error(InvokeModelChat(client=client))
+        assert isinstance(timeout, ReadTimeoutError) and is_retryable(timeout)
+        FakeBedrock.slow = 1
+        llm = _resilient(InvokeModelChat(client=client))
+        started = time.perf_counter()
+        assert str(llm.invoke("Classify: VPN setup").content) == "IT"
+        assert llm.stats.snapshot()["unknown"]["retries"] == 1
+        assert time.perf_counter() - started < 1.5, "The slow attempt should be cut off at the read timeout"
+
+        print("\n5. Giving up after max_retries...")
+        FakeBedrock.reset()
+        FakeBedrock.errors = [(429, "ThrottlingException")] * 10
+        llm.max_retries = 2
+        error = _invoke_error(llm)
+        assert isinstance(error, ClientError) and FakeBedrock.requests == 3
+        assert llm.stats.snapshot()["unknown"]["failures"] == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    print("\n✅ All tests passed!")
+
+if __name__ == "__main__":
+    try:
+        test_llm_client()
+        test_bedrock_endpoint()
+    except Exception:
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test nearest-centroid routing against the labelled example queries, using
+a deterministic embedder so no model download is needed.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from query_router import CentroidRouter, CLASSIFICATION_LABELS
+from example_queries import load_example_queries
+from fake_embedder import FakeEmbedder
+
+MIN_CONFIDENT_ACCURACY = 0.95
+MIN_CONFIDENT_SHARE = 0.5
+
+def test_centroid_router():
+    """Confident routes should match the example labels; unsure ones defer to the LLM."""
+    print("🧪 Testing centroid router...")
+    print("=" * 40)
+
+    examples = load_example_queries()
+    labelled = [e for e in examples if e["category"]]
+    router = CentroidRouter(FakeEmbedder(256).encode).fit(examples)
+    assert router.labels == sorted(set(CLASSIFICATION_LABELS.values()))
+    assert router.centroids.shape[0] == len(router.labels)
+
+    print("\n1. Routing the example queries...")
+    routed = [(router.classify(e["query"])[0], CLASSIFICATION_LABELS[e["category"]]) for e in labelled]
+    confident = [(label, expected) for label, expected in routed if label is not None]
+    accuracy = sum(label == expected for label, expected in confident) / len(confident)
+    print(f"{len(confident)}/{len(labelled)} routed locally, {accuracy:.1%} correct")
+    assert accuracy >= MIN_CONFIDENT_ACCURACY, f"Confident routing accuracy {accuracy:.1%} too low"
+    assert len(confident) / len(labelled) >= MIN_CONFIDENT_SHARE, "Too few queries routed locally"
+
+    print("\n2. Deferring when the margin is too small...")
+    strict = CentroidRouter(router.encode, min_margin=1.0)
+    label, margin = strict.classify(labelled[0]["query"])
+    assert strict.centroids is not None, "classify should fit on first use"
+    assert label is None and 0.0 <= margin < 1.0
+
+    print("\n✅ All tests passed!")
+
+if __name__ == "__main__":
+    try:
+        test_centroid_router()
+    except Exception:
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
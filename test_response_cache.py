@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test the semantic response cache: hits, misses, TTL expiry, FAQ version
+invalidation and eviction, with a deterministic embedder.
+"""
+
+import sys
+import time
+import sqlite3
+import tempfile
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from response_cache import SemanticResponseCache
+from fake_embedder import FakeEmbedder
+
+def test_response_cache():
+    """Exercise every way a cached answer is served, skipped or dropped."""
+    print("🧪 Testing semantic response cache...")
+    print("=" * 40)
+
+    versions = {"IT": "v1", "Finance": "f1"}
+    version_calls = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        def index_versions():
+            assert not cache._lock.locked(), "Index versions must be fetched outside the cache lock"
+            version_calls.append(1)
+            return dict(versions)
+
+        cache = SemanticResponseCache(FakeEmbedder(256).encode, index_versions,
+                                      cache_path=str(Path(tmp) / "response_cache.db"),
+                                      similarity_threshold=0.9, ttl_seconds=60, max_entries=3)
+
+        print("\n1. Miss on an empty cache, then hit on the same and a reworded query...")
+        assert cache.lookup("How do I set up VPN?") is None
+        cache.store("How do I set up VPN?", "IT", {"response": "Use the VPN client."})
+        hit = cache.lookup("how do I set up VPN")
+        assert hit is not None and hit["response"] == "Use the VPN client."
+        assert hit["cache_similarity"] >= 0.9
+        assert cache.lookup("When is payroll processed?") is None, "Unrelated queries must miss"
+
+        print("\n2. Fetching index versions once per lookup...")
+        cache.store("How do I set up the VPN?", "IT", {"response": "Also the VPN client."})
+        version_calls.clear()
+        assert cache.lookup("How do I set up VPN?") is not None
+        assert len(version_calls) == 1
+
+        print("\n3. Dropping answers once their category's FAQ changes...")
+        versions["IT"] = "v2"
+        assert cache.lookup("How do I set up VPN?") is None
+        assert cache.stats()["entries"] == 0, "Stale entries should be deleted"
+
+        print("\n4. Expiring answers after the TTL...")
+        cache.store("When is payroll processed?", "Finance", {"response": "Monthly."})
+        cache.ttl_seconds = 0
+        time.sleep(0.01)
+        assert cache.lookup("When is payroll processed?") is None
+        cache.ttl_seconds = 60
+
+        print("\n5. Evicting the least recently used answers beyond max_entries...")
+        for query in ("Hello there", "How do I reset my password?", "What is the travel policy?", "How do I order a laptop?"):
+            cache.store(query, None, {"response": query})
+        assert cache.stats()["entries"] == 3
+        assert cache.lookup("Hello there") is None, "The oldest entry should be evicted"
+        assert cache.lookup("How do I order a laptop?")["response"] == "How do I order a laptop?"
+
+        print("\n6. Dropping entries another process deleted...")
+        cache.store("Where is the office cafeteria?", None, {"response": "Second floor."})
+        other = sqlite3.connect(str(Path(tmp) / "response_cache.db"))
+        other.execute("DELETE FROM responses WHERE query = ?", ("Where is the office cafeteria?",))
+        other.commit()
+        other.close()
+        entries = cache.stats()["entries"]
+        assert cache.lookup("Where is the office cafeteria?") is None
+        assert cache.stats()["entries"] == entries - 1, "The deleted row should leave the in-memory matrix"
+        assert cache.lookup("How do I order a laptop?") is not None
+
+        print("\n7. Reopening the cache from disk...")
+        reopened = SemanticResponseCache(FakeEmbedder(256).encode, lambda: dict(versions),
+                                         cache_path=str(Path(tmp) / "response_cache.db"),
+                                         similarity_threshold=0.9)
+        assert reopened.lookup("How do I order a laptop?") is not None
+        print(f"Stats: {cache.stats()}")
+
+    print("\n✅ All tests passed!")
+
+if __name__ == "__main__":
+    try:
+        test_response_cache()
+    except Exception:
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
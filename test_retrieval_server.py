@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test the retrieval server over a Unix socket: results must match local
+search_batch, and concurrent requests must be micro-batched.
+"""
+
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(str(Path(__file__).parent))
+
+from vector_store import vector_store, initialize_vector_store
+from retrieval_client import RetrievalClient
+from retrieval_server import create_server
+
+QUERIES = [
+    ("How do I set up VPN?", "IT"),
+    ("How do I file a reimbursement request?", "Finance"),
+    ("My computer is running slowly", "IT"),
+    ("When are expense reports due?", "Finance"),
+    ("password reset", None),
+]
+
+def test_retrieval_server(clients: int = 16):
+    """Check result parity, micro-batching and the encode/health endpoints."""
+    print("🧪 Testing retrieval server...")
+    print("=" * 40)
+
+    initialize_vector_store()
+    with tempfile.TemporaryDirectory() as tmp:
+        socket_path = str(Path(tmp) / "retrieval.sock")
+        server = create_server(socket_path, max_wait=0.02)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        client = RetrievalClient(f"unix://{socket_path}")
+        try:
+            print("\n1. Comparing server results with local search...")
+            for query, category in QUERIES:
+                expected = [r["text"] for r in vector_store.search_batch([query], category)[0]]
+                actual = [r["text"] for r in client.search_batch([query], category)[0]]
+                assert actual == expected, f"Server results differ for '{query}'"
+            print(f"{len(QUERIES)} queries match")
+
+            print(f"\n2. Sending {clients} concurrent searches...")
+            before = client.info()
+            with ThreadPoolExecutor(max_workers=clients) as executor:
+                results = list(executor.map(
+                    lambda i: client.search_batch([QUERIES[i % len(QUERIES)][0]], QUERIES[i % len(QUERIES)][1]),
+                    range(clients)
+                ))
+            after = client.info()
+            batches = after["batches"] - before["batches"]
+            print(f"{after['queries'] - before['queries']} queries served in {batches} batches")
+            assert all(r[0] for r in results), "Every search should return results"
+            assert batches < clients, "Concurrent searches should share batches"
+
+            print("\n3. Encoding through the server...")
+            vectors = client.encode(["VPN setup", "expense report"])
+            assert vectors.shape == (2, vector_store.encode(["VPN setup"]).shape[1])
+            assert after["category_versions"] == vector_store.category_versions
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    print("\n✅ All tests passed!")
+
+if __name__ == "__main__":
+    try:
+        test_retrieval_server()
+    except Exception:
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Test speculative web search in the IT agent: used on fallback, discarded
+when the internal result is relevant, skipped when the pool is busy, and
+never left running when the node fails. Search, relevance and the LLM are
+stubbed, so no Bedrock, Tavily or vector database is needed.
+"""
+
+import sys
+import time
+import asyncio
+import threading
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from langchain_core.messages import AIMessage
+
+import agents
+
+class StubWebSearch:
+    """Counts searches and records whether an async search was cancelled."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+        self.cancelled = False
+        self._lock = threading.Lock()
+
+    def invoke(self, query: str) -> str:
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        return f"web results for {query}"
+
+    async def ainvoke(self, query: str) -> str:
+        with self._lock:
+            self.calls += 1
+        try:
+            await asyncio.sleep(self.latency)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return f"web results for {query}"
+
+class StubChatModel:
+    """Answers with a fixed message after failing the first failures calls."""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+
+    def invoke(self, messages, config=None):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("Bedrock unavailable")
+        return AIMessage(content="answer")
+
+    async def ainvoke(self, messages, config=None):
+        return self.invoke(messages, config)
+
+def _install(relevant, web_search: StubWebSearch, llm: StubChatModel):
+    agents.SPECULATIVE_WEB_SEARCH = {"it"}
+    agents._speculation_stats.clear()
+    agents.web_search = web_search
+    agents._llm = llm
+    agents._search_internal = lambda query, category: ("Q: How do I set up VPN?\nA: Use the VPN client.", 0.5)
+    agents._check_relevance = lambda *args: relevant
+
+    async def acheck_relevance(*args):
+        if relevant is None:
+            await asyncio.sleep(10)
+        return relevant
+    agents._acheck_relevance = acheck_relevance
+
+STATE = {"query": "How do I set up VPN?", "messages": []}
+PATCHED = ("SPECULATIVE_WEB_SEARCH", "web_search", "_llm", "_search_internal", "_check_relevance", "_acheck_relevance")
+
+def test_speculative_web_search():
+    """Each speculation is counted once as used, discarded or skipped."""
+    print("🧪 Testing speculative web search...")
+    print("=" * 40)
+
+    originals = {name: getattr(agents, name) for name in PATCHED}
+    try:
+        _check_speculation()
+    finally:
+        for name, value in originals.items():
+            setattr(agents, name, value)
+        agents._speculation_stats.clear()
+    print("\n✅ All tests passed!")
+
+def _check_speculation():
+    print("\n1. Using the speculative search on fallback...")
+    search = StubWebSearch()
+    _install(False, search, StubChatModel())
+    result = agents.it_agent(STATE)
+    assert result["used_web_search"] and search.calls == 1
+    assert agents.speculation_stats() == {"IT": {"used": 1, "discarded": 0, "skipped": 0}}
+
+    print("\n2. Counting a reused speculation once when the answer call fails...")
+    search = StubWebSearch()
+    _install(False, search, StubChatModel(failures=1))
+    result = agents.it_agent(STATE)
+    assert result["used_web_search"] and search.calls == 1, "The fallback should reuse the speculative search"
+    assert agents.speculation_stats()["IT"]["used"] == 1
+
+    print("\n3. Discarding it when the internal result is relevant...")
+    _install(True, StubWebSearch(), StubChatModel())
+    result = agents.it_agent(STATE)
+    assert not result["used_web_search"]
+    assert agents.speculation_stats() == {"IT": {"used": 0, "discarded": 1, "skipped": 0}}
+
+    print("\n4. Skipping speculation while every worker is busy...")
+    search = StubWebSearch()
+    _install(False, search, StubChatModel())
+    for _ in range(agents.SPECULATION_WORKERS):
+        assert agents._speculation_slots.acquire(blocking=False)
+    try:
+        result = agents.it_agent(STATE)
+    finally:
+        for _ in range(agents.SPECULATION_WORKERS):
+            agents._speculation_slots.release()
+    assert result["used_web_search"] and search.calls == 1, "The fallback should search directly"
+    assert agents.speculation_stats() == {"IT": {"used": 0, "discarded": 0, "skipped": 1}}
+
+    print("\n5. Async: using the speculative task on fallback...")
+    search = StubWebSearch()
+    _install(False, search, StubChatModel())
+    result = asyncio.run(agents.ait_agent(STATE))
+    assert result["used_web_search"] and search.calls == 1
+    assert agents.speculation_stats()["IT"]["used"] == 1
+
+    print("\n6. Async: cancelling the task when the node is cancelled...")
+    search = StubWebSearch(latency=10)
+    _install(None, search, StubChatModel())
+
+    async def cancel_node():
+        try:
+            await asyncio.wait_for(agents.ait_agent(STATE), timeout=0.1)
+            assert False, "The node should time out"
+        except asyncio.TimeoutError:
+            pass
+        await asyncio.sleep(0)  # let the cancelled search task run its handler
+    asyncio.run(cancel_node())
+    assert search.cancelled, "The speculative search must not outlive its node"
+    assert agents.speculation_stats()["IT"]["discarded"] == 1
+
+    print("\n7. Async: skipping speculation while every slot is busy...")
+    search = StubWebSearch()
+    _install(False, search, StubChatModel())
+    for _ in range(agents.SPECULATION_WORKERS):
+        assert agents._speculation_slots.acquire(blocking=False), "Finished tasks should return their slots"
+    try:
+        result = asyncio.run(agents.ait_agent(STATE))
+    finally:
+        for _ in range(agents.SPECULATION_WORKERS):
+            agents._speculation_slots.release()
+    assert result["used_web_search"] and search.calls == 1, "The fallback should search directly"
+    assert agents.speculation_stats()["IT"]["skipped"] == 1
+
+if __name__ == "__main__":
+    try:
+        test_speculative_web_search()
+    except Exception:
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
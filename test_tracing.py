@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Test per-node tracing: metrics recorded into the graph state by sync and
+async nodes, the latency breakdown, and the JSONL span exporter.
+"""
+
+import sys
+import json
+import asyncio
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional, TypedDict
+
+sys.path.append(str(Path(__file__).parent))
+
+from langchain_core.runnables import RunnableLambda
+from langgraph.graph import StateGraph, END
+
+import tracing
+
+class State(TypedDict):
+    query: str
+    answer: Optional[str]
+    metrics: Optional[Dict[str, Any]]
+
+def search(state: State) -> State:
+    with tracing.timed("vector_search_seconds"):
+        pass
+    tracing.increment("context_tokens_saved", 40)
+    return {"answer": "internal"}
+
+async def asearch(state: State) -> State:
+    # Worker threads started with asyncio.to_thread count against the node too
+    await asyncio.to_thread(search, state)
+    return {"answer": "internal"}
+
+def answer(state: State) -> State:
+    tracing.record_llm_call(input_tokens=120, output_tokens=30)
+    tracing.record_llm_call(input_tokens=80, output_tokens=20)
+    return {"answer": state["answer"] + " answer"}
+
+async def aanswer(state: State) -> State:
+    return answer(state)
+
+def _graph():
+    workflow = StateGraph(State)
+    workflow.add_node("search", RunnableLambda(tracing.traced("search", search), tracing.atraced("search", asearch)))
+    workflow.add_node("answer", RunnableLambda(tracing.traced("answer", answer), tracing.atraced("answer", aanswer)))
+    workflow.set_entry_point("search")
+    workflow.add_edge("search", "answer")
+    workflow.add_edge("answer", END)
+    return workflow.compile()
+
+def _check_metrics(result: Dict[str, Any]):
+    assert result["answer"] == "internal answer"
+    metrics = result["metrics"]
+    assert metrics["trace_id"]
+    search_node, answer_node = metrics["nodes"]
+    assert search_node["node"] == "search" and answer_node["node"] == "answer"
+    assert search_node["context_tokens_saved"] == 40 and "vector_search_seconds" in search_node
+    assert "llm_calls" not in search_node, "Counters must not leak between nodes"
+    assert answer_node["llm_calls"] == 2
+    assert answer_node["input_tokens"] == 200 and answer_node["output_tokens"] == 50
+    assert all(node["seconds"] >= 0 and node["started_at"] > 0 for node in metrics["nodes"])
+
+def test_tracing():
+    """Node metrics reach the state and the exporter, for invoke and ainvoke."""
+    print("🧪 Testing tracing...")
+    print("=" * 40)
+
+    graph = _graph()
+
+    print("\n1. Recording node metrics in the state...")
+    result = graph.invoke({"query": "How do I set up VPN?", "answer": None, "metrics": None})
+    _check_metrics(result)
+    tracing.increment("llm_calls")  # outside a node: ignored
+
+    print("\n2. Recording them from async nodes...")
+    _check_metrics(asyncio.run(graph.ainvoke({"query": "How do I set up VPN?", "answer": None, "metrics": None})))
+
+    print("\n3. Building the latency breakdown...")
+    rows = tracing.latency_breakdown(result["metrics"])
+    assert [row["node"] for row in rows] == ["search", "answer"]
+    assert rows[0]["context_tokens_saved"] == 40 and rows[1]["llm_calls"] == 2
+    assert rows[1]["tokens_in"] == 200 and rows[1]["tokens_out"] == 50
+    assert tracing.latency_breakdown(None) == []
+
+    print("\n4. Exporting spans as JSONL...")
+    previous_exporter = tracing._exporter
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "traces" / "traces.jsonl"
+        tracing._exporter = tracing.JsonlSpanExporter(str(path))
+        try:
+            first = graph.invoke({"query": "How do I set up VPN?", "answer": None, "metrics": None})
+            second = graph.invoke({"query": "When is payroll processed?", "answer": None, "metrics": None})
+        finally:
+            tracing._exporter = previous_exporter
+        spans = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+    assert [span["name"] for span in spans] == ["search", "answer"] * 2
+    assert {span["trace_id"] for span in spans[:2]} == {first["metrics"]["trace_id"]}
+    assert {span["trace_id"] for span in spans[2:]} == {second["metrics"]["trace_id"]}
+    assert first["metrics"]["trace_id"] != second["metrics"]["trace_id"]
+    assert len({span["span_id"] for span in spans}) == 4
+    assert all(span["end_time_unix_nano"] >= span["start_time_unix_nano"] for span in spans)
+    assert spans[1]["attributes"]["llm_calls"] == 2 and spans[1]["attributes"]["input_tokens"] == 200
+
+    print("\n✅ All tests passed!")
+
+if __name__ == "__main__":
+    try:
+        test_tracing()
+    except Exception:
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -28,6 +28,8 @@ def test_vector_store():
         print(f"Results: {len(it_results)} found")
         for i, result in enumerate(it_results, 1):
             print(f"  {i}. {result[:100]}...")
+        assert len(it_results) == 2, "Category search should return exactly top_k results"
+        assert all(vector_store.categories[vector_store.chunks.index(r)] == "IT" for r in it_results)
 
         # Test Finance search
         print("\n3. Testing Finance search...")
@@ -38,8 +40,16 @@ def test_vector_store():
         for i, result in enumerate(finance_results, 1):
             print(f"  {i}. {result[:100]}...")
 
+        # Test exact product terms (hybrid lexical + dense search)
+        print("\n4. Testing exact term search...")
+        term_query = "How do I enable 2FA?"
+        term_results = vector_store.search(term_query, category="IT", top_k=1)
+        print(f"Query: {term_query}")
+        print(f"Top result: {term_results[0][:100]}...")
+        assert "2FA" in term_results[0], "Exact product terms should rank first"
+
         # Test cross-category search
-        print("\n4. Testing cross-category search...")
+        print("\n5. Testing cross-category search...")
         general_query = "What is the process for requesting something?"
         general_results = vector_store.search(general_query, category=None, top_k=3)
         print(f"Query: {general_query}")
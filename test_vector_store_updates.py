@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Test incremental database updates against a deterministic embedder, so no
+model download is needed.
+"""
+
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from vector_store import VectorStore
+from fake_embedder import FakeEmbedder
+
+VPN = "Q: How do I set up VPN?\nA: Download the VPN client from the company portal."
+PRINTER = "Q: How do I connect to the printer?\nA: Add the office printer from the settings page."
+PASSWORD = "Q: How do I reset my password?\nA: Use the self-service password portal."
+PASSWORD_CHANGED = "Q: How do I reset my password?\nA: Call the help desk to reset your password."
+BACKUP = "Q: How do I backup my files?\nA: Files in your home folder are backed up nightly."
+
+def _store(directory: Path, embedder: FakeEmbedder, index_type: str = "flat") -> VectorStore:
+    store = VectorStore(persist_directory=str(directory / "vector_db"), index_type=index_type,
+                        embedding_cache_path=None, sources=f"{directory / 'it_faq.txt'}=IT", refresh_interval=0)
+    store._model = embedder
+    return store
+
+def _live_texts(store: VectorStore) -> list:
+    return [chunk for chunk in store.chunks if chunk is not None]
+
+def test_incremental_update():
+    """Add, change and remove chunks, including one that appears twice."""
+    print("🧪 Testing incremental updates...")
+    print("=" * 40)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        faq = tmp / "it_faq.txt"
+        embedder = FakeEmbedder()
+
+        print("\n1. Full build with a duplicated chunk...")
+        faq.write_text("\n\n".join([VPN, PRINTER, VPN, PASSWORD]), encoding="utf-8")
+        store = _store(tmp, embedder)
+        store.initialize_database(force_rebuild=True)
+        assert store.index.ntotal == len(store.manifest) == 3, "Duplicate chunks should be stored once"
+
+        print("\n2. Incremental sync: change one, add one, remove the duplicated one...")
+        faq.write_text("\n\n".join([PRINTER, PASSWORD_CHANGED, BACKUP]), encoding="utf-8")
+        embedder.encoded = 0
+        updated = _store(tmp, embedder)
+        updated.initialize_database(incremental=True)
+        assert embedder.encoded == 2, f"Only the changed and new chunks should be embedded, got {embedder.encoded}"
+        assert sorted(_live_texts(updated)) == sorted([PRINTER, PASSWORD_CHANGED, BACKUP])
+        assert updated.index.ntotal == len(updated.manifest) == 3
+        assert sum(index.ntotal for index in updated.category_indexes.values()) == 3
+
+        print("\n3. Reloading the published version...")
+        reloaded = _store(tmp, embedder)
+        assert reloaded.load_from_disk()
+        results = [r["text"] for r in reloaded.search_batch(["How do I set up VPN?"], "IT", top_k=3)[0]]
+        print(f"Results: {[r.splitlines()[0] for r in results]}")
+        assert VPN not in results, "Removed chunks must not be retrievable"
+        assert PASSWORD not in results and len(results) == 3
+
+        print("\n4. Nothing to do when the sources are unchanged...")
+        version = reloaded.current_version()
+        again = _store(tmp, embedder)
+        again.initialize_database(incremental=True)
+        assert again.current_version() == version, "An unchanged sync should not publish a version"
+
+    print("\n✅ All tests passed!")
+
+def test_hot_swap_is_atomic():
+    """Readers racing refresh() always see one complete version."""
+    print("🧪 Testing hot swaps under concurrent searches...")
+    print("=" * 40)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        faq = tmp / "it_faq.txt"
+        embedder = FakeEmbedder()
+
+        print("\n1. Publishing two versions with different chunks and index types...")
+        faq.write_text("\n\n".join([VPN, PRINTER]), encoding="utf-8")
+        builder = _store(tmp, embedder)
+        builder.initialize_database(force_rebuild=True)
+        first = builder.current_version()
+        faq.write_text("\n\n".join([PASSWORD, BACKUP, PASSWORD_CHANGED]), encoding="utf-8")
+        builder = _store(tmp, embedder, index_type="hnsw")
+        builder.initialize_database(force_rebuild=True)
+        second = builder.current_version()
+        expected = {
+            first: ("flat", {VPN, PRINTER}),
+            second: ("hnsw", {PASSWORD, BACKUP, PASSWORD_CHANGED}),
+        }
+
+        print("\n2. Swapping back and forth while searching...")
+        store = _store(tmp, embedder)
+        assert store.load_from_disk() and store.version == second and store.index_type == "hnsw"
+        pointer = tmp / "vector_db" / "CURRENT"
+        stop = threading.Event()
+        errors = []
+
+        def read():
+            while not stop.is_set():
+                try:
+                    state = store._state
+                    index_type, texts = expected[state.version]
+                    assert state.index_type == index_type, f"{state.version} served with a {state.index_type} index"
+                    assert {c for c in state.chunks if c is not None} == texts
+                    assert state.index.ntotal == len(texts)
+                    results = {r["text"] for r in store.search_batch(["How do I reset my password?"], "IT", top_k=3)[0]}
+                    assert results <= expected[first][1] or results <= expected[second][1], "A search mixed two versions"
+                except Exception as e:
+                    errors.append(e)
+                    stop.set()
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+        swaps = 0
+        for _ in range(20):
+            pointer.write_text(first if store.version == second else second, encoding="utf-8")
+            swaps += store.refresh()
+        stop.set()
+        for reader in readers:
+            reader.join()
+        assert not errors, f"Reader saw a mixed version: {errors[0]!r}"
+        assert swaps == 20
+
+        print("\n3. Keeping the current version when a load fails...")
+        pointer.write_text("missing-version", encoding="utf-8")
+        version, state = store.version, store._state
+        assert not store.refresh()
+        assert store._state is state and store.version == version
+
+    print("\n✅ All tests passed!")
+
+if __name__ == "__main__":
+    try:
+        test_incremental_update()
+        test_hot_swap_is_atomic()
+    except Exception:
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
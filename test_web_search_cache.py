@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test the web search result cache against the local Tavily stand-in.
+"""
+
+import sys
+import time
+import sqlite3
+import asyncio
+import threading
+import tempfile
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(str(Path(__file__).parent))
+
+from web_search_cache import WebSearchCache, LocalWebSearch
+
+def test_web_search_cache():
+    """Check TTL caching, query normalization and single-flight coalescing."""
+    print("🧪 Testing web search cache...")
+    print("=" * 40)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        search = LocalWebSearch(documents_dir=str(Path(__file__).parent / "data"), latency=0.2)
+        cache = WebSearchCache(cache_path=str(Path(tmp) / "web_search_cache.db"), ttl_seconds=60)
+
+        print("\n1. Coalescing concurrent identical queries...")
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(
+                lambda _: cache.get_or_fetch("How do I set up VPN?", search.invoke), range(8)
+            ))
+        print(f"Tavily stand-in calls: {search.calls}, stats: {cache.stats()}")
+        assert search.calls == 1, f"Expected 1 search for 8 concurrent queries, got {search.calls}"
+        assert results[0] and all(r == results[0] for r in results)
+
+        print("\n2. Serving normalized repeats from the cache...")
+        start = time.time()
+        cache.get_or_fetch("  how do I set up vpn ", search.invoke)
+        print(f"Cached lookup took {time.time() - start:.3f}s")
+        assert search.calls == 1, "Normalized repeat query should be a cache hit"
+
+        print("\n3. Coalescing concurrent async queries...")
+        async def run_concurrently():
+            return await asyncio.gather(*[cache.aget_or_fetch("When is payroll processed?", search.ainvoke) for _ in range(8)])
+        asyncio.run(run_concurrently())
+        assert search.calls == 2, f"Expected 1 more search for 8 async queries, got {search.calls - 1}"
+
+        print("\n4. Refetching after the TTL expires...")
+        cache.ttl_seconds = 0
+        cache.get_or_fetch("How do I set up VPN?", search.invoke)
+        assert search.calls == 3, "Expired entry should be refetched"
+
+        print("\n5. Not caching failures...")
+        def failing_search(query):
+            raise RuntimeError("search unavailable")
+        cache.ttl_seconds = 60
+        for _ in range(2):
+            try:
+                cache.get_or_fetch("latest ransomware threats", failing_search)
+                assert False, "Failure should propagate"
+            except RuntimeError:
+                pass
+        assert cache.get_or_fetch("latest ransomware threats", search.invoke) is not None
+        assert search.calls == 4, "Failed searches must not be cached"
+
+        print("\n6. Refetching when the fetching caller is cancelled...")
+        async def cancel_leader():
+            fetches = []
+            async def slow_then_fast(query):
+                fetches.append(query)
+                if len(fetches) == 1:
+                    await asyncio.sleep(10)
+                return await search.ainvoke(query)
+            leader = asyncio.create_task(cache.aget_or_fetch("How do I order a laptop?", slow_then_fast))
+            await asyncio.sleep(0.05)
+            followers = [asyncio.create_task(cache.aget_or_fetch("How do I order a laptop?", slow_then_fast)) for _ in range(3)]
+            await asyncio.sleep(0.05)
+            leader.cancel()
+            results = await asyncio.wait_for(asyncio.gather(*followers), timeout=5)
+            assert leader.cancelled()
+            assert len(fetches) == 2, f"Exactly one follower should refetch, got {len(fetches) - 1}"
+            return results
+        results = asyncio.run(cancel_leader())
+        assert results[0] and all(r == results[0] for r in results)
+
+        print("\n7. Cancelling a waiter without disturbing the fetch...")
+        async def cancel_follower():
+            leader = asyncio.create_task(cache.aget_or_fetch("How do I book a meeting room?", search.ainvoke))
+            await asyncio.sleep(0.05)
+            follower = asyncio.create_task(cache.aget_or_fetch("How do I book a meeting room?", search.ainvoke))
+            await asyncio.sleep(0.05)
+            follower.cancel()
+            return await leader
+        assert asyncio.run(cancel_follower()) is not None
+
+        print("\n8. Serving waiters when the cache write fails...")
+        put = cache._put
+        def failing_put(key, results):
+            raise sqlite3.OperationalError("database is locked")
+        cache._put = failing_put
+        try:
+            calls = search.calls
+            results = []
+            leader = threading.Thread(daemon=True, target=lambda: results.append(
+                cache.get_or_fetch("How do I request time off?", search.invoke)))
+            waiter = threading.Thread(daemon=True, target=lambda: results.append(
+                cache.get_or_fetch("How do I request time off?", search.invoke)))
+            leader.start()
+            time.sleep(0.05)
+            waiter.start()
+            leader.join(timeout=5)
+            waiter.join(timeout=5)
+            assert not waiter.is_alive(), "The waiter must not block on an unsettled fetch"
+            assert search.calls == calls + 1 and len(results) == 2 and results[0] == results[1]
+
+            async def fetch_concurrently():
+                return await asyncio.wait_for(asyncio.gather(
+                    *[cache.aget_or_fetch("How do I submit expenses?", search.ainvoke) for _ in range(2)]
+                ), timeout=5)
+            results = asyncio.run(fetch_concurrently())
+            assert search.calls == calls + 2 and results[0] == results[1]
+            assert not cache._in_flight, "Failed writes must still free the in-flight key"
+        finally:
+            cache._put = put
+        cache.get_or_fetch("How do I request time off?", search.invoke)
+        assert search.calls == calls + 3, "Results whose write failed are not cached"
+
+        print(f"\nFinal stats: {cache.stats()}")
+    print("\n✅ All tests passed!")
+
+if __name__ == "__main__":
+    try:
+        test_web_search_cache()
+    except Exception:
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
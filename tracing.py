@@ -0,0 +1,160 @@
+import os
+import json
+import time
+import uuid
+import threading
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Metrics of the graph node currently running in this thread or task. Worker
+# threads started with asyncio.to_thread inherit it; plain executors do not.
+_current_node: ContextVar[Optional[Dict[str, Any]]] = ContextVar("current_node_metrics", default=None)
+_increment_lock = threading.Lock()
+
+NODE_COUNTERS = ("llm_calls", "input_tokens", "output_tokens", "vector_search_seconds",
+                 "web_search_seconds", "response_cache_hits", "web_cache_hits",
+                 "context_tokens", "context_tokens_saved")
+
+def increment(key: str, amount: float = 1):
+    """Add to a counter of the running node; a no-op outside traced nodes."""
+    metrics = _current_node.get()
+    if metrics is not None:
+        with _increment_lock:
+            metrics[key] = metrics.get(key, 0) + amount
+
+@contextmanager
+def timed(key: str):
+    """Add the wall time of the block to a "<something>_seconds" counter."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        increment(key, time.perf_counter() - start)
+
+def record_llm_call(input_tokens: int = 0, output_tokens: int = 0):
+    """Count one successful LLM call and its token usage against the running node."""
+    increment("llm_calls")
+    increment("input_tokens", input_tokens)
+    increment("output_tokens", output_tokens)
+
+class JsonlSpanExporter:
+    """Appends one OpenTelemetry-shaped span per node run to a JSONL file."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def export(self, trace_id: str, node: Dict[str, Any]):
+        span = {
+            "trace_id": trace_id,
+            "span_id": uuid.uuid4().hex[:16],
+            "name": node["node"],
+            "start_time_unix_nano": int(node["started_at"] * 1e9),
+            "end_time_unix_nano": int((node["started_at"] + node["seconds"]) * 1e9),
+            "attributes": {key: node[key] for key in NODE_COUNTERS if key in node},
+        }
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(span) + "\n")
+
+class OpenTelemetryExporter:
+    """Emits node runs as spans through the OpenTelemetry API.
+
+    Spans go wherever the application's OpenTelemetry SDK is configured to
+    send them; without an SDK they are dropped.
+    """
+
+    def __init__(self):
+        try:
+            from opentelemetry import trace
+        except ImportError as e:
+            raise ImportError("TRACE_EXPORTER=otel needs 'pip install opentelemetry-api opentelemetry-sdk'") from e
+        self.tracer = trace.get_tracer("agents")
+
+    def export(self, trace_id: str, node: Dict[str, Any]):
+        span = self.tracer.start_span(node["node"], start_time=int(node["started_at"] * 1e9))
+        span.set_attributes({"request.trace_id": trace_id,
+                             **{key: node[key] for key in NODE_COUNTERS if key in node}})
+        span.end(end_time=int((node["started_at"] + node["seconds"]) * 1e9))
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+def get_exporter():
+    """Return the span exporter chosen by TRACE_EXPORTER (none, jsonl or otel)."""
+    global _exporter
+    if _exporter is None:
+        with _exporter_lock:
+            if _exporter is None:
+                kind = os.getenv("TRACE_EXPORTER", "none").lower()
+                if kind == "jsonl":
+                    _exporter = JsonlSpanExporter(os.getenv("TRACE_JSONL_PATH", "traces.jsonl"))
+                elif kind == "otel":
+                    _exporter = OpenTelemetryExporter()
+                else:
+                    _exporter = False
+    return _exporter or None
+
+def _start(name: str):
+    metrics = {"node": name, "started_at": time.time()}
+    return metrics, _current_node.set(metrics), time.perf_counter()
+
+def _finish(state: Dict[str, Any], result: Dict[str, Any], metrics: Dict[str, Any], token, start: float) -> Dict[str, Any]:
+    _current_node.reset(token)
+    metrics["seconds"] = time.perf_counter() - start
+
+    previous = state.get("metrics") or {}
+    trace_id = previous.get("trace_id") or uuid.uuid4().hex
+    exporter = get_exporter()
+    if exporter is not None:
+        try:
+            exporter.export(trace_id, metrics)
+        except Exception as e:
+            print(f"DEBUG: Trace export failed: {e}")
+    return {**result, "metrics": {"trace_id": trace_id, "nodes": previous.get("nodes", []) + [metrics]}}
+
+def traced(name: str, func: Callable) -> Callable:
+    """Wrap a sync graph node so its metrics are appended to state["metrics"]."""
+    @functools.wraps(func)
+    def wrapper(state):
+        metrics, token, start = _start(name)
+        try:
+            result = func(state)
+        except BaseException:
+            _current_node.reset(token)
+            raise
+        return _finish(state, result, metrics, token, start)
+    return wrapper
+
+def atraced(name: str, afunc: Callable) -> Callable:
+    """Async counterpart of traced."""
+    @functools.wraps(afunc)
+    async def wrapper(state):
+        metrics, token, start = _start(name)
+        try:
+            result = await afunc(state)
+        except BaseException:
+            _current_node.reset(token)
+            raise
+        return _finish(state, result, metrics, token, start)
+    return wrapper
+
+def latency_breakdown(metrics: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Per-node rows (milliseconds and counters) for display."""
+    rows = []
+    for node in (metrics or {}).get("nodes", []):
+        rows.append({
+            "node": node["node"],
+            "ms": round(node["seconds"] * 1000, 1),
+            "llm_calls": node.get("llm_calls", 0),
+            "tokens_in": node.get("input_tokens", 0),
+            "tokens_out": node.get("output_tokens", 0),
+            "vector_search_ms": round(node.get("vector_search_seconds", 0) * 1000, 1),
+            "web_search_ms": round(node.get("web_search_seconds", 0) * 1000, 1),
+            "cache_hits": node.get("response_cache_hits", 0) + node.get("web_cache_hits", 0),
+            "context_tokens_saved": node.get("context_tokens_saved", 0),
+        })
+    return rows
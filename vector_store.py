@@ -1,163 +1,867 @@
 import os
 import re
+import copy
+import time
 import shutil
-from typing import List, Dict, Any
-from sentence_transformers import SentenceTransformer
+import threading
+from datetime import datetime
+from contextlib import contextmanager
+from itertools import islice
+from typing import List, Dict, Any, Iterable, Iterator, TypedDict
 import faiss
 import numpy as np
 import pickle
+import json
+import hashlib
 from pathlib import Path
-
-class VectorStore:
-    def __init__(self, persist_directory: str = "vector_db"):
-        self.persist_directory = Path(persist_directory)
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+from embedding_cache import EmbeddingCache
+import platform
+from chunk_store import write_chunk_store, read_chunk_store, chunk_store_exists, write_atomically
+from bm25_index import BM25Index
+from document_sources import DEFAULT_SOURCES, parse_sources, iter_documents
+from retrieval_client import RetrievalClient
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx_int8")
+
+# Each build is written to versions/<version>/ and published by atomically
+# replacing the CURRENT pointer file
+CURRENT_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+
+class SearchResult(TypedDict):
+    chunk_id: int
+    text: str
+    category: str
+    score: float  # reciprocal rank fusion score
+    distance: float | None  # dense L2 distance, None for lexical-only hits
+    similarity: float  # cosine similarity between query and chunk
+
+def quantized_onnx_file() -> str:
+    """Pick the pre-quantized ONNX export shipped with the model for this CPU."""
+    if platform.machine().lower() in ("arm64", "aarch64"):
+        return "onnx/model_qint8_arm64.onnx"
+    return "onnx/model_quint8_avx2.onnx"
+
+def batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+class _ServingState:
+    """Everything a search reads, swapped as one reference on hot reload.
+
+    Searches take self._state once and use it throughout, so a reload that
+    publishes a new state never blocks them or mixes two versions. The index
+    configuration lives here too, since each version records its own.
+    """
+
+    def __init__(self, index_type: str = "flat", nlist: int = 100, pq_m: int = 8,
+                 pq_nbits: int = 8, hnsw_m: int = 32):
+        self.index_type = index_type
+        self.nlist = nlist
+        self.pq_m = pq_m
+        self.pq_nbits = pq_nbits
+        self.hnsw_m = hnsw_m
+        self.version: str | None = None
         self.index = None
+        self.category_indexes: Dict[str, faiss.Index] = {}
         self.chunks = []
         self.categories = []
+        self.bm25: BM25Index | None = None
+        self.category_versions: Dict[str, str] = {}
+        self.category_masks: Dict[str, np.ndarray] = {}
+
+def _state_field(name: str) -> property:
+    return property(lambda self: getattr(self._state, name),
+                    lambda self, value: setattr(self._state, name, value))
+
+class _StreamingIndex:
+    """An index filled batch by batch during ingestion.
+
+    Flat and HNSW indexes take vectors straight away. IVF indexes must be
+    trained first, so vectors are buffered until there are enough to train
+    on (or ingestion ends), bounding memory by the training sample size.
+    """
+
+    def __init__(self, store: "VectorStore"):
+        self.store = store
+        self.index = None
+        self._pending: List[tuple[np.ndarray, np.ndarray]] = []
+        self._pending_count = 0
+        if store.index_type in ("ivf_flat", "ivf_pq"):
+            # FAISS wants ~39 training points per centroid
+            centroids = max(store.nlist, 2 ** store.pq_nbits if store.index_type == "ivf_pq" else 0)
+            self.train_size = 39 * centroids
+        else:
+            self.train_size = 0
+
+    def add(self, embeddings: np.ndarray, ids: np.ndarray):
+        if self.index is not None:
+            self.index.add_with_ids(embeddings, ids)
+            return
+        self._pending.append((embeddings, ids))
+        self._pending_count += len(ids)
+        if self._pending_count >= self.train_size:
+            self._build()
+
+    def _build(self):
+        embeddings = np.vstack([e for e, _ in self._pending])
+        ids = np.concatenate([i for _, i in self._pending])
+        self.index = self.store._build_index(embeddings, ids)
+        self._pending = []
+
+    def finish(self) -> faiss.Index | None:
+        if self.index is None and self._pending:
+            self._build()
+        return self.index
+
+class VectorStore:
+    index_type = _state_field("index_type")
+    nlist = _state_field("nlist")
+    pq_m = _state_field("pq_m")
+    pq_nbits = _state_field("pq_nbits")
+    hnsw_m = _state_field("hnsw_m")
+    version = _state_field("version")
+    index = _state_field("index")
+    category_indexes = _state_field("category_indexes")
+    chunks = _state_field("chunks")
+    categories = _state_field("categories")
+    bm25 = _state_field("bm25")
+    category_versions = _state_field("category_versions")
+    _category_masks = _state_field("category_masks")
+
+    def __init__(self, persist_directory: str = "vector_db", index_type: str = "flat",
+                 nlist: int = 100, pq_m: int = 8, pq_nbits: int = 8, hnsw_m: int = 32,
+                 nprobe: int = 8, ef_search: int = 64,
+                 embedding_cache_path: str | None = "embedding_cache.db",
+                 embedding_backend: str = "torch",
+                 hybrid_search: bool = True, rrf_k: int = 60,
+                 sources: str = DEFAULT_SOURCES, ingest_batch_size: int = 512, ingest_workers: int = 1,
+                 refresh_interval: float = 30.0, keep_versions: int = 3):
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type '{index_type}'. Choose from: {', '.join(INDEX_TYPES)}")
+        if embedding_backend not in EMBEDDING_BACKENDS:
+            raise ValueError(f"Unknown embedding backend '{embedding_backend}'. Choose from: {', '.join(EMBEDDING_BACKENDS)}")
+
+        self.persist_directory = Path(persist_directory)
+        self.model_name = 'all-MiniLM-L6-v2'
+        self.embedding_backend = embedding_backend
+        # The embedding model is loaded on first use (see the model property)
+        self._model = None
+        self._model_lock = threading.Lock()
+        # Kept outside persist_directory so it survives clear_database(); opened
+        # on first use (see the embedding_cache property)
+        self.embedding_cache_path = embedding_cache_path
+        self._embedding_cache = None
+        self._embedding_cache_lock = threading.Lock()
+        self._state = _ServingState(index_type, nlist, pq_m, pq_nbits, hnsw_m)
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self.hybrid_search = hybrid_search
+        self.rrf_k = rrf_k
+        self.sources = parse_sources(sources)
+        self.ingest_batch_size = ingest_batch_size
+        self.ingest_workers = ingest_workers
+        self.refresh_interval = refresh_interval
+        self.keep_versions = keep_versions
+        self._refresh_lock = threading.Lock()
+        self._refreshing = False
+        self._last_refresh_check = time.monotonic()
+        self.manifest: Dict[str, int] = {}
+
+    @property
+    def model(self):
+        """The sentence-transformers model, loaded on first access."""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    # Deferred so importing this module does not pull in torch
+                    from sentence_transformers import SentenceTransformer
+                    print(f"Loading embedding model {self.model_name} ({self.embedding_backend} backend)...")
+                    if self.embedding_backend == "torch":
+                        self._model = SentenceTransformer(self.model_name)
+                    else:
+                        # Requires the ONNX extra: pip install "sentence-transformers[onnx]"
+                        model_kwargs = {"file_name": quantized_onnx_file()} if self.embedding_backend == "onnx_int8" else {}
+                        self._model = SentenceTransformer(self.model_name, backend="onnx", model_kwargs=model_kwargs)
+        return self._model
+
+    @property
+    def embedding_cache(self) -> EmbeddingCache | None:
+        """The persistent embedding cache, opened on first access; None when disabled."""
+        if self._embedding_cache is None and self.embedding_cache_path:
+            with self._embedding_cache_lock:
+                if self._embedding_cache is None:
+                    self._embedding_cache = EmbeddingCache(self.embedding_cache_path)
+        return self._embedding_cache
+
+    @property
+    def embedding_key(self) -> str:
+        """Embedding cache key; backends produce slightly different vectors."""
+        if self.embedding_backend == "torch":
+            return self.model_name
+        return f"{self.model_name}@{self.embedding_backend}"
+
+    def warm_up(self):
+        """Load the embedding model and vector database ahead of the first query."""
+        self.model.encode(["warm up"])
+        if self.index is None:
+            self.initialize_database(force_rebuild=False)
 
     def clear_database(self):
-        """Clear the existing vector database."""
+        """Delete every version of the vector database.
+
+        Processes serving from it keep their memory-mapped files until they
+        exit; rebuilds publish a new version instead and never need this.
+        """
         if self.persist_directory.exists():
             shutil.rmtree(self.persist_directory)
         # Always create the directory, whether it existed before or not
         self.persist_directory.mkdir(parents=True, exist_ok=True)
         print(f"Cleared vector database at {self.persist_directory}")
 
+    @property
+    def data_directory(self) -> Path:
+        """Directory of the loaded version; the top level for pre-versioning databases."""
+        if self.version is None:
+            return self.persist_directory
+        return self.persist_directory / VERSIONS_DIR / self.version
+
+    def current_version(self) -> str | None:
+        """The published version named by the CURRENT pointer, if any."""
+        try:
+            return (self.persist_directory / CURRENT_FILE).read_text(encoding="utf-8").strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _start_version(self):
+        """Direct the next save_to_disk to a new, unpublished version directory."""
+        self.version = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        self.data_directory.mkdir(parents=True, exist_ok=True)
+
+    def _publish(self):
+        """Point CURRENT at the saved version and drop old unused versions."""
+        write_atomically(self.persist_directory / CURRENT_FILE, lambda f: f.write(self.version.encode("utf-8")))
+        print(f"Published vector database version {self.version}")
+
+        versions = sorted(path for path in (self.persist_directory / VERSIONS_DIR).iterdir() if path.is_dir())
+        # Readers still on a dropped version keep their memory-mapped files open
+        for path in versions[:-self.keep_versions] if self.keep_versions > 0 else []:
+            if path.name != self.version:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def refresh(self) -> bool:
+        """Hot-swap to the published version if it differs from the loaded one.
+
+        load_from_disk builds the new version's complete state, index
+        configuration included, and publishes it with a single reference
+        assignment, so in-flight searches finish on the old version without
+        waiting. Returns whether a new version was swapped in.
+        """
+        version = self.current_version()
+        if version is None or version == self.version:
+            return False
+
+        previous = self.version
+        if not self.load_from_disk():
+            print(f"Could not load vector database version {version}, keeping {previous}")
+            return False
+        print(f"Swapped in vector database version {self.version}")
+        return True
+
+    def maybe_refresh(self):
+        """Look for a newly published version at most every refresh_interval seconds.
+
+        Reading the pointer is cheap; loading a new version happens on a
+        background thread while searches keep using the current one.
+        """
+        if self.refresh_interval <= 0 or self.index is None:
+            return
+        with self._refresh_lock:
+            now = time.monotonic()
+            if self._refreshing or now - self._last_refresh_check < self.refresh_interval:
+                return
+            self._last_refresh_check = now
+            if self.current_version() in (None, self.version):
+                return
+            self._refreshing = True
+        threading.Thread(target=self._background_refresh, name="vector-store-refresh", daemon=True).start()
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f"Vector database refresh failed: {e}")
+        finally:
+            with self._refresh_lock:
+                self._refreshing = False
+
     def chunk_document(self, content: str) -> List[str]:
         """Split document into Q&A chunks."""
         # Chunk by Q&A pairs (lines starting with Q: or Q.)
         qa_chunks = re.split(r'(?=^Q[:\.])', content, flags=re.MULTILINE)
         return [chunk.strip() for chunk in qa_chunks if chunk.strip()]
 
-    def load_and_process_documents(self):
-        """Load documents, chunk them, and create embeddings."""
-        print("Loading and processing documents...")
-
-        # Define document sources
-        documents = {
-            "IT": "data/it_faq.txt",
-            "Finance": "data/finance_faq.txt"
-        }
-
+    @contextmanager
+    def embedding_pool(self, workers: int | None = None):
+        """A sentence-transformers process pool for encode, or None for one worker."""
+        workers = self.ingest_workers if workers is None else workers
+        if workers <= 1:
+            yield None
+            return
+        print(f"Starting {workers} embedding worker processes...")
+        pool = self.model.start_multi_process_pool(["cpu"] * workers)
+        try:
+            yield pool
+        finally:
+            self.model.stop_multi_process_pool(pool)
+
+    def _embed(self, texts: List[str], pool=None) -> np.ndarray:
+        if pool is None:
+            return self.model.encode(texts).astype('float32')
+        return self.model.encode_multi_process(texts, pool).astype('float32')
+
+    def encode(self, texts: List[str], pool=None) -> np.ndarray:
+        """Embed texts, reusing cached vectors where available.
+
+        With a pool from embedding_pool, uncached texts are split across
+        its worker processes.
+        """
+        if self.embedding_cache is None:
+            return self._embed(texts, pool)
+
+        cached = self.embedding_cache.get_many(self.embedding_key, texts)
+        missing = list(dict.fromkeys(
+            text for text in texts if self.embedding_cache.text_hash(text) not in cached
+        ))
+        if missing:
+            vectors = self._embed(missing, pool)
+            self.embedding_cache.put_many(self.embedding_key, missing, vectors)
+            for text, vector in zip(missing, vectors):
+                cached[self.embedding_cache.text_hash(text)] = vector
+
+        return np.vstack([cached[self.embedding_cache.text_hash(text)] for text in texts])
+
+    def _report_cache_stats(self):
+        # Nothing to report if nothing was encoded
+        if self._embedding_cache is not None:
+            stats = self._embedding_cache.stats()
+            print(f"  - Embedding cache: {stats['hits']} hits, {stats['misses']} misses "
+                  f"({stats['hit_rate']:.0%} hit rate, {stats['size_bytes'] / 1e6:.1f} MB)")
+
+    def read_documents(self) -> tuple[List[str], List[str]]:
+        """Read and chunk every source document into memory."""
         all_chunks = []
         all_categories = []
+        for chunk, category in iter_documents(self.sources):
+            all_chunks.append(chunk)
+            all_categories.append(category)
+        return all_chunks, all_categories
 
-        for category, file_path in documents.items():
-            if os.path.exists(file_path):
-                print(f"Processing {category} document: {file_path}")
-                with open(file_path, 'r', encoding='utf-8') as file:
-                    content = file.read()
+    @staticmethod
+    def chunk_hash(chunk: str, category: str) -> str:
+        """Content hash identifying a chunk within its category."""
+        return hashlib.sha256(f"{category}\0{chunk}".encode('utf-8')).hexdigest()
 
-                chunks = self.chunk_document(content)
-                all_chunks.extend(chunks)
-                all_categories.extend([category] * len(chunks))
-                print(f"  - Created {len(chunks)} chunks for {category}")
-            else:
-                print(f"Warning: Document not found: {file_path}")
+    def load_and_process_documents(self):
+        """Stream documents through chunking and embedding into the indexes.
+
+        Chunks are embedded ingest_batch_size at a time (across a process
+        pool when ingest_workers > 1) and added to the global and category
+        indexes as they go, so embeddings never have to fit in memory at once.
+        Repeated chunks are stored once, so each manifest hash owns one id.
+        """
+        print("Loading and processing documents...")
 
-        if not all_chunks:
+        self.chunks = []
+        self.categories = []
+        self.manifest = {}
+        # One sub-index per category so filtered searches never come up short
+        global_index = _StreamingIndex(self)
+        category_indexes: Dict[str, _StreamingIndex] = {}
+
+        start = time.perf_counter()
+        with self.embedding_pool() as pool:
+            for batch in batched(iter_documents(self.sources), self.ingest_batch_size):
+                unique = []
+                for chunk, category in batch:
+                    h = self.chunk_hash(chunk, category)
+                    if h not in self.manifest:
+                        self.manifest[h] = len(self.chunks) + len(unique)
+                        unique.append((chunk, category))
+                batch = unique
+                if not batch:
+                    continue
+                texts = [chunk for chunk, _ in batch]
+                categories = np.array([category for _, category in batch])
+                embeddings = self.encode(texts, pool)
+                ids = np.arange(len(self.chunks), len(self.chunks) + len(batch), dtype='int64')
+
+                global_index.add(embeddings, ids)
+                for category in sorted({category for _, category in batch}):
+                    mask = categories == category
+                    category_indexes.setdefault(category, _StreamingIndex(self)).add(embeddings[mask], ids[mask])
+
+                for chunk, category in batch:
+                    self.chunks.append(chunk)
+                    self.categories.append(category)
+                elapsed = time.perf_counter() - start
+                print(f"  - Embedded {len(self.chunks)} chunks ({len(self.chunks) / elapsed:.0f} chunks/s)")
+
+        if not self.chunks:
             print("No documents found to process!")
             return
 
-        print(f"Total chunks created: {len(all_chunks)}")
+        self._report_cache_stats()
+        self.index = global_index.finish()
+        print(f"  - Built {self.index_type} index with {self.index.ntotal} vectors")
+        self.category_indexes = {category: index.finish() for category, index in sorted(category_indexes.items())}
+        for category, index in self.category_indexes.items():
+            print(f"  - Built {category} index with {index.ntotal} vectors")
 
-        # Create embeddings
-        print("Creating embeddings...")
-        embeddings = self.model.encode(all_chunks)
+        # Lexical index over the same chunk ids for hybrid search
+        self._build_bm25()
+        self._compute_category_versions()
 
-        # Create FAISS index
-        print("Building FAISS index...")
-        dimension = embeddings.shape[1]
-        self.index = faiss.IndexFlatL2(dimension)
-        self.index.add(embeddings.astype('float32'))
+        # Save to a new version directory, then switch readers over to it
+        self._start_version()
+        self.save_to_disk()
+        self._publish()
+        print("Vector database initialized successfully!")
 
-        # Store chunks and categories
-        self.chunks = all_chunks
-        self.categories = all_categories
+    def update_documents(self):
+        """Re-embed only new or changed chunks and drop deleted ones."""
+        print("Checking documents for changes...")
 
-        # Ensure directory exists before saving
-        self.persist_directory.mkdir(parents=True, exist_ok=True)
+        all_chunks, all_categories = self.read_documents()
+        current = {}
+        for chunk, category in zip(all_chunks, all_categories):
+            current.setdefault(self.chunk_hash(chunk, category), (chunk, category))
+
+        removed_ids = [chunk_id for h, chunk_id in self.manifest.items() if h not in current]
+        # Databases built before duplicate chunks were collapsed hold copies
+        # the manifest lost track of; drop them with the removed chunks
+        tracked = set(self.manifest.values())
+        removed_ids += [i for i, chunk in enumerate(self.chunks) if chunk is not None and i not in tracked]
+        added = [(h, chunk, category) for h, (chunk, category) in current.items() if h not in self.manifest]
+
+        if not removed_ids and not added:
+            print("Vector database is up to date - nothing to re-embed")
+            return
+
+        # Mapped chunk views are read-only; materialize them for editing
+        self.chunks = list(self.chunks)
+        self.categories = list(self.categories)
+
+        print(f"  - {len(added)} new or changed chunks, {len(removed_ids)} removed chunks")
 
-        # Save to disk
+        if removed_ids and self.index_type == "hnsw":
+            print("HNSW indexes do not support removal - rebuilding from scratch...")
+            self.load_and_process_documents()
+            return
+
+        if removed_ids:
+            ids = np.array(removed_ids, dtype='int64')
+            self.index.remove_ids(ids)
+            for index in self.category_indexes.values():
+                index.remove_ids(ids)
+            # Keep positions stable so chunk ids stay valid; tombstone the slots
+            for chunk_id in removed_ids:
+                self.chunks[chunk_id] = None
+                self.categories[chunk_id] = None
+            removed = set(removed_ids)
+            self.manifest = {h: i for h, i in self.manifest.items() if i not in removed}
+
+        if added:
+            print("Creating embeddings...")
+            # Starting worker processes only pays off for large updates
+            with self.embedding_pool(None if len(added) > self.ingest_batch_size else 1) as pool:
+                embeddings = self.encode([chunk for _, chunk, _ in added], pool)
+            self._report_cache_stats()
+            ids = np.arange(len(self.chunks), len(self.chunks) + len(added), dtype='int64')
+            for (h, chunk, category), chunk_id in zip(added, ids):
+                self.chunks.append(chunk)
+                self.categories.append(category)
+                self.manifest[h] = int(chunk_id)
+
+            self.index.add_with_ids(embeddings, ids)
+            added_categories = np.array([category for _, _, category in added])
+            for category in sorted({category for _, _, category in added}):
+                mask = added_categories == category
+                if category in self.category_indexes:
+                    self.category_indexes[category].add_with_ids(embeddings[mask], ids[mask])
+                else:
+                    self.category_indexes[category] = self._build_index(embeddings[mask], ids[mask])
+
+        # Drop indexes for categories that no longer have any chunks
+        for category in [c for c, index in self.category_indexes.items() if index.ntotal == 0]:
+            del self.category_indexes[category]
+
+        # Tokenizing is cheap next to embedding, so the lexical index is rebuilt
+        self._build_bm25()
+        self._compute_category_versions()
+
+        # The loaded version may be serving other processes; write a new one
+        self._start_version()
         self.save_to_disk()
-        print("Vector database initialized successfully!")
+        self._publish()
+        print("Vector database updated successfully!")
+
+    def _compute_category_versions(self):
+        """Fingerprint each category's chunk contents so caches can detect FAQ changes."""
+        hashes: Dict[str, List[str]] = {}
+        for chunk, category in zip(self.chunks, self.categories):
+            if category is not None:
+                hashes.setdefault(category, []).append(self.chunk_hash(chunk, category))
+        self.category_versions = {
+            category: hashlib.sha256("".join(sorted(chunk_hashes)).encode('utf-8')).hexdigest()[:16]
+            for category, chunk_hashes in hashes.items()
+        }
+
+    def _build_bm25(self):
+        print("Building BM25 index...")
+        self.bm25 = BM25Index.build(self.chunks)
+        self._category_masks = {}
+        print(f"  - Indexed {len(self.bm25.vocab)} terms over {self.bm25.n_docs} chunks")
+
+    def _category_mask(self, category: str, state: _ServingState | None = None) -> np.ndarray:
+        """Boolean mask of chunk ids in a category, for filtering lexical hits."""
+        state = state or self._state
+        if category not in state.category_masks:
+            state.category_masks[category] = np.fromiter(
+                (c == category for c in state.categories), dtype=bool, count=len(state.categories)
+            )
+        return state.category_masks[category]
+
+    def create_index(self, dimension: int, n_vectors: int) -> faiss.Index:
+        """Create an empty FAISS index of the configured type."""
+        if self.index_type == "flat":
+            return faiss.IndexFlatL2(dimension)
+        if self.index_type == "hnsw":
+            return faiss.IndexHNSWFlat(dimension, self.hnsw_m)
+
+        # IVF training needs at least one point per list (and per PQ centroid)
+        nlist = max(1, min(self.nlist, n_vectors))
+        quantizer = faiss.IndexFlatL2(dimension)
+        if self.index_type == "ivf_flat":
+            return faiss.IndexIVFFlat(quantizer, dimension, nlist)
+        nbits = max(1, min(self.pq_nbits, int(np.log2(max(n_vectors, 2)))))
+        return faiss.IndexIVFPQ(quantizer, dimension, nlist, self.pq_m, nbits)
+
+    def _build_index(self, embeddings: np.ndarray, ids: np.ndarray | None = None) -> faiss.Index:
+        """Create, train and fill an index, optionally keyed by explicit ids."""
+        index = self.create_index(embeddings.shape[1], len(embeddings))
+        if ids is not None:
+            index = faiss.IndexIDMap(index)
+        if not index.is_trained:
+            index.train(embeddings)
+        if ids is None:
+            index.add(embeddings)
+        else:
+            index.add_with_ids(embeddings, ids)
+        self._apply_search_params(index)
+        return index
+
+    def _apply_search_params(self, index: faiss.Index):
+        """Apply the nprobe/efSearch tuning knobs to an index."""
+        if isinstance(index, faiss.IndexIDMap):
+            index = faiss.downcast_index(index.index)
+        if isinstance(index, faiss.IndexIVF):
+            index.nprobe = self.nprobe
+        elif isinstance(index, faiss.IndexHNSW):
+            index.hnsw.efSearch = self.ef_search
+
+    def set_search_params(self, nprobe: int | None = None, ef_search: int | None = None):
+        """Retune search-time parameters on the loaded indexes."""
+        if nprobe is not None:
+            self.nprobe = nprobe
+        if ef_search is not None:
+            self.ef_search = ef_search
+        for index in [self.index, *self.category_indexes.values()]:
+            if index is not None:
+                self._apply_search_params(index)
+
+    def _build_category_indexes(self, embeddings: np.ndarray):
+        """Build a sub-index per category, keyed by global chunk id."""
+        self.category_indexes = {}
+        categories = np.array(self.categories)
+        for category in sorted(set(self.categories) - {None}):
+            ids = np.flatnonzero(categories == category).astype('int64')
+            index = self._build_index(embeddings[ids], ids)
+            self.category_indexes[category] = index
+            print(f"  - Built {category} index with {len(ids)} vectors")
+
+    def _category_index_path(self, category: str) -> Path:
+        return self.data_directory / f"faiss_index_{category.lower()}.bin"
+
+    @staticmethod
+    def _write_index(index: faiss.Index, path: Path):
+        """Write an index via rename so mmap readers never see a partial file."""
+        tmp_path = path.with_name(path.name + ".tmp")
+        faiss.write_index(index, str(tmp_path))
+        os.replace(tmp_path, path)
+
+    def _read_index(self, path: Path, mmap: bool) -> faiss.Index:
+        """Read an index, memory-mapping its vectors where FAISS supports it."""
+        if mmap:
+            # IVF inverted lists map through IO_FLAG_MMAP; flat/HNSW storage
+            # needs IO_FLAG_MMAP_IFC on FAISS versions that provide it
+            if self.index_type in ("ivf_flat", "ivf_pq"):
+                flags = faiss.IO_FLAG_MMAP
+            else:
+                flags = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+            try:
+                return faiss.read_index(str(path), flags)
+            except RuntimeError as e:
+                print(f"Could not mmap {path.name}, reading into memory: {e}")
+        return faiss.read_index(str(path))
 
     def save_to_disk(self):
         """Save the vector database to disk."""
         # Save FAISS index
-        faiss.write_index(self.index, str(self.persist_directory / "faiss_index.bin"))
-
-        # Save chunks and categories
-        with open(self.persist_directory / "chunks.pkl", "wb") as f:
-            pickle.dump(self.chunks, f)
-
-        with open(self.persist_directory / "categories.pkl", "wb") as f:
-            pickle.dump(self.categories, f)
+        self._write_index(self.index, self.data_directory / "faiss_index.bin")
+        for category, index in self.category_indexes.items():
+            self._write_index(index, self._category_index_path(category))
+
+        # Save index configuration so the index type survives a reload
+        with open(self.data_directory / "index_config.json", "w") as f:
+            json.dump(self._index_config(), f)
+
+        # Save chunks and categories in the mmap-friendly columnar format
+        write_chunk_store(self.data_directory, self.chunks, self.categories)
+        if self.bm25 is not None:
+            self.bm25.save(self.data_directory)
+        for legacy_file in ("chunks.pkl", "categories.pkl"):
+            (self.data_directory / legacy_file).unlink(missing_ok=True)
+
+        with open(self.data_directory / "category_versions.json", "w") as f:
+            json.dump(self.category_versions, f)
+
+        # Save per-chunk content hashes for incremental rebuilds
+        with open(self.data_directory / "manifest.json", "w") as f:
+            json.dump(self.manifest, f)
+
+        print(f"Vector database saved to {self.data_directory}")
+
+    def _index_config(self) -> Dict[str, Any]:
+        return {
+            "index_type": self.index_type,
+            "nlist": self.nlist,
+            "pq_m": self.pq_m,
+            "pq_nbits": self.pq_nbits,
+            "hnsw_m": self.hnsw_m,
+        }
 
-        print(f"Vector database saved to {self.persist_directory}")
+    def _load_manifest(self):
+        """Load the chunk hash manifest, which only incremental updates need."""
+        manifest_path = self.data_directory / "manifest.json"
+        if manifest_path.exists():
+            with open(manifest_path, "r") as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {}
+
+    def load_from_disk(self, mmap: bool = True) -> bool:
+        """Load the vector database from disk.
+
+        The published version is read into a new serving state, which replaces
+        the current one only once it is complete; on failure nothing changes.
+        With mmap=True the indexes and chunk text are memory-mapped read-only,
+        so several processes share one page-cache copy. Pass mmap=False when
+        the loaded indexes will be modified.
+        """
+        # A view of this store over an empty state, so the helpers below fill
+        # the new state while searches keep reading self._state
+        staging = copy.copy(self)
+        staging._state = _ServingState(**self._index_config())
+        if not staging._load_state(mmap):
+            return False
+        self._state = staging._state
+        return True
 
-    def load_from_disk(self) -> bool:
-        """Load the vector database from disk."""
+    def _load_state(self, mmap: bool) -> bool:
         try:
-            # Check if database exists
-            if not (self.persist_directory / "faiss_index.bin").exists():
+            # Load the published version, or the pre-versioning top-level files
+            self.version = self.current_version()
+            if not (self.data_directory / "faiss_index.bin").exists():
                 return False
 
+            # Restore the index configuration the database was built with
+            config_path = self.data_directory / "index_config.json"
+            if config_path.exists():
+                with open(config_path, "r") as f:
+                    config = json.load(f)
+                if config["index_type"] != self.index_type:
+                    print(f"Using stored index type '{config['index_type']}' (requested '{self.index_type}')")
+                for key, value in config.items():
+                    setattr(self, key, value)
+            else:
+                self.index_type = "flat"
+
             # Load FAISS index
-            self.index = faiss.read_index(str(self.persist_directory / "faiss_index.bin"))
+            self.index = self._read_index(self.data_directory / "faiss_index.bin", mmap)
 
-            # Load chunks and categories
-            with open(self.persist_directory / "chunks.pkl", "rb") as f:
-                self.chunks = pickle.load(f)
+            # Load chunks and categories, falling back to the legacy pickles
+            if chunk_store_exists(self.data_directory):
+                self.chunks, self.categories = read_chunk_store(self.data_directory)
+            else:
+                with open(self.data_directory / "chunks.pkl", "rb") as f:
+                    self.chunks = pickle.load(f)
+
+                with open(self.data_directory / "categories.pkl", "rb") as f:
+                    self.categories = pickle.load(f)
+
+            # Load per-category indexes, rebuilding them from the global
+            # index if the database predates category partitioning
+            category_paths = {c: self._category_index_path(c) for c in set(self.categories) - {None}}
+            if all(path.exists() for path in category_paths.values()):
+                self.category_indexes = {
+                    c: self._read_index(path, mmap) for c, path in category_paths.items()
+                }
+            else:
+                print("Category indexes missing - rebuilding from global index...")
+                self._build_category_indexes(self.index.reconstruct_n(0, self.index.ntotal))
+                for category, index in self.category_indexes.items():
+                    self._write_index(index, self._category_index_path(category))
+
+            # Load the BM25 index, building it if the database predates hybrid search
+            self._category_masks = {}
+            if BM25Index.exists(self.data_directory):
+                self.bm25 = BM25Index.load(self.data_directory)
+            else:
+                self._build_bm25()
+                self.bm25.save(self.data_directory)
 
-            with open(self.persist_directory / "categories.pkl", "rb") as f:
-                self.categories = pickle.load(f)
+            versions_path = self.data_directory / "category_versions.json"
+            if versions_path.exists():
+                with open(versions_path, "r") as f:
+                    self.category_versions = json.load(f)
+            else:
+                self._compute_category_versions()
 
-            print(f"Vector database loaded from {self.persist_directory}")
-            print(f"  - {len(self.chunks)} chunks available")
-            print(f"  - Categories: {set(self.categories)}")
+            self.set_search_params()
+
+            print(f"Vector database loaded from {self.data_directory}")
+            print(f"  - {self.index.ntotal} chunks available ({self.index_type} index)")
+            print(f"  - Categories: {set(self.categories) - {None}}")
             return True
 
         except Exception as e:
             print(f"Error loading vector database: {e}")
             return False
 
+    def search_batch(self, queries: List[str], categories: List[str | None] | str | None = None,
+                     top_k: int = 3) -> List[List[SearchResult]]:
+        """Search many queries with one encode call and one FAISS search per category.
+
+        With hybrid_search enabled, BM25 hits are fused with the dense hits
+        using reciprocal rank fusion.
+
+        categories is either one category (or None) applied to every query,
+        or a list with one entry per query.
+        """
+        # One read of the state, so a concurrent hot reload cannot mix versions
+        state = self._state
+        if state.index is None:
+            raise RuntimeError("Vector database not initialized")
+
+        if categories is None or isinstance(categories, str):
+            categories = [categories] * len(queries)
+        if len(categories) != len(queries):
+            raise ValueError("categories must have one entry per query")
+
+        query_embeddings = self.encode(queries) if queries else None
+        results: List[List[SearchResult]] = [[] for _ in queries]
+
+        # Group queries by target index so each index is searched once
+        groups: Dict[str | None, List[int]] = {}
+        for position, category in enumerate(categories):
+            groups.setdefault(category, []).append(position)
+
+        # Hybrid search over-fetches from both retrievers so fusion can reorder
+        candidates = top_k * 4 if self.hybrid_search and state.bm25 is not None else top_k
+
+        for category, positions in groups.items():
+            index = state.index if category is None else state.category_indexes.get(category)
+            if index is None or index.ntotal == 0:
+                continue
+
+            k = min(candidates, index.ntotal)
+            D, I = index.search(query_embeddings[positions], k)
+            for position, distances, ids in zip(positions, D, I):
+                dense = [(int(idx), float(distance)) for distance, idx in zip(distances, ids)
+                         if 0 <= idx < len(state.chunks)]
+                lexical = []
+                if candidates > top_k:
+                    allowed = None if category is None else self._category_mask(category, state)
+                    lexical = state.bm25.search(queries[position], candidates, allowed)
+                results[position] = self._fuse(dense, lexical, top_k, query_embeddings[position], state)
+
+        return results
+
+    def _fuse(self, dense: List[tuple[int, float]], lexical: List[tuple[int, float]],
+              top_k: int, query_embedding: np.ndarray, state: _ServingState) -> List[SearchResult]:
+        """Merge dense and lexical rankings with reciprocal rank fusion."""
+        scores: Dict[int, float] = {}
+        for ranking in (dense, lexical):
+            for rank, (chunk_id, _) in enumerate(ranking):
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+
+        distances = dict(dense)
+        ranked = sorted(scores, key=lambda chunk_id: scores[chunk_id], reverse=True)[:top_k]
+        similarities = self._similarities(ranked, distances, query_embedding, state)
+        return [
+            SearchResult(chunk_id=chunk_id, text=state.chunks[chunk_id], category=state.categories[chunk_id],
+                         score=scores[chunk_id], distance=distances.get(chunk_id),
+                         similarity=similarity)
+            for chunk_id, similarity in zip(ranked, similarities)
+        ]
+
+    def _similarities(self, chunk_ids: List[int], distances: Dict[int, float],
+                      query_embedding: np.ndarray, state: _ServingState) -> List[float]:
+        """Cosine similarity per chunk, comparable across queries and index types.
+
+        all-MiniLM-L6-v2 embeddings are unit length, so a squared L2 distance d
+        maps to cosine 1 - d / 2. Lexical-only hits have no distance and are
+        embedded (usually straight from the embedding cache) instead.
+        """
+        missing = [chunk_id for chunk_id in chunk_ids if chunk_id not in distances]
+        direct = {}
+        if missing:
+            vectors = self.encode([state.chunks[chunk_id] for chunk_id in missing])
+            query_norm = np.linalg.norm(query_embedding)
+            for chunk_id, vector in zip(missing, vectors):
+                direct[chunk_id] = float(np.dot(vector, query_embedding) / (np.linalg.norm(vector) * query_norm))
+        return [direct[chunk_id] if chunk_id in direct else 1.0 - distances[chunk_id] / 2.0
+                for chunk_id in chunk_ids]
+
     def search(self, query: str, category: str | None = None, top_k: int = 3) -> List[str]:
         """Search for relevant chunks."""
         if self.index is None:
             return ["Vector database not initialized"]
 
         try:
-            # Encode query
-            query_embedding = self.model.encode([query])
-            if len(query_embedding.shape) == 1:
-                query_embedding = query_embedding.reshape(1, -1)
-
-            # Search
-            k = top_k * 2  # Get more results for filtering
-            D, I = self.index.search(query_embedding.astype('float32'), k)
-
-            # Filter by category if specified
-            results = []
-            for idx in I[0]:
-                if idx < len(self.chunks):
-                    if category is None or self.categories[idx] == category:
-                        results.append(self.chunks[idx])
-                        if len(results) >= top_k:
-                            break
-
+            results = [result["text"] for result in self.search_batch([query], category, top_k)[0]]
             return results if results else ["No relevant information found."]
 
         except Exception as e:
             return [f"Error in vector search: {str(e)}"]
 
-    def initialize_database(self, force_rebuild: bool = False):
+    def initialize_database(self, force_rebuild: bool = False, incremental: bool = False):
         """Initialize the vector database, rebuilding if necessary."""
         if force_rebuild:
-            print("Force rebuild requested - clearing existing database...")
-            self.clear_database()
+            print("Force rebuild requested - building a new version...")
             self.load_and_process_documents()
+        elif incremental:
+            # Sync against the stored manifest, falling back to a full build
+            if self.load_from_disk(mmap=False):
+                self._load_manifest()
+            if self.index is not None and self.manifest:
+                self.update_documents()
+            else:
+                print("No manifest found - building full database...")
+                self.load_and_process_documents()
         else:
             # Try to load existing database
             if not self.load_from_disk():
@@ -169,26 +873,86 @@ class VectorStore:
         # Verify the database is properly initialized
         if self.index is None or len(self.chunks) == 0:
             print("Database verification failed - rebuilding...")
-            self.clear_database()
             self.load_and_process_documents()
 
 # Global vector store instance
-vector_store = VectorStore()
-
-def initialize_vector_store(force_rebuild: bool = False):
+vector_store = VectorStore(
+    index_type=os.getenv("VECTOR_INDEX_TYPE", "flat"),
+    nprobe=int(os.getenv("VECTOR_INDEX_NPROBE", "8")),
+    ef_search=int(os.getenv("VECTOR_INDEX_EF_SEARCH", "64")),
+    embedding_backend=os.getenv("EMBEDDING_BACKEND", "torch"),
+    hybrid_search=os.getenv("VECTOR_HYBRID_SEARCH", "true").lower() == "true",
+    sources=os.getenv("VECTOR_SOURCES", DEFAULT_SOURCES),
+    ingest_batch_size=int(os.getenv("INGEST_BATCH_SIZE", "512")),
+    ingest_workers=int(os.getenv("INGEST_WORKERS", "1")),
+    refresh_interval=float(os.getenv("VECTOR_REFRESH_INTERVAL", "30")),
+    keep_versions=int(os.getenv("VECTOR_KEEP_VERSIONS", "3"))
+)
+
+def initialize_vector_store(force_rebuild: bool = False, incremental: bool = False):
     """Initialize the global vector store."""
-    vector_store.initialize_database(force_rebuild)
+    vector_store.initialize_database(force_rebuild, incremental)
 
-def vector_search_impl(query: str, category: str) -> str:
-    """Vector search implementation using the persistent store."""
-    # Ensure database is initialized
+def _ensure_vector_store() -> bool:
+    """Load the global vector store on first use, and pick up newly published versions."""
+    vector_store.maybe_refresh()
     if vector_store.index is None or len(vector_store.chunks) == 0:
         print("Vector database not initialized, attempting to load...")
         try:
             vector_store.initialize_database(force_rebuild=False)
         except Exception as e:
             print(f"Failed to initialize vector database: {e}")
-            return "Vector database not available. Please run 'python initialize_db.py' to set up the database."
+            return False
+    return True
+
+_retrieval_client = None
+_retrieval_client_lock = threading.Lock()
+
+def get_retrieval_client() -> RetrievalClient | None:
+    """Client for the shared retrieval server when RETRIEVAL_SERVER_URL is set."""
+    global _retrieval_client
+    url = os.getenv("RETRIEVAL_SERVER_URL")
+    if not url:
+        return None
+    if _retrieval_client is None or _retrieval_client.url != url:
+        with _retrieval_client_lock:
+            if _retrieval_client is None or _retrieval_client.url != url:
+                _retrieval_client = RetrievalClient(url)
+    return _retrieval_client
+
+def vector_search_batch(queries: List[str], categories: List[str | None] | str | None = None,
+                        top_k: int = 3) -> List[List[SearchResult]]:
+    """search_batch on the retrieval server if configured, else on the local store."""
+    client = get_retrieval_client()
+    if client is not None:
+        return client.search_batch(queries, categories, top_k)
+    if not _ensure_vector_store():
+        raise RuntimeError("Vector database not available. Please run 'python initialize_db.py' to set up the database.")
+    return vector_store.search_batch(queries, categories, top_k)
+
+def vector_search_results(query: str, category: str | None, top_k: int = 3) -> List[SearchResult]:
+    """Structured search results (with similarity scores) from the persistent store."""
+    return vector_search_batch([query], category, top_k)[0]
+
+def encode_texts(texts: List[str]) -> np.ndarray:
+    """Embed texts with the retrieval server's model if configured, else locally."""
+    client = get_retrieval_client()
+    return client.encode(texts) if client is not None else vector_store.encode(texts)
+
+def current_category_versions() -> Dict[str, str]:
+    """Content fingerprints of the index being searched, for cache invalidation."""
+    client = get_retrieval_client()
+    if client is not None:
+        return client.info()["category_versions"]
+    # Versions are only meaningful once the index is loaded
+    return vector_store.category_versions if _ensure_vector_store() else {}
 
-    results = vector_store.search(query, category, top_k=3)
-    return "\n\n".join(results)
\ No newline at end of file
+def vector_search_impl(query: str, category: str) -> str:
+    """Vector search implementation using the persistent store or the retrieval server."""
+    try:
+        results = [result["text"] for result in vector_search_results(query, category)]
+    except RuntimeError as e:
+        return str(e)
+    except Exception as e:
+        return f"Error in vector search: {str(e)}"
+    return "\n\n".join(results) if results else "No relevant information found."
@@ -0,0 +1,217 @@
+import re
+import json
+import sqlite3
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Callable, Awaitable, Dict, List, Any, Optional
+
+import tracing
+from bm25_index import tokenize
+
+# Set on an in-flight future whose leader was cancelled, telling waiters to fetch again
+_ABANDONED = object()
+
+class WebSearchCache:
+    """Persistent TTL cache of web search results with single-flight fetching.
+
+    Queries are keyed by their normalized text. Concurrent callers asking the
+    same uncached query, from threads or event loops, share one in-flight
+    fetch; failures are passed to every waiter and never cached. If the
+    fetching caller is cancelled, a waiter fetches again instead.
+    """
+
+    def __init__(self, cache_path: str = "web_search_cache.db", ttl_seconds: float = 3600):
+        self.cache_path = Path(cache_path)
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.cache_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS web_results ("
+            "query_key TEXT PRIMARY KEY, results TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Case-, whitespace- and trailing-punctuation-insensitive cache key."""
+        return re.sub(r"\s+", " ", query.lower()).strip().rstrip("?!. ")
+
+    def _get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT results, created FROM web_results WHERE query_key = ?", (key,)
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl_seconds:
+            return None
+        return json.loads(row[0])
+
+    def _put(self, key: str, results: List[Dict[str, Any]]):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO web_results (query_key, results, created) VALUES (?, ?, ?)",
+                (key, json.dumps(results), time.time())
+            )
+            self._conn.commit()
+
+    def _claim(self, key: str) -> tuple[Future, bool]:
+        """Return the in-flight future for key and whether this caller must fetch it."""
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = Future()
+            self._in_flight[key] = future
+            self.misses += 1
+            return future, True
+
+    def _settle(self, key: str, future: Future, results=None, error: Optional[BaseException] = None):
+        # The cache write is best-effort: waiters must get the results and the
+        # key must be freed even if SQLite or serialization fails
+        try:
+            if error is None:
+                try:
+                    self._put(key, results)
+                except Exception as e:
+                    print(f"DEBUG: Web search cache write failed: {e}")
+                future.set_result(results)
+            else:
+                future.set_exception(error)
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def _abandon(self, key: str, future: Future):
+        # Free the key first so the first waiter to retry becomes the new leader
+        with self._lock:
+            self._in_flight.pop(key, None)
+        future.set_result(_ABANDONED)
+
+    def _cached(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        results = self._get(key)
+        if results is not None:
+            with self._lock:
+                self.hits += 1
+            tracing.increment("web_cache_hits")
+        return results
+
+    def get_or_fetch(self, query: str, fetch: Callable[[str], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Return cached results for query, calling fetch(query) at most once across concurrent callers."""
+        key = self.normalize(query)
+        results = self._cached(key)
+        if results is not None:
+            return results
+
+        future, leader = self._claim(key)
+        if not leader:
+            results = future.result()
+            if results is _ABANDONED:
+                return self.get_or_fetch(query, fetch)
+            tracing.increment("web_cache_hits")
+            return results
+        try:
+            results = fetch(query)
+        except Exception as e:
+            self._settle(key, future, error=e)
+            raise
+        except BaseException:
+            self._abandon(key, future)
+            raise
+        self._settle(key, future, results)
+        return results
+
+    async def aget_or_fetch(self, query: str, fetch: Callable[[str], Awaitable[List[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+        """Async counterpart of get_or_fetch; coalesces with sync callers too."""
+        key = self.normalize(query)
+        results = await asyncio.to_thread(self._cached, key)
+        if results is not None:
+            return results
+
+        future, leader = self._claim(key)
+        if not leader:
+            # Shielded so a cancelled waiter does not cancel the shared future
+            results = await asyncio.shield(asyncio.wrap_future(future))
+            if results is _ABANDONED:
+                return await self.aget_or_fetch(query, fetch)
+            tracing.increment("web_cache_hits")
+            return results
+        try:
+            results = await fetch(query)
+        except Exception as e:
+            self._settle(key, future, error=e)
+            raise
+        except BaseException:
+            # Cancellation belongs to this caller, not to the queries waiting on it
+            self._abandon(key, future)
+            raise
+        await asyncio.to_thread(self._settle, key, future, results)
+        return results
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM web_results")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": (self.hits + self.coalesced) / total if total else 0.0,
+        }
+
+class LocalWebSearch:
+    """Offline stand-in for TavilySearchResults, for tests and benchmarks.
+
+    Ranks paragraphs of the local text files by query-token overlap and
+    returns them in Tavily's result shape, after an optional simulated
+    latency. Counts calls so tests can check how many searches were made.
+    """
+
+    def __init__(self, documents_dir: str = "data", max_results: int = 5, latency: float = 0.0):
+        self.max_results = max_results
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.paragraphs = []
+        for file_path in sorted(Path(documents_dir).glob("*.txt")):
+            text = file_path.read_text(encoding='utf-8')
+            for paragraph in re.split(r"\n\s*\n", text):
+                if paragraph.strip():
+                    self.paragraphs.append((file_path, paragraph.strip(), set(tokenize(paragraph))))
+
+    def _search(self, query: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            self.calls += 1
+        terms = set(tokenize(query))
+        scored = [(len(terms & tokens), position) for position, (_, _, tokens) in enumerate(self.paragraphs)]
+        ranked = sorted((item for item in scored if item[0] > 0), key=lambda item: (-item[0], item[1]))
+        results = []
+        for _, position in ranked[:self.max_results]:
+            file_path, paragraph, _ = self.paragraphs[position]
+            results.append({
+                "title": paragraph.splitlines()[0][:80],
+                "content": paragraph,
+                "url": file_path.resolve().as_uri(),
+            })
+        return results
+
+    def invoke(self, query: str) -> List[Dict[str, Any]]:
+        time.sleep(self.latency)
+        return self._search(query)
+
+    async def ainvoke(self, query: str) -> List[Dict[str, Any]]:
+        await asyncio.sleep(self.latency)
+        return self._search(query)